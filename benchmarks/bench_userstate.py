@@ -0,0 +1,35 @@
+"""Times `UserState.upsert` for payloads that didn't change against
+looking the user up and updating it, which is what upsert would do
+without comparing the payload first
+
+    python benchmarks/bench_userstate.py [number]
+"""
+import asyncio
+import sys
+import timeit
+
+from snekcord.manager import Manager
+
+PAYLOAD = {'id': '150325840957554688', 'username': 'snek',
+           'discriminator': '0001', 'avatar': 'a_0123456789abcdef',
+           'bot': False, 'public_flags': 64}
+
+
+def main(number=100000):
+    manager = Manager('token', loop=asyncio.new_event_loop())
+
+    user = manager.users.upsert(PAYLOAD)
+    user.cache()
+
+    for name, stmt in (
+        ('users.upsert (unchanged)', lambda: manager.users.upsert(PAYLOAD)),
+        ('users.get + user.update',
+         lambda: manager.users.get(PAYLOAD['id']).update(PAYLOAD)),
+        ('user.update', lambda: user.update(PAYLOAD)),
+    ):
+        seconds = min(timeit.repeat(stmt, number=number, repeat=5))
+        print(f'{name:<28}{seconds:.3f}s per {number} calls')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,109 @@
+from ..states.basestate import CachePolicy
+from ..utils import undefined
+from ..ws.shardws import ShardIntent
+
+__all__ = ('CachePlanner',)
+
+
+class CachePlanner:
+    """Decides which states are cached and which events are processed
+    based on a client's intents and the listeners registered on its
+    manager
+
+    States whose events can't be received with the client's intents are
+    never cached, dispatch events that neither maintain a cached state
+    nor have a listener or waiter are dropped before they're parsed
+
+    Attributes:
+        manager Manager: The manager that owns the states
+
+        intents ShardIntent: The client's intents
+
+        uncached frozenset[str]: The names of the states that are never
+            cached
+    """
+    # The intents that deliver the events which keep a state up to date
+    STATE_INTENTS = {
+        'MessageState': (ShardIntent.GUILD_MESSAGES
+                         | ShardIntent.DIRECT_MESSAGES),
+        'ReactionsState': (ShardIntent.GUILD_MESSAGE_REACTIONS
+                           | ShardIntent.DIRECT_MESSAGE_REACTIONS),
+        'GuildEmojiState': ShardIntent.GUILD_EMOJIS,
+        'GuildBanState': ShardIntent.GUILD_BANS,
+        'InviteState': ShardIntent.GUILD_INVITES,
+    }
+
+    # The state each event keeps up to date, None for events that don't
+    # touch the cache, events that aren't listed are always processed
+    EVENT_STATES = {
+        'MESSAGE_CREATE': 'MessageState',
+        'MESSAGE_UPDATE': 'MessageState',
+        'MESSAGE_DELETE': 'MessageState',
+        'MESSAGE_DELETE_BULK': 'MessageState',
+        'MESSAGE_REACTION_ADD': 'ReactionsState',
+        'MESSAGE_REACTION_REMOVE': 'ReactionsState',
+        'MESSAGE_REACTION_REMOVE_ALL': 'ReactionsState',
+        'MESSAGE_REACTION_REMOVE_EMOJI': 'ReactionsState',
+        'GUILD_EMOJIS_UPDATE': 'GuildEmojiState',
+        'GUILD_BAN_ADD': 'GuildBanState',
+        'GUILD_BAN_REMOVE': 'GuildBanState',
+        'INVITE_CREATE': 'InviteState',
+        'INVITE_DELETE': 'InviteState',
+        'PRESENCE_UPDATE': None,
+        'TYPING_START': None,
+        'VOICE_STATE_UPDATE': None,
+        'WEBHOOKS_UPDATE': None,
+        'GUILD_INTEGRATIONS_UPDATE': None,
+    }
+
+    # Fields that are dropped from guild payloads without the intent
+    GUILD_FIELD_INTENTS = {
+        'presences': ShardIntent.GUILD_PRESENCES,
+        'voice_states': ShardIntent.GUILD_VOICE_STATES,
+    }
+
+    def __init__(self, manager, intents):
+        self.manager = manager
+        self.intents = ShardIntent(intents)
+
+        self.uncached = frozenset()
+        self.dropped_fields = tuple(
+            field for field, intent in self.GUILD_FIELD_INTENTS.items()
+            if not self.intents & intent)
+
+    def get_policies(self):
+        return {name: CachePolicy.never()
+                for name, intent in self.STATE_INTENTS.items()
+                if not self.intents & intent}
+
+    def apply(self):
+        """Sets the planned cache policies on the manager, policies that
+        were set explicitly are left alone
+        """
+        for name, policy in self.get_policies().items():
+            self.manager.cache_policies.setdefault(name, policy)
+
+        self.uncached = frozenset(
+            name for name, policy in self.manager.cache_policies.items()
+            if not policy.enabled)
+
+        for state in self.manager.iter_states():
+            policy = self.manager.get_cache_policy(state)
+            if getattr(state, 'cache_policy', policy) is not policy:
+                state.set_cache_policy(policy)
+
+    def strip_guild(self, data):
+        for field in self.dropped_fields:
+            data.pop(field, None)
+
+    def is_maintained(self, name):
+        state = self.EVENT_STATES.get(name, undefined)
+        if state is undefined:
+            return True
+        return state is not None and state not in self.uncached
+
+    def has_listeners(self, name):
+        return self.manager.has_listeners(name)
+
+    def wants(self, name):
+        return self.is_maintained(name) or self.has_listeners(name)
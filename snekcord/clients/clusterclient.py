@@ -0,0 +1,520 @@
+import asyncio
+import multiprocessing
+import os
+import random
+import tempfile
+
+from .websocketclient import WebSocketClient
+from .. import rest
+from ..manager import Manager
+from ..utils import EventDispatcher, Snowflake, get_codec
+
+__all__ = ('ClusterBus', 'ClusterClient', 'ClusterSupervisor')
+
+
+async def _read_message(reader, codec):
+    line = await reader.readline()
+    if not line:
+        return None
+    return codec.loads(line)
+
+
+async def _write_message(writer, codec, message):
+    writer.write(codec.dumps_bytes(message) + b'\n')
+    await writer.drain()
+
+
+class ClusterBus(EventDispatcher):
+    """The connection between a worker process and the supervisor
+
+    Events dispatched by the worker's manager whose names are in
+    `forwarded` are sent to every other worker, where they are dispatched
+    on the bus as `(worker_id, shard_id, payload)`. Requests are answered
+    by every other worker using the handlers registered with
+    `register_handler`
+
+    Attributes:
+        worker_id int: The id of the worker that owns the bus
+
+        forwarded set[str]: The lowercased names of the forwarded events
+    """
+    def __init__(self, manager, *, worker_id, path, forwarded=()):
+        super().__init__(loop=manager.loop)
+        self.manager = manager
+        self.worker_id = worker_id
+        self.path = path
+        self.forwarded = {name.lower() for name in forwarded}
+
+        self.reader = None
+        self.writer = None
+
+        self._nonce = 0
+        self._requests = {}
+        self._handlers = {}
+
+        self.register_handler('find_guild', self._find_guild)
+
+        self.subscribe(manager)
+
+    def _find_guild(self, guild_id):
+        return self.manager.guilds.get(guild_id) is not None
+
+    def register_handler(self, method, callback):
+        self._handlers[method] = callback
+
+    def remove_handler(self, method):
+        self._handlers.pop(method, None)
+
+    async def send(self, message):
+        await _write_message(self.writer, self.manager.json, message)
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_unix_connection(
+            self.path)
+        await self.send({'type': 'hello', 'worker': self.worker_id})
+        self.loop.create_task(self._read_loop())
+
+    async def _read_loop(self):
+        while True:
+            message = await _read_message(self.reader, self.manager.json)
+            if message is None:
+                break
+
+            mtype = message['type']
+
+            if mtype == 'event':
+                EventDispatcher.run_callbacks(
+                    self, message['name'], message['worker'],
+                    message['shard'], message['payload'])
+
+            elif mtype == 'request':
+                self.loop.create_task(self._handle_request(message))
+
+            elif mtype in ('response', 'grant'):
+                future = self._requests.pop(message['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(message.get('results'))
+
+        for future in self._requests.values():
+            if not future.done():
+                future.set_exception(
+                    ConnectionError('Lost connection to the supervisor'))
+
+        self._requests.clear()
+
+    async def _handle_request(self, message):
+        handler = self._handlers.get(message['method'])
+
+        if handler is None:
+            result = None
+        else:
+            try:
+                result = handler(*message['args'])
+                if hasattr(result.__class__, '__await__'):
+                    result = await result
+            except Exception as exc:
+                result = {'error': repr(exc)}
+
+        await self.send({'type': 'response', 'id': message['id'],
+                         'origin': message['origin'],
+                         'worker': self.worker_id, 'result': result})
+
+    def _new_request(self):
+        self._nonce += 1
+        future = self.loop.create_future()
+        self._requests[self._nonce] = future
+        return self._nonce, future
+
+    async def request(self, method, *args, timeout=10):
+        """Invokes `method` on every other worker
+
+        Returns:
+            dict[int, Any]: The results keyed by worker id
+        """
+        nonce, future = self._new_request()
+
+        await self.send({'type': 'request', 'id': nonce, 'method': method,
+                         'args': args})
+
+        try:
+            results = await asyncio.wait_for(future, timeout)
+        finally:
+            self._requests.pop(nonce, None)
+
+        return dict(results)
+
+    async def find_guild(self, guild, *, timeout=10):
+        """Finds the worker that has the guild in its cache
+
+        Returns:
+            Optional[int]: The id of the worker
+        """
+        guild_id = Snowflake.try_snowflake(guild)
+
+        if self._find_guild(guild_id):
+            return self.worker_id
+
+        results = await self.request('find_guild', guild_id, timeout=timeout)
+        for worker, found in results.items():
+            if found is True:
+                return worker
+
+        return None
+
+    async def acquire_identify(self, bucket):
+        nonce, future = self._new_request()
+        await self.send({'type': 'identify', 'id': nonce, 'bucket': bucket})
+        await future
+
+    async def release_identify(self, bucket):
+        await self.send({'type': 'identified', 'bucket': bucket})
+
+    def _receives(self, name):
+        # Only the forwarded events count as listened to on the manager,
+        # the bus's own listeners are for events from other workers
+        return name in self.forwarded
+
+    def run_callbacks(self, name, *args):
+        # Called for every event dispatched by the manager, the bus itself
+        # only dispatches events that were received from other workers
+        name = name.lower()
+        if name not in self.forwarded or self.writer is None:
+            return
+
+        if len(args) == 1:
+            shard = getattr(args[0], 'shard', None)
+            payload = getattr(args[0], 'payload', None)
+        else:
+            shard, payload = args[0], args[1]
+
+        message = {'type': 'event', 'name': name, 'worker': self.worker_id,
+                   'shard': getattr(shard, 'id', None), 'payload': payload}
+
+        self.loop.create_task(self.send(message))
+
+
+class ClusterClient(WebSocketClient):
+    """A `WebSocketClient` that runs in a `ClusterSupervisor`'s worker
+    process, identifies are coordinated with the other workers through
+    the supervisor
+
+    Attributes:
+        cluster ClusterBus: The connection to the supervisor
+    """
+    def __init__(self, *args, worker_id, path, forwarded=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cluster = ClusterBus(self.manager, worker_id=worker_id,
+                                  path=path, forwarded=forwarded)
+
+    async def acquire_identify(self, shard_id):
+        await self.cluster.acquire_identify(shard_id % self.max_concurrency)
+
+    async def release_identify(self, shard_id):
+        await self.cluster.release_identify(shard_id % self.max_concurrency)
+
+    async def connect(self, *args, **kwargs):
+        await self.cluster.connect()
+        await super().connect(*args, **kwargs)
+
+
+def _run_worker(token, worker_id, shard_ids, shard_count, path, setup,
+                kwargs):
+    client = ClusterClient(token, worker_id=worker_id, path=path,
+                           shard_ids=shard_ids, shard_count=shard_count,
+                           **kwargs)
+
+    if setup is not None:
+        setup(client)
+
+    client.run_forever()
+
+
+class ClusterSupervisor:
+    """Spawns worker processes that each run a `ClusterClient` for a
+    contiguous range of shard ids and relays events and requests
+    between them over a Unix socket
+
+    Arguments:
+        token str: The bot's token
+
+        workers int: The number of worker processes
+
+        shard_count Optional[int]: The total number of shards, fetched
+            from Discord if not provided
+
+        setup Optional[Callable[[ClusterClient], Any]]: A picklable
+            function that's called in every worker before it connects,
+            this is where listeners should be registered
+
+        forwarded Iterable[str]: The names of the events that are
+            forwarded between workers
+
+        **kwargs: Passed to every `ClusterClient`
+    """
+    def __init__(self, token, *, workers, shard_count=None, setup=None,
+                 forwarded=(), path=None, loop=None, **kwargs):
+        self.token = token
+        self.workers = workers
+        self.shard_count = shard_count
+        self.setup = setup
+        self.kwargs = dict(kwargs, forwarded=tuple(forwarded))
+
+        if loop is not None:
+            self.loop = loop
+        else:
+            self.loop = asyncio.get_event_loop()
+
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(),
+                                f'snekcord-cluster-{os.getpid()}.sock')
+
+        self.path = path
+        self.json = get_codec(kwargs.get('json_codec'))
+        self.server = None
+
+        # Crashed workers are respawned after a delay that grows with
+        # every crash, workers that stayed up for respawn_cap seconds
+        # start over
+        self.respawn_base = 1
+        self.respawn_cap = 60
+        self._respawn_attempts = {}
+        self._respawn_delays = {}
+        self._respawn_at = {}
+        self._spawned_at = {}
+
+        self.processes = {}
+        self.writers = {}
+        self.shard_ids = {}
+
+        self._pending = {}
+        self._identify_locks = {}
+        self._identify_times = {}
+        self._identify_waiters = {}
+        self._closing = False
+
+    def get_shard_ids(self, worker_id):
+        per_worker, extra = divmod(self.shard_count, self.workers)
+        start = worker_id * per_worker + min(worker_id, extra)
+        stop = start + per_worker + (worker_id < extra)
+        return list(range(start, stop))
+
+    async def fetch_shard_count(self):
+        manager = Manager(self.token, loop=self.loop)
+        try:
+            data = await rest.get_gateway_bot.request(session=manager.rest)
+        finally:
+            await manager.close()
+        return data['shards']
+
+    def spawn(self, worker_id):
+        context = multiprocessing.get_context('spawn')
+        process = context.Process(
+            target=_run_worker,
+            args=(self.token, worker_id, self.shard_ids[worker_id],
+                  self.shard_count, self.path, self.setup, self.kwargs),
+            daemon=True)
+        process.start()
+        self.processes[worker_id] = process
+        self._spawned_at[worker_id] = self.loop.time()
+
+    def get_respawn_delay(self, worker_id):
+        if self.loop.time() - self._spawned_at[worker_id] > self.respawn_cap:
+            self._respawn_attempts[worker_id] = 0
+
+        attempts = self._respawn_attempts.get(worker_id, 0)
+        self._respawn_attempts[worker_id] = attempts + 1
+
+        if attempts == 0:
+            delay = self.respawn_base
+        else:
+            previous = self._respawn_delays.get(worker_id, self.respawn_base)
+            delay = min(self.respawn_cap,
+                        random.uniform(self.respawn_base, previous * 3))
+
+        self._respawn_delays[worker_id] = delay
+        return delay
+
+    async def send(self, worker_id, message):
+        writer = self.writers.get(worker_id)
+        if writer is not None:
+            try:
+                await _write_message(writer, self.json, message)
+            except ConnectionError:
+                pass
+
+    async def broadcast(self, message, exclude=None):
+        await asyncio.gather(*(self.send(worker_id, message)
+                               for worker_id in tuple(self.writers)
+                               if worker_id != exclude))
+
+    async def _handle_request(self, worker_id, message):
+        others = [other for other in self.writers if other != worker_id]
+        key = (worker_id, message['id'])
+
+        if not others:
+            await self.send(worker_id, {'type': 'response',
+                                        'id': message['id'], 'results': []})
+            return
+
+        self._pending[key] = {'remaining': set(others), 'results': {}}
+
+        message = dict(message, origin=worker_id)
+        await asyncio.gather(*(self.send(other, message)
+                               for other in others))
+
+    async def _handle_response(self, message):
+        key = (message['origin'], message['id'])
+        pending = self._pending.get(key)
+        if pending is None:
+            return
+
+        pending['results'][message['worker']] = message['result']
+        pending['remaining'].discard(message['worker'])
+
+        if not pending['remaining']:
+            await self._finish_request(key)
+
+    async def _finish_request(self, key):
+        pending = self._pending.pop(key)
+        worker_id, nonce = key
+        results = list(pending['results'].items())
+        await self.send(worker_id, {'type': 'response', 'id': nonce,
+                                    'results': results})
+
+    async def _handle_identify(self, worker_id, writer, message):
+        bucket = message['bucket']
+
+        lock = self._identify_locks.setdefault(bucket, asyncio.Lock())
+        await lock.acquire()
+
+        try:
+            last_identify = self._identify_times.get(bucket)
+            if last_identify is not None:
+                delay = last_identify + 5 - self.loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        except BaseException:
+            lock.release()
+            raise
+
+        if self.writers.get(worker_id) is not writer:
+            # The worker disconnected while it was waiting, a respawned
+            # worker with the same id has its own connection
+            lock.release()
+            return
+
+        self._identify_waiters[bucket] = worker_id
+        await self.send(worker_id, {'type': 'grant', 'id': message['id']})
+
+    def _release_identify(self, bucket):
+        self._identify_times[bucket] = self.loop.time()
+        self._identify_waiters.pop(bucket, None)
+
+        lock = self._identify_locks.get(bucket)
+        if lock is not None and lock.locked():
+            lock.release()
+
+    async def _handle_connection(self, reader, writer):
+        hello = await _read_message(reader, self.json)
+        if hello is None or hello['type'] != 'hello':
+            writer.close()
+            return
+
+        worker_id = hello['worker']
+        self.writers[worker_id] = writer
+
+        identifies = set()
+
+        try:
+            while True:
+                message = await _read_message(reader, self.json)
+                if message is None:
+                    break
+
+                mtype = message['type']
+
+                if mtype == 'event':
+                    await self.broadcast(message, exclude=worker_id)
+                elif mtype == 'request':
+                    await self._handle_request(worker_id, message)
+                elif mtype == 'response':
+                    await self._handle_response(message)
+                elif mtype == 'identify':
+                    task = self.loop.create_task(
+                        self._handle_identify(worker_id, writer, message))
+                    identifies.add(task)
+                    task.add_done_callback(identifies.discard)
+                elif mtype == 'identified':
+                    self._release_identify(message['bucket'])
+        finally:
+            if self.writers.get(worker_id) is writer:
+                del self.writers[worker_id]
+
+            for task in identifies:
+                task.cancel()
+
+            for bucket, waiter in tuple(self._identify_waiters.items()):
+                if waiter == worker_id:
+                    self._release_identify(bucket)
+
+            for key, pending in tuple(self._pending.items()):
+                pending['remaining'].discard(worker_id)
+                if not pending['remaining']:
+                    await self._finish_request(key)
+
+            writer.close()
+
+    async def start(self):
+        if self.shard_count is None:
+            self.shard_count = await self.fetch_shard_count()
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        self.server = await asyncio.start_unix_server(
+            self._handle_connection, self.path)
+
+        for worker_id in range(self.workers):
+            self.shard_ids[worker_id] = self.get_shard_ids(worker_id)
+            self.spawn(worker_id)
+
+        while not self._closing:
+            await asyncio.sleep(1)
+            self._check_workers()
+
+    def _check_workers(self):
+        for worker_id, process in tuple(self.processes.items()):
+            if process.is_alive() or self._closing:
+                continue
+
+            respawn_at = self._respawn_at.get(worker_id)
+            if respawn_at is None:
+                self._respawn_at[worker_id] = (
+                    self.loop.time() + self.get_respawn_delay(worker_id))
+            elif self.loop.time() >= respawn_at:
+                del self._respawn_at[worker_id]
+                self.spawn(worker_id)
+
+    def close(self):
+        self._closing = True
+
+        for process in self.processes.values():
+            process.terminate()
+
+        if self.server is not None:
+            self.server.close()
+
+        # Closing the server leaves the accepted connections open
+        for writer in tuple(self.writers.values()):
+            writer.close()
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def run_forever(self):
+        try:
+            self.loop.run_until_complete(self.start())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
@@ -1,13 +1,17 @@
+import asyncio
+import functools
 from collections import namedtuple
+from urllib.parse import urlencode
 
+from .cacheplanner import CachePlanner
 from .client import Client
 from .. import rest
 from ..ws.basews import WebSocketWorker
-from ..ws.shardws import Shard
+from ..ws.shardws import Shard, ShardIntent
 
 _base_fields = ('shard', 'payload')
 
-ChannnelCreateEvent = namedtuple(
+ChannelCreateEvent = namedtuple(
     'ChannelCreateEvent', _base_fields + ('channel',))
 ChannelUpdateEvent = namedtuple(
     'ChannelUpdateEvent', _base_fields + ('channel',))
@@ -35,7 +39,7 @@ GuildBanRemoveEvent = namedtuple(
     'GuildBanRemoveEvent', _base_fields + ('guild', 'ban',))
 
 GuildEmojisUpdateEvent = namedtuple(
-    'GuildEmojisUpdate',  _base_fields + ('guild',))
+    'GuildEmojisUpdateEvent', _base_fields + ('guild',))
 
 GuildIntegrationsUpdateEvent = namedtuple(
     'GuildIntegrationsUpdateEvent', _base_fields + ('guild',))
@@ -62,7 +66,7 @@ IntegrationDeleteEvent = namedtuple(
     'IntegrationDeleteEvent', _base_fields + ('guild',))
 
 InviteCreateEvent = namedtuple(
-    'InviteCreateEvent', _base_fields + ('intive',))
+    'InviteCreateEvent', _base_fields + ('invite',))
 InviteDeleteEvent = namedtuple(
     'InviteDeleteEvent', _base_fields + ('invite',))
 
@@ -85,7 +89,7 @@ MessageReactionRemoveAllEvent = namedtuple(
     'MessageReactionRemoveAllEvent',
     _base_fields + ('channel', 'message'))
 MessageReactionRemoveEmojiEvent = namedtuple(
-    'MessageReactionRemoveEmoji',
+    'MessageReactionRemoveEmojiEvent',
     _base_fields + ('channel', 'message', 'reactions'))
 
 TypingStartEvent = namedtuple(
@@ -104,9 +108,38 @@ StageInstanceDeleteEvent = namedtuple(
 
 
 class WebSocketClient(Client):
-    def __init__(self, *args, **kwargs):
+    __planner_class__ = CachePlanner
+
+    def __init__(self, *args, intents=None, compress=False, encoding='json',
+                 shard_count=None, shard_ids=None, lazy_guilds=False,
+                 **kwargs):
         super().__init__(*args, **kwargs)
 
+        # Guilds from GUILD_CREATE only build their channels, emojis,
+        # roles and members once they're accessed
+        self.manager.guilds.lazy = lazy_guilds
+
+        if intents is None:
+            intents = ShardIntent.default()
+
+        self.intents = ShardIntent(intents)
+        self.planner = self.__planner_class__(self.manager, self.intents)
+        self.planner.apply()
+
+        self.compress = compress
+        self.encoding = encoding
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+
+        self.ready = asyncio.Event()
+
+        self.max_concurrency = 1
+        self._identify_times = {}
+        self._identify_locks = {}
+
+        self._sessions = {}
+        self._sessions_shard_count = None
+
         self.shards = {}
         self.sharder = WebSocketWorker(manager=self.manager, timeout=30)
 
@@ -120,28 +153,53 @@ class WebSocketClient(Client):
 
     @property
     def user(self):
-        if not self.shards:
+        for shard in self.shards.values():
+            return shard.user
+        return None
+
+    def _hydrate_channels(self, payload):
+        # Lazy guilds keep their channels as payloads until they're
+        # accessed, they have to be built before a channel is looked up
+        # or a newer payload for one of them is upserted
+        guild_id = payload.get('guild_id')
+        if guild_id is None:
             return None
-        return self.shards[0].user
+
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            return None
+
+        return guild.channels
+
+    def _get_channel(self, payload):
+        channel = self.channels.get(payload['channel_id'])
+        if channel is None and self._hydrate_channels(payload) is not None:
+            channel = self.channels.get(payload['channel_id'])
+        return channel
 
     def _event_channel_create(self, shard, payload):
+        channels = self._hydrate_channels(payload)
         channel = self.channels.upsert(payload)
-        return ChannelUpdateEvent(shard=shard, payload=payload,
+        if channels is not None:
+            channels.add_key(channel.id)
+        return ChannelCreateEvent(shard=shard, payload=payload,
                                   channel=channel)
 
     def _event_channel_update(self, shard, payload):
+        self._hydrate_channels(payload)
         channel = self.channels.upsert(payload)
         return ChannelUpdateEvent(shard=shard, payload=payload,
                                   channel=channel)
 
     def _event_channel_delete(self, shard, payload):
+        self._hydrate_channels(payload)
         channel = self.channels.upsert(payload)
         channel._delete()
-        return ChannelUpdateEvent(shard=shard, payload=payload,
+        return ChannelDeleteEvent(shard=shard, payload=payload,
                                   channel=channel)
 
     def _event_channel_pins_update(self, shard, payload):
-        channel = self.channels.get(payload['channel_id'])
+        channel = self._get_channel(payload)
         if channel is not None:
             channel.last_pin_timestamp = None
         return ChannelPinsUpdateEvent(shard=shard, payload=payload,
@@ -263,7 +321,7 @@ class WebSocketClient(Client):
 
     def _event_message_create(self, shard, payload):
         message = None
-        channel = self.channels.get(payload['channel_id'])
+        channel = self._get_channel(payload)
         if channel is not None:
             message = channel.messages.upsert(payload)
 
@@ -272,7 +330,7 @@ class WebSocketClient(Client):
 
     def _event_message_update(self, shard, payload):
         message = None
-        channel = self.channels.get(payload['channel_id'])
+        channel = self._get_channel(payload)
         if channel is not None:
             message = channel.messages.upsert(payload)
 
@@ -281,7 +339,7 @@ class WebSocketClient(Client):
 
     def _event_message_delete(self, shard, payload):
         message = None
-        channel = self.channels.get(payload['channel_id'])
+        channel = self._get_channel(payload)
         if channel is not None:
             message = channel.messages.get(payload['id'])
             if message is not None:
@@ -300,25 +358,150 @@ class WebSocketClient(Client):
         return StageInstanceUpdateEvent(shard=shard, payload=payload,
                                         stage=stage)
 
-    def _event_state_instance_delete(self, shard, payload):
+    def _event_stage_instance_delete(self, shard, payload):
         stage = self.stages.upsert(payload)
         stage._delete()
-        return StageInstanceCreateEvent(shard=shard, payload=payload,
+        return StageInstanceDeleteEvent(shard=shard, payload=payload,
                                         stage=stage)
 
     async def fetch_gateway(self):
         data = await rest.get_gateway.request(session=self.manager.rest)
         return data
 
+    async def fetch_gateway_bot(self):
+        data = await rest.get_gateway_bot.request(session=self.manager.rest)
+        return data
+
+    def get_gateway_url(self, gateway):
+        params = {
+            'v': self.manager.api_version.lstrip('v'),
+            'encoding': self.encoding,
+        }
+
+        if self.compress:
+            params['compress'] = 'zlib-stream'
+
+        return f'{gateway["url"]}?{urlencode(params)}'
+
+    async def acquire_identify(self, shard_id):
+        # Shards in the same identify bucket have to identify
+        # at least 5 seconds apart, the bucket is locked until
+        # release_identify so that shards re-identifying at the
+        # same time are spaced out too
+        bucket = shard_id % self.max_concurrency
+
+        lock = self._identify_locks.get(bucket)
+        if lock is None:
+            lock = self._identify_locks[bucket] = asyncio.Lock()
+
+        await lock.acquire()
+
+        try:
+            last_identify = self._identify_times.get(bucket)
+            if last_identify is not None:
+                delay = last_identify + 5 - self.manager.loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        except BaseException:
+            lock.release()
+            raise
+
+    async def release_identify(self, shard_id):
+        bucket = shard_id % self.max_concurrency
+        self._identify_times[bucket] = self.manager.loop.time()
+
+        lock = self._identify_locks.get(bucket)
+        if lock is not None and lock.locked():
+            lock.release()
+
+    def snapshot(self, path):
+        """Writes the cache and the shards' sessions to a file, see
+        `Manager.snapshot`
+        """
+        sessions = {str(shard_id): shard.get_session()
+                    for shard_id, shard in self.shards.items()
+                    if shard.session_id is not None}
+
+        shard_count = None
+        for shard in self.shards.values():
+            shard_count = shard.count
+
+        self.manager.snapshot(path, extra={'shard_count': shard_count,
+                                           'sessions': sessions})
+
+    def restore(self, path):
+        """Fills the cache from a file written by `snapshot`, shards
+        resume the stored sessions instead of identifying when the client
+        connects with the same number of shards
+        """
+        extra = self.manager.restore(path) or {}
+
+        self._sessions = {int(shard_id): session for shard_id, session
+                          in extra.get('sessions', {}).items()}
+        self._sessions_shard_count = extra.get('shard_count')
+
+    def _create_shard(self, worker, *, shard_id, shard_count):
+        shard = Shard(worker, shard_id=shard_id, shard_count=shard_count,
+                      intents=self.intents, compress=self.compress,
+                      encoding=self.encoding, client=self)
+
+        if shard_count == self._sessions_shard_count:
+            session = self._sessions.get(shard_id)
+            if session is not None:
+                shard.restore_session(session)
+
+        return shard
+
+    async def _launch_shards(self, shard_ids, shard_count, url,
+                             *args, **kwargs):
+        for shard_id in shard_ids:
+            # Shards go through acquire_identify and release_identify
+            # every time they identify, including after reconnecting
+            shard = await self.sharder.create_connection(
+                functools.partial(self._create_shard, shard_id=shard_id,
+                                  shard_count=shard_count),
+                url, *args, **kwargs)
+
+            self.shards[shard_id] = shard
+
     async def connect(self, *args, **kwargs):
-        gateway = await self.fetch_gateway()
+        gateway = await self.fetch_gateway_bot()
+
+        shard_count = self.shard_count
+        if shard_count is None:
+            shard_count = gateway['shards']
+
+        shard_ids = self.shard_ids
+        if shard_ids is None:
+            shard_ids = range(shard_count)
+
+        self.max_concurrency = (
+            gateway['session_start_limit']['max_concurrency'])
+
+        buckets = {}
+        for shard_id in shard_ids:
+            bucket = buckets.setdefault(shard_id % self.max_concurrency, [])
+            bucket.append(shard_id)
+
+        url = self.get_gateway_url(gateway)
+
+        # Shards need heartbeats while the remaining ones are launching
+        worker = self.manager.loop.create_task(self.sharder.work())
+
+        try:
+            await asyncio.gather(*(
+                self._launch_shards(bucket, shard_count, url, *args, **kwargs)
+                for bucket in buckets.values()))
+        except BaseException:
+            worker.cancel()
+            raise
 
-        shard = await self.sharder.create_connection(
-            Shard, gateway['url'], *args, **kwargs)
+        # Restored sessions are only good for the first launch
+        self._sessions.clear()
 
-        self.shards[0] = shard
+        self.ready.set()
 
-        await self.sharder.work()
+        await worker
 
     def run_forever(self):
         self.manager.loop.create_task(self.connect())
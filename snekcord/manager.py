@@ -1,7 +1,11 @@
 import asyncio
+import os
 import signal
+import sys
+import zlib
 
 from .rest import RestSession
+from .states.basestate import BaseState, BaseSubState, CacheCounters
 from .states.channelstate import ChannelState, GuildChannelState
 from .states.emojistate import GuildEmojiState
 from .states.guildstate import GuildBanState, GuildState
@@ -12,10 +16,59 @@ from .states.reactionsstate import ReactionsState
 from .states.rolestate import GuildMemberRoleState, RoleState
 from .states.stagestage import StageState
 from .states.userstate import UserState
-from .utils import EventDispatcher
+from .utils import EventDispatcher, get_codec
 
 __all__ = ('Manager',)
 
+SNAPSHOT_MAGIC = b'SNEKCORD'
+SNAPSHOT_VERSION = 1
+
+# The keys that every payload in a snapshot needs, per state
+_snapshot_keys = {
+    'users': ('id',),
+    'channels': ('id',),
+    'guilds': ('id',),
+    'messages': ('id', 'channel_id'),
+    'invites': ('code',),
+}
+
+# The slots that hold a state, per object class
+_state_slots = {}
+
+
+def _iter_slots(cls):
+    for klass in cls.__mro__:
+        for name in getattr(klass, '__slots__', ()):
+            if name not in ('state', '__weakref__'):
+                yield name
+
+
+def _child_states(obj):
+    cls = obj.__class__
+
+    names = _state_slots.get(cls)
+    if names is None:
+        # States can be created lazily so unset slots are kept too
+        names = _state_slots[cls] = tuple(
+            name for name in _iter_slots(cls)
+            if isinstance(getattr(obj, name, None),
+                          (BaseState, BaseSubState, type(None))))
+
+    for name in names:
+        value = getattr(obj, name, None)
+        if isinstance(value, (BaseState, BaseSubState)):
+            yield value
+
+
+def _sizeof(obj):
+    # Other objects and states are accounted for on their own
+    size = sys.getsizeof(obj)
+    for name in _iter_slots(obj.__class__):
+        value = getattr(obj, name, None)
+        if value is not None and not hasattr(value, '__slots__'):
+            size += sys.getsizeof(value)
+    return size
+
 
 class Manager(EventDispatcher):
     DEFAULT_CLASSES = {
@@ -38,11 +91,22 @@ class Manager(EventDispatcher):
     __classes__ = DEFAULT_CLASSES.copy()
     __handled_signals__ = [signal.SIGINT, signal.SIGTERM]
 
-    def __init__(self, token, *, loop=None, api_version='9'):
+    def __init__(self, token, *, loop=None, api_version='9',
+                 ratelimit_store=None, json_codec=None, cache_policies=None):
         super().__init__(loop=loop)
 
         self.token = token
         self.api_version = f'v{api_version}'
+        self.ratelimit_store = ratelimit_store
+        self.json = get_codec(json_codec)
+
+        if cache_policies is not None:
+            self.cache_policies = dict(cache_policies)
+        else:
+            self.cache_policies = {}
+
+        # state class name -> CacheCounters
+        self.cache_counters = {}
 
         self.rest = self.get_class('RestSession')(manager=self)
         self.channels = self.get_class('ChannelState')(manager=self)
@@ -66,6 +130,271 @@ class Manager(EventDispatcher):
     def get_class(cls, name):
         return cls.__classes__[name]
 
+    def get_cache_counters(self, state):
+        """Returns the counters shared by the states of `state`'s class"""
+        name = state.__class__.__name__
+
+        counters = self.cache_counters.get(name)
+        if counters is None:
+            counters = self.cache_counters[name] = CacheCounters()
+
+        return counters
+
+    def get_cache_policy(self, state):
+        # Policies are keyed by class name, a policy for a base class
+        # also applies to the classes set with set_class
+        for klass in state.__class__.__mro__:
+            policy = self.cache_policies.get(klass.__name__)
+            if policy is not None:
+                return policy
+        return state.__cache_policy__
+
+    def set_cache_policy(self, name, policy):
+        """Sets the policy for the states of the class called `name` and
+        its subclasses, the states that already exist start using it
+        right away
+        """
+        self.cache_policies[name] = policy
+
+        for state in tuple(self.iter_states()):
+            if not isinstance(state, BaseState):
+                continue
+
+            if any(klass.__name__ == name
+                   for klass in state.__class__.__mro__):
+                state.set_cache_policy(self.get_cache_policy(state))
+
+    def iter_states(self):
+        """Yields every state the manager can reach, including the
+        states that belong to guilds, channels, members and messages
+        """
+        stack = [self.channels, self.guilds, self.invites, self.stages,
+                 self.users]
+        seen = set()
+
+        while stack:
+            state = stack.pop()
+
+            if id(state) in seen:
+                continue
+
+            seen.add(id(state))
+            yield state
+
+            if (isinstance(state, BaseState)
+                    and not getattr(state.mapping, 'compact', False)):
+                for obj in state.values():
+                    stack.extend(_child_states(obj))
+
+    def cache_stats(self, *, sample_size=16):
+        """Collects entry counts, recycle bin sizes, hit/miss/eviction
+        counters and memory estimates for every class of state
+
+        The counts are kept up to date by the states, only the memory
+        estimate looks at the cache. It's extrapolated from the shallow
+        size of up to `sample_size` objects of each class of state,
+        nested objects and states are counted separately
+
+        Returns:
+            dict: The stats under `states` keyed by state class name and
+                the total under `estimated_bytes`
+        """
+        states = {}
+        total = 0
+
+        for name, counters in self.cache_counters.items():
+            stats = states[name] = counters.to_dict()
+
+            stats['bytes_per_object'] = self._sample_size(
+                counters, sample_size)
+            stats['estimated_bytes'] = (stats['bytes_per_object']
+                                        * stats['entries'])
+
+            total += stats['estimated_bytes']
+
+        return {'states': states, 'estimated_bytes': total}
+
+    def _sample_size(self, counters, sample_size):
+        sizes = []
+        count = 0
+
+        for state in counters.states:
+            if isinstance(state, BaseSubState):
+                # The objects belong to the superstate
+                return 0
+
+            if getattr(state.mapping, 'compact', False):
+                # Compact mappings account for themselves instead of
+                # building every object
+                if len(state):
+                    sizes.append(state.mapping.nbytes())
+                    count += len(state)
+            else:
+                for obj in state.values():
+                    sizes.append(_sizeof(obj))
+                    count += 1
+
+                    if count >= sample_size:
+                        break
+
+            if count >= sample_size:
+                break
+
+        if not count:
+            return 0
+
+        return sum(sizes) // count
+
+    def to_snapshot(self):
+        """Collects the payloads of every cached user, channel, guild,
+        message and invite, guilds carry their channels, emojis, roles
+        and members
+
+        Returns:
+            dict: The payloads keyed by state
+        """
+        channels = []
+        messages = []
+
+        for channel in self.channels:
+            if getattr(channel, 'guild_id', None) is None:
+                channels.append(channel._snapshot())
+
+            state = getattr(channel, 'messages', None)
+            if state is not None:
+                messages.extend(message._snapshot() for message in state)
+
+        return {
+            'users': [user._snapshot() for user in self.users],
+            'channels': channels,
+            'guilds': [guild._snapshot() for guild in self.guilds],
+            'messages': messages,
+            'invites': [invite._snapshot() for invite in self.invites],
+        }
+
+    @staticmethod
+    def _validate_snapshot(snapshot):
+        if not isinstance(snapshot, dict):
+            raise ValueError('The snapshot is not an object')
+
+        for name, keys in _snapshot_keys.items():
+            payloads = snapshot.get(name)
+            if not isinstance(payloads, list):
+                raise ValueError(f'The snapshot has no {name!r} list')
+
+            for data in payloads:
+                if not isinstance(data, dict) or any(key not in data
+                                                     for key in keys):
+                    raise ValueError(
+                        f'The snapshot has a malformed payload in {name!r}')
+
+    def load_snapshot(self, snapshot):
+        """Upserts the payloads collected by `to_snapshot`, users come
+        first so that everything else can reference them by id
+
+        Raises:
+            ValueError: Raised when the snapshot is missing a state or
+                has a payload that can't be loaded
+        """
+        self._validate_snapshot(snapshot)
+
+        try:
+            self._load_snapshot(snapshot)
+        except (KeyError, TypeError) as exc:
+            raise ValueError(
+                f'The snapshot has a malformed payload: {exc!r}') from exc
+
+    def _load_snapshot(self, snapshot):
+        # Users stay cached until everything that references them is
+        # loaded, the recycle bin is too small to hold them meanwhile
+        users = self.users.upsert_many(snapshot['users'])
+        for user in users:
+            user.cache()
+
+        for data in snapshot['channels']:
+            if 'type' in data:
+                self.channels.upsert(data)
+
+        channel_ids = {data['channel_id'] for data in snapshot['messages']}
+
+        for data in snapshot['guilds']:
+            guild = self.guilds.upsert(data)
+
+            # Lazy guilds have to build the channels that messages go in
+            if any(channel['id'] in channel_ids
+                   for channel in data.get('channels', ())):
+                guild.channels
+
+        for data in snapshot['messages']:
+            channel = self.channels.get(data['channel_id'])
+            state = getattr(channel, 'messages', None)
+            if state is not None:
+                state.upsert(data)
+
+        self.invites.upsert_many(snapshot['invites'])
+
+        for user in users:
+            if user.id not in self.users.references:
+                user.uncache()
+
+    def snapshot(self, path, *, extra=None):
+        """Writes the cache to a file so that a restarted process can
+        start with it through `restore`
+
+        The file holds a header followed by the zlib compressed output
+        of `to_snapshot` encoded with the manager's json codec, it's
+        written to a temporary file first and then moved into place
+
+        Arguments:
+            path str: The path of the file
+
+            extra Optional[dict]: Anything else that should be stored,
+                e.g. the shards' session ids and sequences
+        """
+        document = self.to_snapshot()
+        document['extra'] = extra
+
+        data = zlib.compress(self.json.dumps_bytes(document))
+
+        temp = f'{path}.tmp'
+        with open(temp, 'wb') as fp:
+            fp.write(SNAPSHOT_MAGIC)
+            fp.write(bytes((SNAPSHOT_VERSION,)))
+            fp.write(data)
+
+        os.replace(temp, path)
+
+    def restore(self, path):
+        """Fills the cache from a file written by `snapshot`
+
+        Raises:
+            ValueError: Raised when the file isn't a snapshot, is
+                truncated or corrupt, is missing a state or was written
+                by an incompatible version
+
+        Returns:
+            Optional[dict]: The `extra` that was passed to `snapshot`
+        """
+        with open(path, 'rb') as fp:
+            data = fp.read()
+
+        header = len(SNAPSHOT_MAGIC)
+        if len(data) <= header or data[:header] != SNAPSHOT_MAGIC:
+            raise ValueError(f'{path!r} is not a snapshot')
+
+        if data[header] != SNAPSHOT_VERSION:
+            raise ValueError(
+                f'{path!r} was written by snapshot version {data[header]}')
+
+        try:
+            document = self.json.loads(zlib.decompress(data[header + 1:]))
+        except (zlib.error, ValueError) as exc:
+            raise ValueError(f'{path!r} is a corrupt snapshot') from exc
+
+        self.load_snapshot(document)
+
+        return document.get('extra')
+
     @classmethod
     def add_handled_signal(cls, signo):
         cls.__handled_signals__.append(signo)
@@ -92,6 +421,11 @@ class Manager(EventDispatcher):
     async def close(self):
         await self.rest.aclose()
 
+        if self._pool is not None:
+            self._pool.close()
+
+        self.shutdown_executors()
+
     async def finalize(self):
         await self.close()
 
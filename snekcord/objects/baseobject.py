@@ -32,7 +32,12 @@ class BaseObject(JsonObject, template=BaseTemplate):
         The `deleted` and `deleted_at` attributes will only be accurate
         for objects maintained by a Discord WebSocket connection
     """
-    __slots__ = ('state', 'id', 'cached', 'deleted', 'deleted_at')
+    __slots__ = ('state', 'id', 'cached', 'deleted', 'deleted_at',
+                 '__weakref__')
+
+    # The attributes holding users that are referenced by the object
+    # for as long as it's cached, see `UserState.acquire`
+    __user_attrs__ = ()
 
     def __init__(self, *, state):
         self.state = state
@@ -65,9 +70,15 @@ class BaseObject(JsonObject, template=BaseTemplate):
         """Stores the object in the state's cache and attempts
         to remove it from the state's recycle bin
         """
-        self.cached = True
-        self.state[self.id] = self
+        if not self.cached:
+            self.cached = True
+            if self.__user_attrs__:
+                self._acquire_users()
+
         self.state.unrecycle(self.id, None)
+        # Storing the object can evict it right away if the
+        # state's cache policy doesn't allow it
+        self.state[self.id] = self
 
     def uncache(self, recycle=True):
         """Removes the object from the state's cache
@@ -76,11 +87,55 @@ class BaseObject(JsonObject, template=BaseTemplate):
             recycle bool: Whether or not to put the object in the
                 state's recycle bin
         """
+        if self.cached and self.__user_attrs__:
+            self._release_users()
+
         self.cached = False
         self.state.pop(self.id, None)
         if recycle:
             self.state.recycle(self.id, self)
 
+    def _acquire_users(self):
+        for name in self.__user_attrs__:
+            user = getattr(self, name, None)
+            if user is not None:
+                self.state._acquire_user(user)
+
+    def _release_users(self):
+        for name in self.__user_attrs__:
+            user = getattr(self, name, None)
+            if user is not None:
+                self.state._release_user(user)
+
+    def _set_user(self, name, data):
+        """Upserts a user and stores it in the `name` attribute, moving
+        the reference over if the object is cached
+        """
+        user = self.state.manager.users.upsert(data)
+        old = getattr(self, name, None)
+
+        if user is not old:
+            setattr(self, name, user)
+
+            if self.cached:
+                self.state._acquire_user(user)
+                if old is not None:
+                    self.state._release_user(old)
+
+        return user
+
+    def _snapshot(self):
+        # A payload that the state's upsert turns back into the object,
+        # users are referenced by id and restored separately
+        data = self.to_dict()
+
+        for name in self.__user_attrs__:
+            user = getattr(self, name, None)
+            if user is not None:
+                data[name] = {'id': str(user.id)}
+
+        return data
+
     async def fetch(self):
         """Equivalent to `self.state.fetch(self.id)`"""
         return await self.state.fetch(self.id)
@@ -236,13 +236,11 @@ class TextChannel(GuildChannel, template=TextChannelTemplate):
         return self.messages.upsert_many(data)
 
 
-class CategoryChannel(GuildChannel):
+class CategoryChannel(GuildChannel, template=GuildChannelTemplate):
     """Represents the `GUILD_CATEGORY` channel type"""
     def children(self):
         """Yields all of the `GuildChannels` that belong to this category"""
-        for channel in self.state:
-            if channel.parent_id == self.id:
-                yield channel
+        yield from self.state.find('parent', self.id)
 
 
 VoiceChannelTemplate = JsonTemplate(
@@ -27,6 +27,7 @@ GuildEmojiTemplate = JsonTemplate(
 
 class GuildEmoji(BaseObject, template=GuildEmojiTemplate):
     __slots__ = ('guild', 'user')
+    __user_attrs__ = ('user',)
 
     def __init__(self, *, state, guild):
         super().__init__(state=state)
@@ -72,7 +73,7 @@ class GuildEmoji(BaseObject, template=GuildEmojiTemplate):
 
         user = data.get('user')
         if user is not None:
-            self.user = self.state.manager.users.upsert(user)
+            self._set_user('user', user)
 
 
 class BuiltinEmoji:
@@ -76,10 +76,15 @@ class Guild(BaseObject, template=GuildTemplate):
         roles RoleState: The guild's role state
 
         members GuildMemberState: The guild's member state
+
+    note:
+        When the guild's state is lazy the channels, emojis, roles and
+        members from payloads are kept as they are and only turned into
+        objects the first time the corresponding state is accessed
     """
     # TODO(asleep-cult): Do it
-    __slots__ = ('widget', 'vanity_url', 'welcome_screen', 'channels',
-                 'emojis', 'roles', 'members')
+    __slots__ = ('widget', 'vanity_url', 'welcome_screen', '_channels',
+                 '_emojis', '_roles', '_members', '_pending')
 
     def __init__(self, *, state):
         super().__init__(state=state)
@@ -88,21 +93,70 @@ class Guild(BaseObject, template=GuildTemplate):
         self.vanity_url = GuildVanityURL.unmarshal(guild=self)
         self.welcome_screen = WelcomeScreen.unmarshal(guild=self)
 
-        self.channels = self.state.manager.get_class('GuildChannelState')(
-            superstate=self.state.manager.channels,
-            guild=self)
+        self._channels = None
+        self._emojis = None
+        self._roles = None
+        self._members = None
+        self._pending = None
+
+    @property
+    def channels(self):
+        if self._channels is None:
+            self._channels = self.state.manager.get_class(
+                'GuildChannelState')(superstate=self.state.manager.channels,
+                                     guild=self)
+            self._hydrate('channels')
+        return self._channels
+
+    @property
+    def emojis(self):
+        if self._emojis is None:
+            self._emojis = self.state.manager.get_class('GuildEmojiState')(
+                manager=self.state.manager,
+                guild=self)
+            self._hydrate('emojis')
+        return self._emojis
 
-        self.emojis = self.state.manager.get_class('GuildEmojiState')(
-            manager=self.state.manager,
-            guild=self)
+    @property
+    def roles(self):
+        if self._roles is None:
+            self._roles = self.state.manager.get_class('RoleState')(
+                manager=self.state.manager,
+                guild=self)
+            self._hydrate('roles')
+        return self._roles
 
-        self.roles = self.state.manager.get_class('RoleState')(
-            manager=self.state.manager,
-            guild=self)
+    @property
+    def members(self):
+        if self._members is None:
+            self._members = self.state.manager.get_class('GuildMemberState')(
+                manager=self.state.manager,
+                guild=self)
+            self._hydrate('members')
+        return self._members
 
-        self.members = self.state.manager.get_class('GuildMemberState')(
-            manager=self.state.manager,
-            guild=self)
+    @property
+    def hydrated(self):
+        """Whether or not every pending sub-payload has been turned
+        into objects"""
+        return not self._pending
+
+    def _hydrate(self, name):
+        if self._pending is None:
+            return
+
+        values = self._pending.pop(name, None)
+        if values is None:
+            return
+
+        if name == 'channels':
+            self._update_channels(values)
+        elif name == 'emojis':
+            self._update_emojis(values)
+        elif name == 'roles':
+            self._roles.upsert_many(values)
+        elif name == 'members':
+            self._members.extend(values)
 
     async def modify(self, **kwargs):
         keys = rest.modify_guild.keys
@@ -197,11 +251,29 @@ class Guild(BaseObject, template=GuildTemplate):
     def to_preview_dict(self):
         return GuildPreviewTemplate.to_dict(self)
 
+    def _update_channels(self, channels):
+        for channel in channels:
+            channel = self.state.manager.channels.upsert(channel)
+            self.channels.add_key(channel.id)
+
+    def _snapshot(self):
+        data = super()._snapshot()
+
+        for name in ('channels', 'emojis', 'roles', 'members'):
+            state = getattr(self, f'_{name}')
+            if state is not None:
+                data[name] = [value._snapshot() for value in state]
+            elif self._pending is not None and name in self._pending:
+                # Pending payloads are kept as they are
+                data[name] = self._pending[name]
+
+        return data
+
     def _update_emojis(self, emojis):
         emojis = self.emojis.upsert_many(emojis)
         for emoji in set(self.emojis):
             if emoji not in emojis:
-                self.emojis.pop(emoji.id)
+                emoji.uncache(recycle=False)
 
     def update(self, data, *args, **kwargs):
         super().update(data, *args, **kwargs)
@@ -223,23 +295,35 @@ class Guild(BaseObject, template=GuildTemplate):
         if vanity_url_code is None:
             self.vanity_url.update({'code': vanity_url_code})
 
-        channels = data.get('channels')
-        if channels is not None:
-            for channel in channels:
-                channel = self.state.manager.channels.upsert(channel)
-                self.channels.add_key(channel.id)
+        for name in ('channels', 'emojis', 'roles', 'members'):
+            values = data.get(name)
+            if values is None:
+                continue
 
-        emojis = data.get('emojis')
-        if emojis is not None:
-            self._update_emojis(emojis)
+            if self.state.lazy and getattr(self, f'_{name}') is None:
+                if not values:
+                    if self._pending is not None and name != 'members':
+                        self._pending.pop(name, None)
+                    continue
 
-        roles = data.get('roles')
-        if roles is not None:
-            self.roles.upsert_many(roles)
+                if self._pending is None:
+                    self._pending = {}
 
-        members = data.get('members')
-        if members is not None:
-            self.members.upsert_many(members)
+                if name == 'members':
+                    self._pending.setdefault(name, []).extend(values)
+                else:
+                    self._pending[name] = values
+            else:
+                # Accessing the state hydrates whatever is pending first
+                state = getattr(self, name)
+                if name == 'channels':
+                    self._update_channels(values)
+                elif name == 'emojis':
+                    self._update_emojis(values)
+                elif name == 'members':
+                    state.extend(values)
+                else:
+                    state.upsert_many(values)
 
         welcome_screen = data.get('welcome_screen')
         if welcome_screen is not None:
@@ -253,9 +337,10 @@ GuildBanTemplate = JsonTemplate(
 
 class GuildBan(BaseObject, template=GuildBanTemplate):
     __slots__ = ('guild', 'user')
+    __user_attrs__ = ('user',)
 
     def __init__(self, *, state, guild):
-        super().__init__(state)
+        super().__init__(state=state)
         self.guild = guild
 
     def update(self, data, *args, **kwargs):
@@ -263,8 +348,7 @@ class GuildBan(BaseObject, template=GuildBanTemplate):
 
         user = data.get('user')
         if user is not None:
-            self.user = self.state.manager.users.upsert(user)
-            self.id = self.user.id
+            self.id = self._set_user('user', user).id
 
 
 WelcomeScreenChannelTemplate = JsonTemplate(
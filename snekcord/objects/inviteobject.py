@@ -23,6 +23,7 @@ InviteTemplate = JsonTemplate(
 class Invite(BaseObject, template=InviteTemplate):
     __slots__ = ('guild', 'channel', 'inviter', 'target_user',
                  'target_application')
+    __user_attrs__ = ('inviter', 'target_user')
 
     def __init__(self, *, state):
         super().__init__(state=state)
@@ -54,11 +55,11 @@ class Invite(BaseObject, template=InviteTemplate):
 
         inviter = data.get('inviter')
         if inviter is not None:
-            self.inviter = self.state.manager.users.upsert(inviter)
+            self._set_user('inviter', inviter)
 
         target_user = data.get('target_user')
         if target_user is not None:
-            self.target_user = self.state.manager.users.upsert(target_user)
+            self._set_user('target_user', target_user)
 
 
 GuildVanityURLTemplate = JsonTemplate(
@@ -18,6 +18,7 @@ GuildMemberTemplate = JsonTemplate(
 
 class GuildMember(BaseObject, template=GuildMemberTemplate):
     __slots__ = ('guild', 'roles', 'user')
+    __user_attrs__ = ('user',)
 
     def __init__(self, *, state, guild):
         super().__init__(state=state)
@@ -65,13 +66,17 @@ class GuildMember(BaseObject, template=GuildMemberTemplate):
 
         return self.state.upsert(data)
 
+    def _snapshot(self):
+        data = super()._snapshot()
+        data['roles'] = [str(role_id) for role_id in self.roles.keys()]
+        return data
+
     def update(self, data, *args, **kwargs):
         super().update(data, *args, **kwargs)
 
         user = data.get('user')
         if user is not None:
-            self.user = self.state.manager.users.upsert(user)
-            self.id = self.user.id
+            self.id = self._set_user('user', user).id
 
         roles = data.get('roles')
         if roles is not None:
@@ -35,6 +35,7 @@ MessageTemplate = JsonTemplate(
 
 class Message(BaseObject, template=MessageTemplate):
     __slots__ = ('author', 'member', 'reactions')
+    __user_attrs__ = ('author',)
 
     def __init__(self, *, state):
         super().__init__(state=state)
@@ -64,7 +65,7 @@ class Message(BaseObject, template=MessageTemplate):
 
         author = data.get('author')
         if author is not None:
-            self.author = self.state.manager.users.upsert(author)
+            self._set_user('author', author)
 
             guild = self.guild
             member = data.get('member')
@@ -1,7 +1,7 @@
 from .baseobject import BaseObject
 from .. import rest
 from ..states.basestate import BaseSubState
-from ..utils import JsonField, JsonTemplate, Snowflake
+from ..utils import JsonField, JsonTemplate, Snowflake, _paginate, amap
 
 __all__ = ('Reactions',)
 
@@ -30,16 +30,53 @@ class Reactions(BaseSubState, BaseObject, template=ReactionsTemplate):
             params['limit'] = limit
 
         data = await rest.get_reactions.request(
-            session=self.state.rest,
+            session=self.state.manager.rest,
             fmt=dict(channel_id=self.state.message.channel_id,
                      message_id=self.state.message.id,
-                     emoji=self.emoji.to_reaction()))
+                     emoji=self.emoji.to_reaction()),
+            params=params)
 
         users = self.superstate.upsert_many(data)
         self.extend_keys(user.id for user in users)
 
         return users
 
+    def paginate(self, *, after=None, limit=None, cache=True):
+        """Walks the users that reacted with the emoji in order of their
+        ids starting at `after`
+
+        Arguments:
+            limit Optional[int]: The maximum number of users to yield
+
+            cache bool: Whether or not to store the users in the cache
+
+        Returns:
+            AsyncIterator[User]: The users
+        """
+        async def fetch(cursor, size):
+            params = {'limit': size}
+
+            if cursor is not None:
+                params['after'] = cursor
+
+            return await rest.get_reactions.request(
+                session=self.state.manager.rest,
+                fmt=dict(channel_id=self.state.message.channel_id,
+                         message_id=self.state.message.id,
+                         emoji=self.emoji.to_reaction()),
+                params=params)
+
+        def upsert(data):
+            user = self.superstate.upsert(data)
+            self.add_key(user.id)
+            return user
+
+        return amap(upsert if cache else self.superstate.new,
+                    _paginate(fetch, key=lambda user: user['id'],
+                              page_size=100,
+                              cursor=Snowflake.try_snowflake(after),
+                              limit=limit))
+
     async def add(self):
         await self.state.add(self.emoji)
 
@@ -32,6 +32,11 @@ class Role(BaseObject, template=RoleTemplate):
         super().__init__(state=state)
         self.guild = guild
 
+    @property
+    def members(self):
+        """The cached members that have the role"""
+        return self.guild.members.find('role', self.id)
+
     async def modify(self, **kwargs):
         keys = rest.modify_guild_role_positions.json
 
@@ -22,14 +22,17 @@ GuildTemplateTemplate = JsonTemplate(
 
 
 class GuildTemplate(BaseObject, template=GuildTemplateTemplate):
+    __slots__ = ('creator',)
+    __user_attrs__ = ('creator',)
+
+    def __init__(self, *, state):
+        super().__init__(state=state)
+        self.creator = None
+
     @property
     def code(self):
         return self.id
 
-    @property
-    def creator(self):
-        return self.state.manager.users.get(self.creator_id)
-
     @property
     def source_guild(self):
         return self.state.manager.guilds.get(self.source_guild_id)
@@ -94,4 +97,4 @@ class GuildTemplate(BaseObject, template=GuildTemplateTemplate):
 
         creator = data.get('creator')
         if creator is not None:
-            self.state.manager.users.upsert(creator)
+            self._set_user('creator', creator)
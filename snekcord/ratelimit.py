@@ -0,0 +1,321 @@
+import asyncio
+import mmap
+import os
+import struct
+import time
+import weakref
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+__all__ = ('RateLimitStore', 'MemoryRateLimitStore', 'FileRateLimitStore',
+           'RateLimitBucket', 'RateLimiter')
+
+# The parameters that Discord uses to split a route into separate buckets
+MAJOR_PARAMETERS = ('channel_id', 'guild_id', 'webhook_id', 'webhook_token')
+
+
+def _get_header(headers, name, cast):
+    value = headers.get(name)
+    if value is not None:
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return None
+
+
+class RateLimitStore:
+    """The base class for stores that keep track of the global rate limit
+
+    Stores keep their state as `[window_start, locked_until, count]`,
+    subclasses implement `transaction` to load the state, pass it to a
+    function and save whatever changes the function made
+    """
+    def __init__(self, *, limit=50, period=1, clock=time.monotonic):
+        self.limit = limit
+        self.period = period
+        self.clock = clock
+
+    def transaction(self, func, *args):
+        raise NotImplementedError
+
+    def _reserve(self, state):
+        now = self.clock()
+
+        if state[1] > now:
+            return state[1] - now
+
+        if now - state[0] >= self.period:
+            state[0] = now
+            state[2] = 0
+
+        if state[2] < self.limit:
+            state[2] += 1
+            return 0
+
+        return state[0] + self.period - now
+
+    def _lock(self, state, delay):
+        state[1] = max(state[1], self.clock() + delay)
+
+    def reserve(self):
+        """Attempts to take a request from the global budget
+
+        Returns:
+            float: 0 if the request was taken otherwise the amount of time
+                to wait before trying again
+        """
+        return self.transaction(self._reserve)
+
+    def lock(self, delay):
+        """Blocks every request for `delay` seconds, used when Discord
+        responds with a global 429
+        """
+        self.transaction(self._lock, delay)
+
+    async def acquire(self):
+        delay = self.reserve()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.reserve()
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """A store that only covers the current process, every `Manager`
+    using the same token shares one by default
+
+    note:
+        Passing a fake `clock` makes this store usable as a test double
+    """
+    _shared = weakref.WeakValueDictionary()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.state = [float('-inf'), float('-inf'), 0]
+
+    @classmethod
+    def for_token(cls, token, **kwargs):
+        store = cls._shared.get(token)
+        if store is None:
+            store = cls(**kwargs)
+            cls._shared[token] = store
+        return store
+
+    def transaction(self, func, *args):
+        return func(self.state, *args)
+
+
+class FileRateLimitStore(RateLimitStore):
+    """A store backed by a memory mapped file that is shared between
+    every process that opens the same path, access to the state is
+    serialized with `flock`
+
+    warning:
+        This store is only available on platforms that support `fcntl`
+    """
+    _struct = struct.Struct('=ddq')
+
+    def __init__(self, path, *, clock=time.time, **kwargs):
+        if fcntl is None:
+            raise RuntimeError(
+                f'{self.__class__.__name__} is not supported on this platform')
+
+        super().__init__(clock=clock, **kwargs)
+
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self.fd).st_size < self._struct.size:
+                os.ftruncate(self.fd, self._struct.size)
+                os.pwrite(self.fd, self._struct.pack(
+                    float('-inf'), float('-inf'), 0), 0)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+        self.mmap = mmap.mmap(self.fd, self._struct.size)
+
+    def transaction(self, func, *args):
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            state = list(self._struct.unpack_from(self.mmap, 0))
+            result = func(state, *args)
+            self._struct.pack_into(self.mmap, 0, *state)
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+        return result
+
+    def close(self):
+        self.mmap.close()
+        os.close(self.fd)
+
+
+class RateLimitBucket:
+    def __init__(self, key, *, loop):
+        self.key = key
+        self.loop = loop
+
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.discovered = False
+
+        self._lock = asyncio.Lock()
+        self._discovering = False
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(key={self.key!r}, '
+                f'limit={self.limit}, remaining={self.remaining})')
+
+    @property
+    def delay(self):
+        if self.remaining is None or self.remaining > 0:
+            return 0
+
+        delay = self.reset_at - self.loop.time()
+        if delay <= 0:
+            # The bucket has reset since we last heard from Discord
+            self.remaining = self.limit
+            return 0
+
+        return delay
+
+    async def __aenter__(self):
+        await self._lock.acquire()
+
+        try:
+            delay = self.delay
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self.delay
+        except BaseException:
+            self._lock.release()
+            raise
+
+        if not self.discovered:
+            # Nothing is known about this bucket yet, hold onto the lock
+            # until Discord tells us what the limits are
+            self._discovering = True
+        else:
+            if self.remaining is not None:
+                self.remaining -= 1
+            self._lock.release()
+
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._discovering:
+            self._discovering = False
+            self._lock.release()
+
+    def update(self, headers, status_code):
+        now = self.loop.time()
+
+        limit = _get_header(headers, 'X-RateLimit-Limit', int)
+        if limit is not None:
+            self.limit = limit
+
+        remaining = _get_header(headers, 'X-RateLimit-Remaining', int)
+        if remaining is not None:
+            if self.remaining is None or self._discovering:
+                self.remaining = remaining
+            else:
+                # Requests that are still in flight have already been
+                # accounted for locally
+                self.remaining = min(self.remaining, remaining)
+
+        reset_after = _get_header(headers, 'X-RateLimit-Reset-After', float)
+        if reset_after is not None:
+            self.reset_at = now + reset_after
+
+        if status_code == 429 and not headers.get('X-RateLimit-Global'):
+            retry_after = _get_header(headers, 'Retry-After', float)
+            if retry_after is not None:
+                self.remaining = 0
+                self.reset_at = now + retry_after
+
+        if self.remaining is not None and self.reset_at is None:
+            self.reset_at = now
+
+        self.discovered = True
+
+
+class RateLimiter:
+    __bucket_class__ = RateLimitBucket
+
+    def __init__(self, *, loop, store, max_buckets=1024):
+        self.loop = loop
+        self.store = store
+        self.max_buckets = max_buckets
+        self.hashes = {}
+        self.buckets = {}
+
+    @staticmethod
+    def get_route(method, url, fmt):
+        major = tuple(fmt.get(param) for param in MAJOR_PARAMETERS)
+        return method, url, major
+
+    def get_bucket(self, route):
+        method, url, major = route
+
+        bucket_hash = self.hashes.get((method, url), (method, url))
+        key = (bucket_hash, major)
+
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if (len(self.buckets) >= self.max_buckets
+                    or len(self.hashes) >= self.max_buckets):
+                self.clear_expired()
+
+            bucket = self.__bucket_class__(key, loop=self.loop)
+            self.buckets[key] = bucket
+
+        return bucket
+
+    def update(self, route, bucket, response):
+        bucket.update(response.headers, response.status_code)
+
+        if (response.status_code == 429
+                and response.headers.get('X-RateLimit-Global')):
+            retry_after = _get_header(response.headers, 'Retry-After', float)
+            if retry_after is not None:
+                self.store.lock(retry_after)
+
+        bucket_hash = response.headers.get('X-RateLimit-Bucket')
+        if bucket_hash is not None:
+            method, url, major = route
+            if self.hashes.get((method, url)) != bucket_hash:
+                self.hashes[(method, url)] = bucket_hash
+
+            # Routes that share a hash share a bucket, the bucket that
+            # discovered the hash becomes the shared one and the bucket
+            # keyed by the route isn't looked up anymore
+            self.buckets.setdefault((bucket_hash, major), bucket)
+            self.buckets.pop(((method, url), major), None)
+
+    def clear_expired(self):
+        """Drops the buckets that aren't in use and have nothing to wait
+        for and the hashes that no bucket is left for, forgetting a hash
+        only costs its route a discovery
+        """
+        now = self.loop.time()
+        for key, bucket in tuple(self.buckets.items()):
+            if ((bucket.reset_at is None or bucket.reset_at < now)
+                    and not bucket._lock.locked()):
+                del self.buckets[key]
+
+        live = {bucket_hash for bucket_hash, _ in self.buckets}
+        for route, bucket_hash in tuple(self.hashes.items()):
+            if bucket_hash not in live:
+                del self.hashes[route]
+
+        # Buckets that are always busy keep their hashes alive, the
+        # oldest ones are dropped so that urls requested without a
+        # route can't grow them without bound
+        while len(self.hashes) >= self.max_buckets:
+            del self.hashes[next(iter(self.hashes))]
@@ -1,7 +1,11 @@
-import json
+import asyncio
+import random
 from http import HTTPStatus
 
-from httpx import AsyncClient
+from httpx import AsyncClient, TransportError
+
+from .ratelimit import MemoryRateLimitStore, RateLimiter
+from .utils import undefined
 
 
 class HTTPError(Exception):
@@ -10,6 +14,45 @@ class HTTPError(Exception):
         self.response = response
 
 
+class RetryPolicy:
+    """Decides which failed requests `RestSession` retries and how long
+    it waits between attempts
+
+    429 responses are always retried once the rate limit resets, server
+    errors and connection failures are only retried for idempotent methods,
+    the delay between those attempts uses decorrelated jitter
+
+    Attributes:
+        max_retries int: The maximum number of retries for a single request
+
+        base float: The minimum delay between retries
+
+        cap float: The maximum delay between retries
+
+        deadline Optional[float]: The default number of seconds a request
+            may take including every retry
+    """
+    IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT',
+                                    'DELETE'))
+    RETRY_STATUSES = frozenset((500, 502, 503, 504))
+
+    def __init__(self, *, max_retries=5, base=0.5, cap=30, deadline=None):
+        self.max_retries = max_retries
+        self.base = base
+        self.cap = cap
+        self.deadline = deadline
+
+    def should_retry(self, method, status_code=None):
+        if status_code == 429:
+            return True
+        if method.upper() not in self.IDEMPOTENT_METHODS:
+            return False
+        return status_code is None or status_code in self.RETRY_STATUSES
+
+    def backoff(self, previous):
+        return min(self.cap, random.uniform(self.base, previous * 3))
+
+
 class HTTPEndpoint:
     def __init__(self, method, url, *, params=(), json=(), array=False):
         self.method = method
@@ -37,9 +80,11 @@ class HTTPEndpoint:
         fmt = kwargs.pop('fmt', {})
         fmt.update(session.global_fmt)
 
+        route = RateLimiter.get_route(self.method, self.url, fmt)
+
         url = self.url % fmt
         return session.request(self.method, url, params=params, json=json,
-                               **kwargs)
+                               route=route, **kwargs)
 
 
 BASE_API_URL = 'https://discord.com/api/%(version)s/'
@@ -108,7 +153,7 @@ delete_reaction = HTTPEndpoint(
 get_reactions = HTTPEndpoint(
     'GET',
     BASE_API_URL
-    + 'channels/%(channel_id)s/messages/%(message_id)s/reactions/%(emoji_id)s',
+    + 'channels/%(channel_id)s/messages/%(message_id)s/reactions/%(emoji)s',
     params=('limit', 'after')
 )
 
@@ -682,6 +727,8 @@ get_gateway_bot = HTTPEndpoint(
 
 
 class RestSession(AsyncClient):
+    __ratelimiter_class__ = RateLimiter
+
     def __init__(self, manager, *args, **kwargs):
         self.loop = manager.loop
         self.manager = manager
@@ -699,17 +746,92 @@ class RestSession(AsyncClient):
             'version': self.api_version
         })
 
+        store = self.manager.ratelimit_store
+        if store is None:
+            store = MemoryRateLimitStore.for_token(self.authorization)
+
+        self.ratelimiter = self.__ratelimiter_class__(
+            loop=self.loop, store=store)
+
+        self.retry_policy = kwargs.pop('retry_policy', None)
+        if self.retry_policy is None:
+            self.retry_policy = RetryPolicy()
+
         super().__init__(*args, **kwargs)
 
-    async def request(self, method, url, *args, **kwargs):
-        response = await super().request(method, url, *args, **kwargs)
-        await response.aclose()
+    async def _request(self, route, method, url, *args, **kwargs):
+        bucket = self.ratelimiter.get_bucket(route)
+
+        async with bucket:
+            await self.ratelimiter.store.acquire()
+            response = await super().request(method, url, *args, **kwargs)
+            await response.aclose()
+            self.ratelimiter.update(route, bucket, response)
+
+        return response
+
+    async def request(self, method, url, *args, route=None,
+                      deadline=undefined, **kwargs):
+        if route is None:
+            route = (method, url, ())
+
+        policy = self.retry_policy
+
+        if deadline is undefined:
+            deadline = policy.deadline
+
+        if deadline is not None:
+            deadline += self.loop.time()
+
+        json = kwargs.pop('json', None)
+        if json is not None:
+            kwargs['content'] = self.manager.json.dumps_bytes(json)
+            headers = kwargs.setdefault('headers', {})
+            headers['Content-Type'] = 'application/json'
+
+        retries = 0
+        delay = policy.base
+
+        while True:
+            error = None
+
+            try:
+                response = await self._request(
+                    route, method, url, *args, **kwargs)
+            except TransportError as exc:
+                if (retries >= policy.max_retries
+                        or not policy.should_retry(method)):
+                    raise
+                error = exc
+                status_code = None
+            else:
+                status_code = response.status_code
+                if (status_code < 400 or retries >= policy.max_retries
+                        or not policy.should_retry(method, status_code)):
+                    break
+
+            if status_code == 429:
+                # The rate limiter has already been told when to
+                # try again, the next attempt will wait for it
+                wait = float(response.headers.get('Retry-After', 0))
+            else:
+                delay = wait = policy.backoff(delay)
+
+            if deadline is not None and self.loop.time() + wait > deadline:
+                if error is not None:
+                    raise error
+                break
+
+            if status_code != 429:
+                await asyncio.sleep(wait)
+
+            retries += 1
 
         data = response.content
 
         content_type = response.headers.get('content-type')
         if content_type.lower() == 'application/json':
-            data = json.loads(data)
+            data = self.manager.json.loads(data)
 
         if response.status_code >= 400:
             status = HTTPStatus(response.status_code)
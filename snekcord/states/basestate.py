@@ -1,8 +1,430 @@
+import time
 import weakref
+from collections import OrderedDict, deque
 
 from ..utils import undefined
 
-__all__ = ('BaseState', 'BaseSubState')
+__all__ = ('CachePolicy', 'CacheMapping', 'CacheCounters', 'RecycleBin',
+           'StateIndex', 'BaseState', 'BaseSubState')
+
+
+class CachePolicy:
+    """Describes how much a state keeps in its cache
+
+    Attributes:
+        max_size Optional[int]: The maximum number of cached objects, the
+            least recently used object is evicted once the state is full
+
+        ttl Optional[float]: The number of seconds an object stays cached
+            after it was stored
+
+        enabled bool: Whether or not the state caches anything at all
+
+    note:
+        Evicted objects go to the state's recycle bin, they can still be
+        retrieved with `BaseState.get` until they age out of it
+    """
+    def __init__(self, *, max_size=None, ttl=None, enabled=True):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(max_size={self.max_size}, '
+                f'ttl={self.ttl}, enabled={self.enabled})')
+
+    @classmethod
+    def never(cls):
+        return cls(enabled=False)
+
+    @property
+    def bounded(self):
+        return (not self.enabled or self.max_size is not None
+                or self.ttl is not None)
+
+
+class CacheMapping(OrderedDict):
+    def __init__(self, policy, on_evict=None, clock=time.monotonic):
+        super().__init__()
+        self.policy = policy
+        self.on_evict = on_evict
+        self.clock = clock
+        # Every entry has the same ttl so insertion order is expiry order
+        self.expiry = OrderedDict()
+        self.evictions = 0
+
+    def _pop(self, key):
+        # OrderedDict.pop goes through __getitem__ for subclasses
+        value = dict.__getitem__(self, key)
+        OrderedDict.__delitem__(self, key)
+        self.expiry.pop(key, None)
+        return value
+
+    def evict(self, key):
+        value = self._pop(key)
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def purge(self):
+        if self.policy.ttl is None:
+            return
+
+        now = self.clock()
+        while self.expiry:
+            key, expires_at = next(iter(self.expiry.items()))
+            if expires_at > now:
+                break
+            self.evict(key)
+
+    def __len__(self):
+        self.purge()
+        return OrderedDict.__len__(self)
+
+    def __iter__(self):
+        self.purge()
+        return OrderedDict.__iter__(self)
+
+    def __contains__(self, key):
+        self.purge()
+        return OrderedDict.__contains__(self, key)
+
+    def __getitem__(self, key):
+        self.purge()
+        value = OrderedDict.__getitem__(self, key)
+        if self.policy.max_size is not None:
+            self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        OrderedDict.__setitem__(self, key, value)
+
+        if self.policy.ttl is not None:
+            self.expiry[key] = self.clock() + self.policy.ttl
+            self.expiry.move_to_end(key)
+
+        if not self.policy.enabled:
+            self.evict(key)
+            return
+
+        self.move_to_end(key)
+        self.purge()
+
+        max_size = self.policy.max_size
+        if max_size is not None:
+            while OrderedDict.__len__(self) > max_size:
+                self.evict(next(OrderedDict.__iter__(self)))
+
+    def __delitem__(self, key):
+        OrderedDict.__delitem__(self, key)
+        self.expiry.pop(key, None)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, default=undefined):
+        try:
+            return self._pop(key)
+        except KeyError:
+            if default is not undefined:
+                return default
+            raise
+
+    def popitem(self, last=True):
+        if not OrderedDict.__len__(self):
+            raise KeyError('dictionary is empty')
+
+        if last:
+            key = next(OrderedDict.__reversed__(self))
+        else:
+            key = next(OrderedDict.__iter__(self))
+
+        return key, self._pop(key)
+
+    def clear(self):
+        OrderedDict.clear(self)
+        self.expiry.clear()
+
+    def keys(self):
+        self.purge()
+        return OrderedDict.keys(self)
+
+    def values(self):
+        self.purge()
+        return OrderedDict.values(self)
+
+    def items(self):
+        self.purge()
+        return OrderedDict.items(self)
+
+
+class CacheCounters:
+    """The counts of every state of one class, kept up to date as
+    objects are stored, evicted and recycled so that they can be read
+    without walking the cache
+
+    Attributes:
+        states weakref.WeakSet: The live states
+
+        entries int: The number of cached objects
+
+        recycled int: The number of objects in the recycle bins
+
+        recycle_hits int: The number of lookups answered by a recycle bin
+
+        recycle_expired int: The number of objects that aged out of a
+            recycle bin
+
+        hits int: The number of lookups that found an object
+
+        misses int: The number of lookups that found nothing
+
+        evictions int: The number of objects evicted by cache policies
+    """
+    __slots__ = ('states', 'entries', 'recycled', 'recycle_hits',
+                 'recycle_expired', 'hits', 'misses', 'evictions')
+
+    def __init__(self):
+        self.states = weakref.WeakSet()
+        self.entries = 0
+        self.recycled = 0
+        self.recycle_hits = 0
+        self.recycle_expired = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def to_dict(self):
+        counts = {'instances': len(self.states)}
+        for name in self.__slots__[1:]:
+            counts[name] = getattr(self, name)
+        return counts
+
+
+class RecycleBin:
+    """Keeps recently uncached objects around for a bounded and
+    predictable amount of time
+
+    Objects go into the youngest of `generations` generations, once it
+    holds `generation_size` objects a new generation starts and the
+    oldest one is dropped. An object therefore survives at least
+    `generation_size * (generations - 1)` later recycles, objects that
+    are looked up again are promoted to the youngest generation
+
+    Attributes:
+        hits int: The number of lookups that found an object, i.e. the
+            number of times recycling saved building or fetching it again
+
+        misses int: The number of lookups that found nothing
+
+        recycled int: The number of objects that were put in the bin
+
+        expired int: The number of objects that were dropped because
+            their generation aged out
+
+        counters CacheCounters: The counters of the bin's state, shared
+            with the other states of its class
+    """
+    def __init__(self, *, generation_size=64, generations=2, counters=None):
+        self.generation_size = generation_size
+        self.max_generations = generations
+
+        if counters is None:
+            counters = CacheCounters()
+
+        self.counters = counters
+
+        # key -> (generation, value), the generation tells whether the
+        # key is still current in the generation's set
+        self.entries = {}
+        self.generations = deque([set()])
+
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self.expired = 0
+
+    def _put(self, key, value):
+        size = len(self.entries)
+        young = self.generations[-1]
+
+        if len(young) >= self.generation_size:
+            young = set()
+            self.generations.append(young)
+
+            if len(self.generations) > self.max_generations:
+                old = self.generations.popleft()
+                for old_key in old:
+                    entry = self.entries.get(old_key)
+                    if entry is not None and entry[0] is old:
+                        del self.entries[old_key]
+                        self.expired += 1
+                        self.counters.recycle_expired += 1
+
+        young.add(key)
+        self.entries[key] = (young, value)
+        self.counters.recycled += len(self.entries) - size
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __getitem__(self, key):
+        value = self.get(key, undefined)
+        if value is undefined:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.recycled += 1
+        self._put(key, value)
+
+    def __delitem__(self, key):
+        del self.entries[key]
+        self.counters.recycled -= 1
+
+    def get(self, key, default=None):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self.counters.recycle_hits += 1
+
+        generation, value = entry
+        if generation is not self.generations[-1]:
+            self._put(key, value)
+
+        return value
+
+    def pop(self, key, default=undefined):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            if default is not undefined:
+                return default
+            raise KeyError(key)
+
+        self.counters.recycled -= 1
+        return entry[1]
+
+    def clear(self):
+        self.counters.recycled -= len(self.entries)
+        self.entries.clear()
+        self.generations = deque([set()])
+
+    def values(self):
+        return [entry[1] for entry in self.entries.values()]
+
+
+class StateIndex:
+    """Groups the keys of a state's cached objects by one of their
+    attributes so that they can be looked up without a scan
+
+    Attributes:
+        attr str|Callable[[BaseObject], Any]: The name of the indexed
+            attribute or a function that returns the indexed value
+
+        multi bool: Whether the value is an iterable of values that are
+            indexed separately, e.g. a member's role ids
+
+        transform Optional[Callable[[Any], Any]]: Applied to indexed and
+            looked up values alike
+
+        buckets dict[Any, set]: The keys of the objects for every value
+
+    note:
+        Objects are indexed when they're stored in the cache and when
+        they're upserted, objects that are changed any other way have to
+        be reindexed with `BaseState.reindex`
+    """
+    def __init__(self, attr, *, multi=False, transform=None):
+        self.attr = attr
+        self.multi = multi
+        self.transform = transform
+
+        self.buckets = {}
+        self.indexed = {}
+        # Objects often share the same values, e.g. members with the same
+        # roles, so multi value sets are interned
+        self.value_sets = {}
+
+    def copy(self):
+        return self.__class__(self.attr, multi=self.multi,
+                              transform=self.transform)
+
+    def get_values(self, obj):
+        if isinstance(self.attr, str):
+            value = getattr(obj, self.attr, None)
+        else:
+            value = self.attr(obj)
+
+        return self.make_values(value)
+
+    def make_values(self, value):
+        if not self.multi:
+            value = (value,)
+        elif value is None:
+            value = ()
+
+        if self.transform is not None:
+            value = frozenset(self.transform(item) for item in value)
+        else:
+            value = frozenset(value)
+
+        if self.multi:
+            return self.value_sets.setdefault(value, value)
+        return value
+
+    def add(self, key, values):
+        old = self.indexed.get(key)
+        if old == values:
+            return
+
+        if old is not None:
+            self._discard_values(key, old - values)
+            values_added = values - old
+        else:
+            values_added = values
+
+        for value in values_added:
+            bucket = self.buckets.get(value)
+            if bucket is None:
+                bucket = self.buckets[value] = set()
+            bucket.add(key)
+
+        self.indexed[key] = values
+
+    def _discard_values(self, key, values):
+        for value in values:
+            bucket = self.buckets.get(value)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[value]
+
+    def discard(self, key):
+        values = self.indexed.pop(key, None)
+        if values is not None:
+            self._discard_values(key, values)
+
+    def clear(self):
+        self.buckets.clear()
+        self.indexed.clear()
+        self.value_sets.clear()
+
+    def get(self, value):
+        if self.transform is not None:
+            value = self.transform(value)
+        return self.buckets.get(value, ())
 
 
 class _StateCommon:
@@ -15,14 +437,65 @@ class _StateCommon:
 class BaseState(_StateCommon):
     __key_transformer__ = None
     __mapping__ = dict
+    __cache_policy__ = None
     __recycle_enabled__ = True
-    __recycled_mapping__ = weakref.WeakValueDictionary
+    __recycled_mapping__ = RecycleBin
+    __recycle_generation_size__ = 64
+    __recycle_generations__ = 2
+    __indexes__ = {}
 
     def __init__(self, *, manager):
         self.manager = manager
-        self.mapping = self.__mapping__()
+        self.counters = manager.get_cache_counters(self)
+        self.counters.states.add(self)
+
+        self.indexes = {name: index.copy()
+                        for name, index in self.__indexes__.items()}
+        self.set_cache_policy(manager.get_cache_policy(self))
+
         if self.__recycle_enabled__:
-            self.recycle_bin = self.__recycled_mapping__()
+            self.recycle_bin = self.__recycled_mapping__(
+                generation_size=self.__recycle_generation_size__,
+                generations=self.__recycle_generations__,
+                counters=self.counters)
+
+    def __del__(self):
+        # The objects of a state that's collected aren't cached anymore
+        counters = getattr(self, 'counters', None)
+        if counters is None:
+            return
+
+        mapping = getattr(self, 'mapping', None)
+        if isinstance(mapping, dict):
+            # CacheMapping.__len__ would purge
+            counters.entries -= dict.__len__(mapping)
+        elif mapping is not None:
+            counters.entries -= len(mapping)
+
+        recycle_bin = getattr(self, 'recycle_bin', None)
+        if recycle_bin is not None:
+            counters.recycled -= len(recycle_bin)
+
+    def set_cache_policy(self, policy):
+        if hasattr(self, 'mapping'):
+            items = tuple(self.items())
+        else:
+            items = ()
+
+        self.cache_policy = policy
+        if policy is not None and policy.bounded:
+            self.__mapping__ = CacheMapping
+            self.mapping = CacheMapping(policy, self._evict)
+        else:
+            self.__mapping__ = self.__class__.__mapping__
+            self.mapping = self.__mapping__()
+
+        for key, value in items:
+            self.__mapping__.__setitem__(self.mapping, key, value)
+
+    @property
+    def evictions(self):
+        return getattr(self.mapping, 'evictions', 0)
 
     def transform_key(self, key):
         if self.__key_transformer__ is None:
@@ -47,12 +520,18 @@ class BaseState(_StateCommon):
             self.mapping, self.transform_key(key))
 
     def __setitem__(self, key, value):
-        return self.__mapping__.__setitem__(
-            self.mapping, self.transform_key(key), value)
+        key = self.transform_key(key)
+        # Index first, the cache policy can evict the value right away
+        self._index(key, value)
+        if not self.__mapping__.__contains__(self.mapping, key):
+            self.counters.entries += 1
+        return self.__mapping__.__setitem__(self.mapping, key, value)
 
     def __delitem__(self, key):
-        return self.__mapping__.__delitem__(
-            self.mapping, self.transform_key(key))
+        key = self.transform_key(key)
+        self._unindex(key)
+        self.__mapping__.__delitem__(self.mapping, key)
+        self.counters.entries -= 1
 
     def __repr__(self):
         attrs = [('length', len(self))]
@@ -74,14 +553,24 @@ class BaseState(_StateCommon):
 
     def get(self, key, default=None):
         key = self.transform_key(key)
-        return (self.__mapping__.get(self.mapping, key, default)
-                or self.__recycled_mapping__.get(
-                    self.recycle_bin, key, default))
+
+        value = self.__mapping__.get(self.mapping, key, undefined)
+        if value is undefined and self.__recycle_enabled__:
+            value = self.__recycled_mapping__.get(
+                self.recycle_bin, key, undefined)
+
+        if value is undefined:
+            self.counters.misses += 1
+            return default
+
+        self.counters.hits += 1
+        return value
 
     def pop(self, key, default=undefined):
         key = self.transform_key(key)
+        self._unindex(key)
         try:
-            return self.__mapping__.pop(self.mapping, key)
+            value = self.__mapping__.pop(self.mapping, key)
         except KeyError:
             try:
                 return self.__recycled_mapping__.pop(self.recycle_bin, key)
@@ -90,18 +579,95 @@ class BaseState(_StateCommon):
                     return default
                 raise
 
+        self.counters.entries -= 1
+        return value
+
     def popitem(self):
-        return self.__mapping__.popitem(self.mapping)
+        key, value = self.__mapping__.popitem(self.mapping)
+        self._unindex(key)
+        self.counters.entries -= 1
+        return key, value
 
     def clear(self):
+        for index in self.indexes.values():
+            index.clear()
+        self.counters.entries -= len(self)
         return self.__mapping__.clear(self.mapping)
 
+    def _index(self, key, value):
+        for index in self.indexes.values():
+            index.add(key, index.get_values(value))
+
+    def _unindex(self, key):
+        for index in self.indexes.values():
+            index.discard(key)
+
+    def _updated(self, value):
+        # Called by upsert for objects that already existed, the ones
+        # that come back from the recycle bin are cached again
+        if not value.cached:
+            value.cache()
+        elif self.indexes:
+            self._index(self.transform_key(value.id), value)
+
+    def reindex(self, value):
+        """Updates the indexes after the object was changed, objects that
+        aren't cached are left alone
+        """
+        if self.indexes and value.cached:
+            self._index(self.transform_key(value.id), value)
+
+    def find(self, index, value):
+        """Looks up the cached objects by an index
+
+        Arguments:
+            index str: The name of the index
+
+            value Any: The indexed value
+
+        Returns:
+            list[BaseObject]: The objects, in no particular order
+        """
+        objs = []
+        for key in tuple(self.indexes[index].get(value)):
+            obj = self.__mapping__.get(self.mapping, key)
+            if obj is not None:
+                objs.append(obj)
+        return objs
+
+    def find_first(self, index, value):
+        """Equivalent to `state.find(index, value)[0]` but returns None
+        instead of raising an IndexError and stops at the first object
+        """
+        for key in tuple(self.indexes[index].get(value)):
+            obj = self.__mapping__.get(self.mapping, key)
+            if obj is not None:
+                return obj
+        return None
+
     def upsert(self, *args, **kwargs):
         raise NotImplementedError
 
     def upsert_many(self, values, *args, **kwargs):
         return [self.upsert(value, *args, **kwargs) for value in values]
 
+    def _evict(self, key, value):
+        self._unindex(key)
+        self.counters.entries -= 1
+        self.counters.evictions += 1
+
+        if value.cached and value.__user_attrs__:
+            value._release_users()
+
+        value.cached = False
+        self.recycle(key, value)
+
+    def _acquire_user(self, user):
+        self.manager.users.acquire(user)
+
+    def _release_user(self, user):
+        self.manager.users.release(user)
+
     def recycle(self, key, value):
         if self.__recycle_enabled__:
             return self.__recycled_mapping__.__setitem__(
@@ -116,8 +682,15 @@ class BaseState(_StateCommon):
 class BaseSubState(_StateCommon):
     def __init__(self, *, superstate):
         self.superstate = superstate
+        self.counters = superstate.manager.get_cache_counters(self)
+        self.counters.states.add(self)
         self._keys = set()
 
+    def __del__(self):
+        counters = getattr(self, 'counters', None)
+        if counters is not None:
+            counters.entries -= len(self._keys)
+
     def __len__(self):
         return len(self._keys)
 
@@ -148,18 +721,26 @@ class BaseSubState(_StateCommon):
                 f'superstate={self.superstate!r})')
 
     def set_keys(self, keys):
+        size = len(self._keys)
         self._keys = {self.superstate.transform_key(key) for key in keys}
+        self.counters.entries += len(self._keys) - size
 
     def add_key(self, key):
+        size = len(self._keys)
         self._keys.add(self.superstate.transform_key(key))
+        self.counters.entries += len(self._keys) - size
 
     def extend_keys(self, keys):
+        size = len(self._keys)
         self._keys.update({self.superstate.transform_key(key) for key in keys})
+        self.counters.entries += len(self._keys) - size
 
     def remove_key(self, key):
         self._keys.remove(self.superstate.transform_key(key))
+        self.counters.entries -= 1
 
     def clear_keys(self):
+        self.counters.entries -= len(self._keys)
         self._keys.clear()
 
     def keys(self):
@@ -1,8 +1,8 @@
-from .basestate import BaseState, BaseSubState
+from .basestate import BaseState, BaseSubState, StateIndex
 from .. import rest
 from ..objects.baseobject import BaseObject
 from ..objects.channelobject import (
-    ChannelType, DMChannel, TextChannel, VoiceChannel,
+    CategoryChannel, ChannelType, DMChannel, TextChannel, VoiceChannel,
     _guild_channel_creation_keys)
 from ..utils import Snowflake, _validate_keys
 
@@ -14,9 +14,13 @@ class ChannelState(BaseState):
     __channel_classes__ = {
         ChannelType.GUILD_TEXT: TextChannel,
         ChannelType.GUILD_VOICE: VoiceChannel,
+        ChannelType.GUILD_CATEGORY: CategoryChannel,
         ChannelType.DM: DMChannel
     }
     __default_class__ = BaseObject
+    __indexes__ = {
+        'parent': StateIndex('parent_id', transform=Snowflake.try_snowflake),
+    }
 
     def get_class(self, type):
         return self.__channel_classes__.get(type, self.__default_class__)
@@ -25,6 +29,7 @@ class ChannelState(BaseState):
         channel = self.get(data['id'])
         if channel is not None:
             channel.update(data)
+            self._updated(channel)
         else:
             channel = self.get_class(data['type']).unmarshal(data, state=self)
             channel.cache()
@@ -1,4 +1,4 @@
-from .basestate import BaseState
+from .basestate import BaseState, StateIndex
 from .. import rest
 from ..objects.emojiobject import BUILTIN_EMOJIS, GuildEmoji
 from ..utils import Snowflake
@@ -9,6 +9,9 @@ __all__ = ('GuildEmojiState',)
 class GuildEmojiState(BaseState):
     __key_transformer__ = Snowflake.try_snowflake
     __guild_emoji_class__ = GuildEmoji
+    __indexes__ = {
+        'name': StateIndex('name'),
+    }
 
     def __init__(self, *, manager, guild):
         super().__init__(manager=manager)
@@ -20,6 +23,7 @@ class GuildEmojiState(BaseState):
             emoji = self.get(emoji_id)
             if emoji is not None:
                 emoji.update(data)
+                self._updated(emoji)
             else:
                 emoji = self.__guild_emoji_class__.unmarshal(
                     data, state=self, guild=self.guild)
@@ -2,7 +2,7 @@ from .basestate import BaseState
 from .. import rest
 from ..objects.guildobject import Guild, GuildBan
 from ..objects.templateobject import GuildTemplate
-from ..utils import Snowflake, _validate_keys
+from ..utils import Snowflake, _paginate, _validate_keys, amap
 
 __all__ = ('GuildState',)
 
@@ -11,13 +11,22 @@ class GuildState(BaseState):
     __key_transformer__ = Snowflake.try_snowflake
     __guild_class__ = Guild
     __guild_template_class__ = GuildTemplate
+    __lazy__ = False
+
+    def __init__(self, *, manager):
+        super().__init__(manager=manager)
+        self.lazy = self.__lazy__
+
+    def new(self, data):
+        return self.__guild_class__.unmarshal(data, state=self)
 
     def upsert(self, data):
         guild = self.get(data['id'])
         if guild is not None:
             guild.update(data)
+            self._updated(guild)
         else:
-            guild = self.__guild_class__.unmarshal(data, state=self)
+            guild = self.new(data)
             guild.cache()
 
         return guild
@@ -61,6 +70,46 @@ class GuildState(BaseState):
 
         return self.upsert_many(data)
 
+    def paginate(self, *, before=None, after=None, limit=None, cache=True):
+        """Walks the guilds that the client user is in from oldest to
+        newest starting at `after`, or from newest to oldest starting at
+        `before` if only `before` is provided
+
+        Arguments:
+            limit Optional[int]: The maximum number of guilds to yield
+
+            cache bool: Whether or not to store the guilds in the cache
+
+        Returns:
+            AsyncIterator[Guild]: The guilds
+        """
+        if before is not None and after is None:
+            reverse = True
+            cursor = Snowflake.try_snowflake(before)
+            cursor_key = 'before'
+        else:
+            reverse = False
+            cursor = Snowflake.try_snowflake(after)
+            cursor_key = 'after'
+
+        async def fetch(cursor, size):
+            params = {'limit': size}
+
+            if cursor is not None:
+                params[cursor_key] = cursor
+
+            data = await rest.get_user_client_guilds.request(
+                session=self.manager.rest,
+                params=params)
+
+            data.sort(key=lambda guild: int(guild['id']), reverse=reverse)
+
+            return data
+
+        return amap(self.upsert if cache else self.new,
+                    _paginate(fetch, key=lambda guild: guild['id'],
+                              page_size=200, cursor=cursor, limit=limit))
+
     async def fetch_preview(self, guild):
         guild_id = Snowflake.try_snowflake(guild)
 
@@ -102,8 +151,10 @@ class GuildBanState(BaseState):
         ban = self.get(data['user']['id'])
         if ban is not None:
             ban.update(data)
+            self._updated(ban)
         else:
-            ban = self.__ban_class__.unmarshal(data, state=self)
+            ban = self.__ban_class__.unmarshal(
+                data, state=self, guild=self.guild)
             ban.cache()
 
         return ban
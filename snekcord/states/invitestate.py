@@ -12,6 +12,7 @@ class InviteState(BaseState):
         invite = self.get(data['code'])
         if invite is not None:
             invite.update(data)
+            self._updated(invite)
         else:
             invite = self.__invite_class__.unmarshal(data, state=self)
             invite.cache()
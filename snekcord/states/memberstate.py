@@ -1,30 +1,66 @@
-from .basestate import BaseState
+import sys
+import weakref
+from array import array
+
+from .basestate import BaseState, StateIndex
 from .. import rest
 from ..objects.memberobject import GuildMember
-from ..utils import Snowflake, _validate_keys
+from ..utils import Snowflake, _paginate, _validate_keys, amap, undefined
+
+__all__ = ('GuildMemberState', 'CompactMemberMapping',
+           'CompactGuildMemberState')
+
+_EMPTY = -1
+_DELETED = -2
+
+# Fibonacci hashing, the low bits of a snowflake are mostly zeros
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+# deaf, mute and pending are stored as 2 bits each: None, False or True
+_FLAG_FIELDS = ('deaf', 'mute', 'pending')
+_FLAG_VALUES = (None, False, True)
 
-__all__ = ('GuildMemberState',)
+# Fields that are rarely set, they're kept in a dict keyed by row
+# (attribute, key)
+_SPARSE_FIELDS = (('premium_since', 'premium_since'),
+                  ('_permissions', 'permissions'))
 
 
 class GuildMemberState(BaseState):
     __key_transformer__ = Snowflake.try_snowflake
     __guild_member_class__ = GuildMember
+    __indexes__ = {
+        'role': StateIndex(lambda member: member.roles.keys(), multi=True,
+                           transform=Snowflake.try_snowflake),
+    }
 
     def __init__(self, *, manager, guild):
         super().__init__(manager=manager)
         self.guild = guild
 
+    def new(self, data):
+        return self.__guild_member_class__.unmarshal(
+            data, state=self, guild=self.guild)
+
     def upsert(self, data):
         member = self.get(data['user']['id'])
         if member is not None:
             member.update(data)
+            self._updated(member)
         else:
-            member = self.__guild_member_class__.unmarshal(
-                data, state=self, guild=self.guild)
+            member = self.new(data)
             member.cache()
 
         return member
 
+    def extend(self, values):
+        """Stores members from payloads without returning them, states
+        that don't have to build an object for every member override this
+        """
+        for data in values:
+            self.upsert(data)
+
     async def fetch(self, user):
         user_id = Snowflake.try_snowflake(user)
 
@@ -54,6 +90,35 @@ class GuildMemberState(BaseState):
 
         return self.upsert_many(data)
 
+    def paginate(self, *, after=None, limit=None, cache=True):
+        """Walks the guild's members in order of their ids starting at
+        `after`
+
+        Arguments:
+            limit Optional[int]: The maximum number of members to yield
+
+            cache bool: Whether or not to store the members in the cache
+
+        Returns:
+            AsyncIterator[GuildMember]: The members
+        """
+        async def fetch(cursor, size):
+            params = {'limit': size}
+
+            if cursor is not None:
+                params['after'] = cursor
+
+            return await rest.get_guild_members.request(
+                session=self.manager.rest,
+                fmt=dict(guild_id=self.guild.id),
+                params=params)
+
+        return amap(self.upsert if cache else self.new,
+                    _paginate(fetch, key=lambda member: member['user']['id'],
+                              page_size=1000,
+                              cursor=Snowflake.try_snowflake(after),
+                              limit=limit))
+
     async def search(self, query, limit=None):
         params = {'query': query}
 
@@ -89,3 +154,461 @@ class GuildMemberState(BaseState):
         await rest.remove_guild_member.request(
             session=self.manager.rest,
             fmt=dict(guild_id=self.guild.id, user_id=user_id))
+
+
+class CompactMemberMapping:
+    """Stores members column-wise instead of as one object each
+
+    User ids live in an `array('Q')` indexed by an open addressing
+    hash table, roles are a packed index into the guild's role ids,
+    nicknames and join dates are interned. `GuildMember` objects are
+    only built when a member is accessed and are reused for as long as
+    they're referenced
+
+    Members are indexed by their set of roles and every role by the sets
+    that contain it, so looking members up by role doesn't scan the rows
+    """
+    compact = True
+
+    def __init__(self, state):
+        self.state = state
+
+        self.ids = array('Q')
+        self.users = []
+        self.nicks = []
+        self.joined_at = []
+        self.flags = array('B')
+        self.roles = array('I')
+        self.sparse = {}
+
+        self.role_ids = []
+        self.role_positions = {}
+        self.role_sets = [b'']
+        self.role_set_indexes = {b'': 0}
+
+        # role set index -> the keys of the members with that set and
+        # role position -> the indexes of the sets that contain it
+        self.role_set_members = {}
+        self.position_role_sets = {}
+
+        self.strings = {}
+        self.proxies = weakref.WeakValueDictionary()
+
+        self._table = array('q', (_EMPTY,)) * 8
+        self._bits = 3
+        self._used = 0
+
+    def _slot(self, key):
+        return ((key * _HASH_MULTIPLIER) & _MASK64) >> (64 - self._bits)
+
+    def _find(self, key):
+        table = self._table
+        mask = len(table) - 1
+        index = self._slot(key)
+
+        while True:
+            row = table[index]
+            if row == _EMPTY:
+                return index, -1
+            if row >= 0 and self.ids[row] == key:
+                return index, row
+            index = (index + 1) & mask
+
+    def _insert_slot(self, key, row):
+        table = self._table
+        mask = len(table) - 1
+        index = self._slot(key)
+
+        while table[index] >= 0:
+            index = (index + 1) & mask
+
+        if table[index] == _EMPTY:
+            self._used += 1
+
+        table[index] = row
+
+    def _resize(self):
+        bits = 3
+        while (1 << bits) * 6 < len(self.ids) * 10 + 10:
+            bits += 1
+
+        self._bits = bits
+        self._table = array('q', (_EMPTY,)) * (1 << bits)
+        self._used = 0
+
+        for row, key in enumerate(self.ids):
+            self._insert_slot(key, row)
+
+    def _intern(self, value):
+        if value is None:
+            return None
+        return self.strings.setdefault(value, value)
+
+    def _pack_roles(self, keys):
+        positions = []
+        for role_id in keys:
+            position = self.role_positions.get(role_id)
+            if position is None:
+                position = len(self.role_ids)
+                self.role_ids.append(role_id)
+                self.role_positions[role_id] = position
+            positions.append(position)
+
+        packed = array('H', sorted(positions)).tobytes()
+
+        index = self.role_set_indexes.get(packed)
+        if index is None:
+            index = len(self.role_sets)
+            self.role_sets.append(packed)
+            self.role_set_indexes[packed] = index
+
+            for position in positions:
+                self.position_role_sets.setdefault(position, set()).add(index)
+
+        return index
+
+    def _index_roles(self, key, index):
+        members = self.role_set_members.get(index)
+        if members is None:
+            members = self.role_set_members[index] = set()
+        members.add(key)
+
+    def _unindex_roles(self, key, index):
+        members = self.role_set_members.get(index)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self.role_set_members[index]
+
+    def _unpack_roles(self, index):
+        positions = array('H')
+        positions.frombytes(self.role_sets[index])
+        return [self.role_ids[position] for position in positions]
+
+    def iter_role_keys(self, role):
+        """Yields the ids of the members that have the role"""
+        position = self.role_positions.get(Snowflake.try_snowflake(role))
+        if position is None:
+            return
+
+        for index in tuple(self.position_role_sets.get(position, ())):
+            for key in tuple(self.role_set_members.get(index, ())):
+                yield Snowflake(key)
+
+    def _pack_member(self, row, member):
+        data = {key: getattr(member, name) for name, key in _SPARSE_FIELDS}
+
+        for name in _FLAG_FIELDS + ('nick', 'joined_at'):
+            data[name] = getattr(member, name)
+
+        self._pack(row, member.id, data, member.roles.keys(), member.user)
+
+    def _pack(self, row, key, data, role_ids, user):
+        flags = 0
+        for shift, name in enumerate(_FLAG_FIELDS):
+            flags |= _FLAG_VALUES.index(data.get(name)) << (shift * 2)
+
+        values = {}
+        for _, name in _SPARSE_FIELDS:
+            value = data.get(name)
+            if value is not None:
+                values[name] = value
+
+        nick = self._intern(data.get('nick'))
+        joined_at = self._intern(data.get('joined_at'))
+        roles = self._pack_roles(role_ids)
+
+        users = self.state.manager.users
+
+        if row == len(self.ids):
+            if user is not None:
+                users.acquire(user)
+
+            self.ids.append(key)
+            self.users.append(user)
+            self.nicks.append(nick)
+            self.joined_at.append(joined_at)
+            self.flags.append(flags)
+            self.roles.append(roles)
+
+            self._index_roles(key, roles)
+        else:
+            old = self.users[row]
+            if user is not old:
+                if user is not None:
+                    users.acquire(user)
+                if old is not None:
+                    users.release(old)
+
+            old_roles = self.roles[row]
+            if roles != old_roles:
+                self._unindex_roles(key, old_roles)
+                self._index_roles(key, roles)
+
+            self.users[row] = user
+            self.nicks[row] = nick
+            self.joined_at[row] = joined_at
+            self.flags[row] = flags
+            self.roles[row] = roles
+
+        if values:
+            self.sparse[row] = values
+        else:
+            self.sparse.pop(row, None)
+
+    def _materialize(self, key, row):
+        data = {
+            'nick': self.nicks[row],
+            'joined_at': self.joined_at[row],
+            'roles': self._unpack_roles(self.roles[row]),
+        }
+
+        flags = self.flags[row]
+        for shift, name in enumerate(_FLAG_FIELDS):
+            data[name] = _FLAG_VALUES[(flags >> (shift * 2)) & 3]
+
+        values = self.sparse.get(row)
+        if values is not None:
+            data.update(values)
+
+        member = self.state.new(data)
+        member.id = Snowflake(key)
+        member.user = self.users[row]
+        member.cached = True
+
+        self.proxies[key] = member
+
+        return member
+
+    def _remove(self, index, row):
+        self._table[index] = _DELETED
+        self._unindex_roles(self.ids[row], self.roles[row])
+
+        user = self.users[row]
+        if user is not None:
+            self.state.manager.users.release(user)
+
+        last = len(self.ids) - 1
+        if row != last:
+            # Move the last row into the hole
+            key = self.ids[last]
+            self.ids[row] = key
+            self.users[row] = self.users[last]
+            self.nicks[row] = self.nicks[last]
+            self.joined_at[row] = self.joined_at[last]
+            self.flags[row] = self.flags[last]
+            self.roles[row] = self.roles[last]
+
+            values = self.sparse.pop(last, None)
+            if values is not None:
+                self.sparse[row] = values
+            else:
+                self.sparse.pop(row, None)
+
+            self._table[self._find(key)[0]] = row
+        else:
+            self.sparse.pop(row, None)
+
+        self.ids.pop()
+        self.users.pop()
+        self.nicks.pop()
+        self.joined_at.pop()
+        self.flags.pop()
+        self.roles.pop()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return self.keys()
+
+    def __reversed__(self):
+        for key in reversed(self.ids):
+            yield Snowflake(key)
+
+    def __contains__(self, key):
+        return self._find(key)[1] != -1
+
+    def __getitem__(self, key):
+        member = self.proxies.get(key)
+        if member is not None:
+            return member
+
+        row = self._find(key)[1]
+        if row == -1:
+            raise KeyError(key)
+
+        return self._materialize(key, row)
+
+    def __setitem__(self, key, member):
+        self.insert(key, member=member)
+        self.proxies[key] = member
+
+    def insert(self, key, data=None, *, member=None, user=None):
+        """Stores a member from either a `GuildMember` or a payload
+        without building an object for it
+
+        Returns:
+            bool: Whether or not the member is new
+        """
+        row = self._find(key)[1]
+        if row == -1:
+            row = len(self.ids)
+            append = True
+        else:
+            append = False
+
+        if member is not None:
+            self._pack_member(row, member)
+        else:
+            self._pack(row, key, data, Snowflake.try_snowflake_set(
+                data.get('roles', ())), user)
+
+        if append:
+            self._insert_slot(key, row)
+
+            if self._used * 10 > len(self._table) * 7:
+                self._resize()
+
+        return append
+
+    def __delitem__(self, key):
+        index, row = self._find(key)
+        if row == -1:
+            raise KeyError(key)
+
+        self._remove(index, row)
+        self.proxies.pop(key, None)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, default=undefined):
+        try:
+            member = self[key]
+        except KeyError:
+            if default is not undefined:
+                return default
+            raise
+
+        del self[key]
+        return member
+
+    def popitem(self):
+        if not self.ids:
+            raise KeyError('dictionary is empty')
+
+        key = Snowflake(self.ids[-1])
+        return key, self.pop(key)
+
+    def clear(self):
+        users = self.state.manager.users
+        for user in self.users:
+            if user is not None:
+                users.release(user)
+
+        self.__init__(self.state)
+
+    def keys(self):
+        for key in self.ids:
+            yield Snowflake(key)
+
+    def values(self):
+        for key in self.keys():
+            yield self[key]
+
+    def items(self):
+        for key in self.keys():
+            yield key, self[key]
+
+    def nbytes(self):
+        size = (self.ids.itemsize * len(self.ids)
+                + self.flags.itemsize * len(self.flags)
+                + self.roles.itemsize * len(self.roles)
+                + self._table.itemsize * len(self._table)
+                + sys.getsizeof(self.users) + sys.getsizeof(self.nicks)
+                + sys.getsizeof(self.joined_at)
+                + sys.getsizeof(self.sparse) + sys.getsizeof(self.strings))
+
+        for value in self.strings:
+            size += sys.getsizeof(value)
+
+        for packed in self.role_sets:
+            size += sys.getsizeof(packed)
+
+        for members in self.role_set_members.values():
+            size += sys.getsizeof(members)
+
+        for indexes in self.position_role_sets.values():
+            size += sys.getsizeof(indexes)
+
+        return size
+
+
+class CompactGuildMemberState(GuildMemberState):
+    """A `GuildMemberState` that keeps its members in a
+    `CompactMemberMapping`, meant for guilds with a very large number of
+    members
+
+    note:
+        Enable it with `Manager.set_class('GuildMemberState',
+        CompactGuildMemberState)`, cache policies don't apply to it and
+        the `role` index is answered by the mapping's role set index
+        instead of keeping an index per member
+    """
+    __mapping__ = CompactMemberMapping
+    __indexes__ = {}
+
+    def set_cache_policy(self, policy):
+        # The policy is ignored, policies set on a live state keep the
+        # rows that are already stored
+        self.cache_policy = None
+        if not hasattr(self, 'mapping'):
+            self.mapping = self.__mapping__(self)
+
+    # The mapping references users per row, proxies don't count
+    def _acquire_user(self, user):
+        pass
+
+    def _release_user(self, user):
+        pass
+
+    def upsert(self, data):
+        member = self.get(data['user']['id'])
+        if member is not None:
+            member.update(data)
+            # Writes the changes back to the columns and indexes, members
+            # from the recycle bin are cached again
+            member.cache()
+        else:
+            member = self.new(data)
+            member.cache()
+
+        return member
+
+    def extend(self, values):
+        users = self.manager.users
+        for data in values:
+            key = self.transform_key(data['user']['id'])
+            if key in self.mapping.proxies or key in self.recycle_bin:
+                self.upsert(data)
+            else:
+                user = users.upsert(data['user'])
+                self.counters.entries += self.mapping.insert(
+                    key, data, user=user)
+
+    def find(self, index, value):
+        if index != 'role' or index in self.indexes:
+            return super().find(index, value)
+        return [self.mapping[key]
+                for key in self.mapping.iter_role_keys(value)]
+
+    def find_first(self, index, value):
+        if index != 'role' or index in self.indexes:
+            return super().find_first(index, value)
+        for key in self.mapping.iter_role_keys(value):
+            return self.mapping[key]
+        return None
@@ -1,25 +1,30 @@
-from .basestate import BaseState
+from .basestate import BaseState, CachePolicy
 from .. import rest
 from ..objects.messageobject import Message
-from ..utils import Snowflake, _validate_keys
+from ..utils import Snowflake, _paginate, _validate_keys, amap
 
 __all__ = ('MessageState',)
 
 
 class MessageState(BaseState):
     __key_transformer__ = Snowflake.try_snowflake
+    __cache_policy__ = CachePolicy(max_size=1000)
     __message_class__ = Message
 
     def __init__(self, *, manager, channel):
         super().__init__(manager=manager)
         self.channel = channel
 
+    def new(self, data):
+        return self.__message_class__.unmarshal(data, state=self)
+
     def upsert(self, data):
         message = self.get(data['id'])
         if message is not None:
             message.update(data)
+            self._updated(message)
         else:
-            message = self.__message_class__.unmarshal(data, state=self)
+            message = self.new(data)
             message.cache()
 
         return message
@@ -56,6 +61,47 @@ class MessageState(BaseState):
 
         return self.upsert_many(data)
 
+    def paginate(self, *, before=None, after=None, limit=None, cache=True):
+        """Walks the channel's history from newest to oldest starting at
+        `before`, or from oldest to newest starting at `after` if only
+        `after` is provided
+
+        Arguments:
+            limit Optional[int]: The maximum number of messages to yield
+
+            cache bool: Whether or not to store the messages in the cache
+
+        Returns:
+            AsyncIterator[Message]: The messages
+        """
+        if after is not None and before is None:
+            reverse = False
+            cursor = Snowflake.try_snowflake(after)
+            cursor_key = 'after'
+        else:
+            reverse = True
+            cursor = Snowflake.try_snowflake(before)
+            cursor_key = 'before'
+
+        async def fetch(cursor, size):
+            params = {'limit': size}
+
+            if cursor is not None:
+                params[cursor_key] = cursor
+
+            data = await rest.get_channel_messages.request(
+                session=self.manager.rest,
+                fmt=dict(channel_id=self.channel.id),
+                params=params)
+
+            data.sort(key=lambda message: int(message['id']), reverse=reverse)
+
+            return data
+
+        return amap(self.upsert if cache else self.new,
+                    _paginate(fetch, key=lambda message: message['id'],
+                              page_size=100, cursor=cursor, limit=limit))
+
     async def create(self, **kwargs):
         keys = rest.create_channel_message.json
 
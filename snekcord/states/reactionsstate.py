@@ -17,6 +17,7 @@ class ReactionsState(BaseState):
         reactions = self.get(ident)
         if reactions is not None:
             reactions.update(data)
+            self._updated(reactions)
         else:
             reactions = self.__reactions_class__.unmarshal(data, state=self)
             reactions.cache()
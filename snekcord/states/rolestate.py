@@ -1,4 +1,4 @@
-from .basestate import BaseState, BaseSubState
+from .basestate import BaseState, BaseSubState, StateIndex
 from .. import rest
 from ..objects.roleobject import Role
 from ..utils import Snowflake, _validate_keys
@@ -9,6 +9,9 @@ __all__ = ('RoleState',)
 class RoleState(BaseState):
     __key_transformer__ = Snowflake.try_snowflake
     __role_class__ = Role
+    __indexes__ = {
+        'name': StateIndex('name'),
+    }
 
     def __init__(self, *, manager, guild):
         super().__init__(manager=manager)
@@ -18,6 +21,7 @@ class RoleState(BaseState):
         role = self.get(data['id'])
         if role is not None:
             role.update(data)
+            self._updated(role)
         else:
             role = self.__role_class__.unmarshal(
                 data, state=self, guild=self.guild)
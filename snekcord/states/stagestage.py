@@ -14,8 +14,10 @@ class StageState(BaseState):
         stage = self.get(data['id'])
         if stage is not None:
             stage.update(data)
+            self._updated(stage)
         else:
-            stage = self.__stage_class__.unmarshal(data)
+            stage = self.__stage_class__.unmarshal(data, state=self)
+            stage.cache()
 
         return stage
 
@@ -7,19 +7,84 @@ __all__ = ('UserState',)
 
 
 class UserState(BaseState):
+    """The state that every user is interned in
+
+    Cached members, messages, bans, emojis and invites hold a reference
+    to their user, once the last one is released the user is evicted to
+    the recycle bin. Users that nothing references yet, e.g. the authors
+    of messages that aren't cached, only go to the recycle bin, users
+    returned by `fetch` and `fetch_self` are cached
+
+    Attributes:
+        references dict[Snowflake, int]: The number of cached objects
+            referencing each user
+    """
     __key_transformer__ = Snowflake.try_snowflake
     __user_class__ = User
 
+    # The keys of the partial users sent with members, messages, bans
+    # and so on, payloads with other keys are always applied
+    __partial_keys__ = frozenset(('id', 'username', 'discriminator',
+                                  'avatar', 'bot', 'public_flags'))
+
+    def __init__(self, *, manager):
+        super().__init__(manager=manager)
+        self.references = {}
+
+    def new(self, data):
+        return self.__user_class__.unmarshal(data, state=self)
+
+    def _unchanged(self, user, data):
+        # Comparing the fields directly is a fraction of the cost of an
+        # update, a missing key only costs an update that wasn't needed
+        return (data.keys() <= self.__partial_keys__
+                and user.name == data.get('username')
+                and user.discriminator == data.get('discriminator')
+                and user.avatar == data.get('avatar')
+                and user.bot == data.get('bot')
+                and user.public_flags == data.get('public_flags'))
+
     def upsert(self, data):
         user = self.get(data['id'])
         if user is not None:
-            user.update(data)
+            # Payloads that didn't change don't touch the user at all
+            if not self._unchanged(user, data):
+                user.update(data)
+
+            # Users evicted by release stay in the recycle bin until
+            # something references them again
+            if user.cached or user.id in self.references:
+                self._updated(user)
         else:
-            user = self.__user_class__.unmarshal(data, state=self)
-            user.cache()
+            user = self.new(data)
+            # acquire caches it
+            self.recycle(user.id, user)
 
         return user
 
+    def acquire(self, user):
+        """Adds a reference to the user, bringing it back into the cache
+        if it was evicted
+        """
+        self.references[user.id] = self.references.get(user.id, 0) + 1
+
+        if not user.cached:
+            user.cache()
+
+    def release(self, user):
+        """Removes a reference from the user, the user is evicted once
+        nothing references it anymore
+        """
+        count = self.references.get(user.id, 0) - 1
+        if count > 0:
+            self.references[user.id] = count
+            return
+
+        self.references.pop(user.id, None)
+
+        if user.cached:
+            user.uncache()
+
     async def fetch(self, user):
         user_id = Snowflake.try_snowflake(user)
 
@@ -27,10 +92,18 @@ class UserState(BaseState):
             session=self.manager.rest,
             fmt=dict(user_id=user_id))
 
-        return self.upsert(data)
+        user = self.upsert(data)
+        if not user.cached:
+            user.cache()
+
+        return user
 
     async def fetch_self(self):
         data = await rest.get_user_client.request(
             session=self.manager.rest)
 
-        return self.upsert(data)
+        user = self.upsert(data)
+        if not user.cached:
+            user.cache()
+
+        return user
@@ -1,28 +1,107 @@
 import asyncio
+import enum
 import functools
+import inspect
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from weakref import WeakSet
 
-__all__ = ('EventWaiter', 'EventDispatcher',)
+from .undefined import undefined
 
+__all__ = ('QueueOverflow', 'EventWaiter', 'LimitedListener',
+           'event_key', 'WorkerPool', 'OrderedListener', 'marshal_event',
+           'ExecutorListener', 'EventDispatcher',)
 
-class EventWaiter:
+
+class QueueOverflow(enum.Enum):
+    """What happens to an event that arrives while a bounded queue is full
+
+    | Name          | Description                                       |
+    | ------------- | ------------------------------------------------- |
+    | `DROP_OLDEST` | The oldest queued event is dropped                |
+    | `DROP_NEWEST` | The new event is dropped                          |
+    | `BLOCK`       | The event is queued anyway and the dispatcher is  |
+    |               | marked as congested until the queue has room,     |
+    |               | shards stop reading while it is                   |
+    """
+    DROP_OLDEST = enum.auto()
+    DROP_NEWEST = enum.auto()
+    BLOCK = enum.auto()
+
+
+class _BoundedQueue:
+    # The overflow handling shared by waiters and limited listeners,
+    # subclasses provide `dispatcher`, `max_queued`, `overflow` and
+    # `_queued`
+    def _offer(self, queue, value):
+        """Returns whether or not the value should be queued, dropping
+        the oldest queued value if the overflow policy says so
+        """
+        if self.max_queued is None or self._queued() < self.max_queued:
+            return True
+
+        if self.overflow is QueueOverflow.DROP_NEWEST:
+            self.dropped += 1
+            return False
+
+        if self.overflow is QueueOverflow.DROP_OLDEST:
+            self.dropped += 1
+            queue()
+            return True
+
+        self.dispatcher._congest(self)
+        return True
+
+    def _drained(self):
+        if (self.overflow is QueueOverflow.BLOCK
+                and (self.max_queued is None
+                     or self._queued() < self.max_queued)):
+            self.dispatcher._relieve(self)
+
+    def stats(self):
+        return {'queued': self._queued(), 'dropped': self.dropped}
+
+
+class EventWaiter(_BoundedQueue):
+    """Receives the arguments of an event as it's dispatched
+
+    Attributes:
+        max_queued Optional[int]: The maximum number of events waiting to
+            be received, None for no limit
+
+        overflow QueueOverflow: What happens to events once the queue is
+            full
+
+        dropped int: The number of events that were dropped
+    """
     def __init__(self, name, *, dispatcher, timeout=None,
-                 filterer=None):
+                 filterer=None, max_queued=None,
+                 overflow=QueueOverflow.DROP_OLDEST):
         self.name = name.lower()
         self.dispatcher = dispatcher
         self.timeout = timeout
         self.filterer = filterer
+        self.max_queued = max_queued
+        self.overflow = QueueOverflow(overflow)
+        self.dropped = 0
         self._queue = asyncio.Queue()
 
+    def _queued(self):
+        return self._queue.qsize()
+
     def _put(self, value):
         if self.filterer is not None:
             if not self.filterer(*value):
                 return
 
-        self._queue.put_nowait(value)
+        if self._offer(self._queue.get_nowait, value):
+            self._queue.put_nowait(value)
 
     async def _get(self):
         value = await asyncio.wait_for(self._queue.get(), timeout=self.timeout)
+        self._drained()
+
         if len(value) == 1:
             value, = value
 
@@ -49,18 +128,347 @@ class EventWaiter:
         except KeyError:
             pass
 
+        if self.overflow is QueueOverflow.BLOCK:
+            self.dispatcher._relieve(self)
+
     __del__ = close
 
 
+class LimitedListener(_BoundedQueue):
+    """Runs a listener at most `concurrency` times at once, events that
+    arrive in the meantime wait in a bounded queue
+
+    Attributes:
+        callback Callable: The listener
+
+        concurrency int: The maximum number of concurrent invocations
+
+        max_queued Optional[int]: The maximum number of events waiting
+            for an invocation, None for no limit
+
+        overflow QueueOverflow: What happens to events once the queue is
+            full
+
+        running int: The number of invocations that haven't finished
+
+        dropped int: The number of events that were dropped
+    """
+    def __init__(self, callback, *, dispatcher, concurrency=1,
+                 max_queued=None, overflow=QueueOverflow.DROP_OLDEST):
+        self.callback = callback
+        self.dispatcher = dispatcher
+        self.concurrency = concurrency
+        self.max_queued = max_queued
+        self.overflow = QueueOverflow(overflow)
+
+        self.running = 0
+        self.dropped = 0
+        self.queue = deque()
+
+    def _queued(self):
+        return len(self.queue)
+
+    def __call__(self, *args):
+        if self.running < self.concurrency:
+            self._start(args)
+        elif self._offer(self.queue.popleft, args):
+            self.queue.append(args)
+
+    def _start(self, args):
+        self.running += 1
+        try:
+            result = self.callback(*args)
+        except BaseException:
+            self._done(None)
+            raise
+
+        future = None
+        if result is not None:
+            future = ensure_future(result)
+
+        if future is None:
+            self._done(None)
+        else:
+            future.add_done_callback(self._done)
+
+    def _done(self, future):
+        self.running -= 1
+
+        if self.queue:
+            args = self.queue.popleft()
+            self._drained()
+            self._start(args)
+
+    def stats(self):
+        return dict(super().stats(), running=self.running)
+
+
+def event_key(*args):
+    """The default key of ordered listeners, the `guild_id`, `channel_id`
+    or `id` of the event's payload, whichever comes first
+
+    Returns:
+        Optional[str]: The key, None when the event has no payload
+    """
+    for arg in args:
+        payload = getattr(arg, 'payload', arg)
+        if isinstance(payload, dict):
+            for name in ('guild_id', 'channel_id', 'id'):
+                key = payload.get(name)
+                if key is not None:
+                    return key
+    return None
+
+
+class _PoolWorker(_BoundedQueue):
+    def __init__(self, pool):
+        self.dispatcher = pool.dispatcher
+        self.max_queued = pool.max_queued
+        self.overflow = pool.overflow
+        self.dropped = 0
+        self.processed = 0
+
+        self.queue = deque()
+        self.wakeup = asyncio.Event()
+        self.task = None
+
+    def _queued(self):
+        return len(self.queue)
+
+    def put(self, callback, args):
+        if self._offer(self.queue.popleft, args):
+            self.queue.append((callback, args))
+            self.wakeup.set()
+
+    async def work(self):
+        loop = self.dispatcher.loop
+
+        while True:
+            if not self.queue:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            callback, args = self.queue.popleft()
+            self._drained()
+
+            try:
+                result = callback(*args)
+                if result is not None and hasattr(
+                        result.__class__, '__await__'):
+                    await result
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                loop.call_exception_handler({
+                    'message': f'Exception in ordered listener {callback!r}',
+                    'exception': exc,
+                })
+
+            self.processed += 1
+
+    def stats(self):
+        return dict(super().stats(), processed=self.processed)
+
+
+class WorkerPool:
+    """A fixed number of worker tasks that run callbacks one at a time,
+    callbacks submitted with the same key always go to the same worker
+    and run in the order they were submitted
+
+    Attributes:
+        size int: The number of workers
+
+        max_queued Optional[int]: The maximum number of callbacks waiting
+            in each worker's queue, None for no limit
+
+        overflow QueueOverflow: What happens to callbacks once a worker's
+            queue is full
+
+    note:
+        The workers are started by the first `submit`
+    """
+    def __init__(self, *, dispatcher, size=8, max_queued=None,
+                 overflow=QueueOverflow.DROP_OLDEST):
+        self.dispatcher = dispatcher
+        self.size = size
+        self.max_queued = max_queued
+        self.overflow = QueueOverflow(overflow)
+
+        self.workers = [_PoolWorker(self) for _ in range(size)]
+
+    def submit(self, key, callback, *args):
+        worker = self.workers[hash(key) % self.size]
+
+        if worker.task is None:
+            worker.task = self.dispatcher.loop.create_task(worker.work())
+
+        worker.put(callback, args)
+
+    def close(self):
+        """Cancels the workers, queued callbacks are discarded"""
+        for worker in self.workers:
+            if worker.task is not None:
+                worker.task.cancel()
+                worker.task = None
+
+            worker.queue.clear()
+            self.dispatcher._relieve(worker)
+
+    def stats(self):
+        return [worker.stats() for worker in self.workers]
+
+
+class OrderedListener:
+    """Submits a listener to its dispatcher's worker pool, so that events
+    with the same key are handled one after the other in the order they
+    were dispatched
+
+    Attributes:
+        callback Callable: The listener
+
+        key Callable[..., Hashable]: Called with the event's arguments
+            to get its key, see `event_key`
+    """
+    def __init__(self, callback, *, dispatcher, key=event_key):
+        self.callback = callback
+        self.dispatcher = dispatcher
+        self.key = key
+
+    def __call__(self, *args):
+        self.dispatcher.pool.submit(self.key(*args), self.callback, *args)
+
+
+def marshal_event(value):
+    """Turns an event's argument into something that pickles cheaply,
+    objects with a `to_dict` method become their dict, named tuples are
+    marshalled field by field and lists, sets and tuples item by item,
+    payloads are already plain
+    """
+    to_dict = getattr(value, 'to_dict', None)
+    if to_dict is not None:
+        return to_dict()
+
+    if isinstance(value, tuple):
+        if hasattr(value, '_fields'):
+            return value.__class__(*map(marshal_event, value))
+        return tuple(map(marshal_event, value))
+
+    if isinstance(value, (list, set, frozenset)):
+        return [marshal_event(item) for item in value]
+
+    return value
+
+
+class ExecutorListener:
+    """Runs a listener in an executor so that it doesn't block the event
+    loop, calls return a task for the result. Exceptions, including the
+    ones raised while pickling the arguments, are passed to the loop's
+    exception handler
+
+    Attributes:
+        callback Callable: The listener, it can't be a coroutine function
+            and has to be picklable for process executors
+
+        executor str|concurrent.futures.Executor: `'thread'` or
+            `'process'` for the dispatcher's managed executors or an
+            executor
+
+        marshal bool: Whether or not the event's arguments go through
+            `marshal_event`, the default for process executors
+
+    warning:
+        Listeners in thread executors share the cached objects with the
+        event loop, they shouldn't modify them
+    """
+    def __init__(self, callback, *, dispatcher, executor, marshal=None):
+        if inspect.iscoroutinefunction(callback):
+            raise TypeError(
+                'Coroutine functions can\'t run in an executor')
+
+        self.callback = callback
+        self.dispatcher = dispatcher
+        self.executor = executor
+
+        if marshal is None:
+            marshal = (executor == 'process'
+                       or isinstance(executor, ProcessPoolExecutor))
+
+        self.marshal = marshal
+
+    def __call__(self, *args):
+        if self.marshal:
+            args = tuple(map(marshal_event, args))
+
+        return self.dispatcher.loop.create_task(self._run(args))
+
+    async def _run(self, args):
+        loop = self.dispatcher.loop
+
+        try:
+            return await loop.run_in_executor(
+                self.dispatcher.get_executor(self.executor),
+                self.callback, *args)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            loop.call_exception_handler({
+                'message': f'Exception in executor listener {self.callback!r}',
+                'exception': exc,
+            })
+
+
 def ensure_future(coro):
     if hasattr(coro.__class__, '__await__'):
         return asyncio.ensure_future(coro)
     return None
 
 
+# Event names are lowercased once and interned
+_names = {}
+
+
+def _lower(name):
+    lowered = _names.get(name)
+    if lowered is None:
+        lowered = _names[name] = sys.intern(name.lower())
+    return lowered
+
+
 class EventDispatcher:
+    """Runs listeners, waiters and subscribers for dispatched events
+
+    The callbacks for every event are compiled into a table the first
+    time the event is dispatched after listeners, waiters or subscribers
+    changed, whether a listener is a coroutine function is decided then
+    and not for every event. Events that nothing listens for cost one
+    lookup
+
+    Listeners registered with a `concurrency` and waiters keep their
+    pending events in bounded queues, see `QueueOverflow`. Listeners
+    registered with `ordered` run on the dispatcher's `WorkerPool` and
+    listeners registered with an `executor` run outside of the event loop
+
+    note:
+        Handlers in `__events__` turn the event's arguments into the
+        single argument passed to callbacks, they maintain the cache and
+        always run
+    """
     __events__ = None
 
+    # The defaults for limited listeners and waiters
+    __listener_max_queued__ = 1000
+    __waiter_max_queued__ = 1000
+    __overflow__ = QueueOverflow.DROP_OLDEST
+
+    # The number of workers for ordered listeners
+    __workers__ = 8
+
+    # The number of workers of the managed executors, None for the
+    # executor's default
+    __thread_workers__ = None
+    __process_workers__ = None
+
     def __init__(self, *, loop=None):
         if loop is not None:
             self.loop = loop
@@ -70,76 +478,324 @@ class EventDispatcher:
         self._listeners = {}
         self._waiters = {}
         self._subscribers = []
+        # The dispatchers this dispatcher is subscribed to
+        self._subscriptions = []
+
+        # name -> Optional[(listeners, waiters, subscribers)]
+        self._table = {}
+
+        # The BLOCK queues that are full
+        self._congested = WeakSet()
+        self._uncongested = asyncio.Event()
+        self._uncongested.set()
+
+        self._pool = None
+        self._executors = {}
+
+    @property
+    def pool(self):
+        """The `WorkerPool` that runs ordered listeners"""
+        if self._pool is None:
+            self._pool = WorkerPool(
+                dispatcher=self, size=self.__workers__,
+                max_queued=self.__listener_max_queued__,
+                overflow=self.__overflow__)
+        return self._pool
+
+    def _compile(self, name):
+        listeners = tuple(
+            (listener, inspect.iscoroutinefunction(listener))
+            for listener in self._listeners.get(name, ()))
+        waiters = self._waiters.get(name) or None
+        subscribers = tuple(subscriber for subscriber in self._subscribers
+                            if subscriber._receives(name))
+
+        if listeners or waiters is not None or subscribers:
+            entry = (listeners, waiters, subscribers)
+        else:
+            entry = None
+
+        self._table[name] = entry
+        return entry
+
+    def _get_entry(self, name):
+        try:
+            return self._table[name]
+        except KeyError:
+            return self._compile(name)
+
+    def _invalidate(self, name=None):
+        # Subscribers are only called for events they receive, so the
+        # dispatchers they're subscribed to have to recompile too
+        if name is None:
+            self._table.clear()
+        else:
+            self._table.pop(name, None)
+
+        for dispatcher in self._subscriptions:
+            dispatcher._invalidate(name)
+
+    def _receives(self, name):
+        # Whether or not the dispatcher does anything with an event
+        # dispatched by a dispatcher it's subscribed to
+        return self._get_entry(name) is not None
+
+    def has_listeners(self, name):
+        """Whether or not anything would receive the event"""
+        return self._get_entry(_lower(name)) is not None
+
+    @property
+    def congested(self):
+        """Whether or not a queue with the BLOCK policy is full"""
+        return bool(self._congested)
+
+    def _congest(self, queue):
+        self._congested.add(queue)
+        self._uncongested.clear()
+
+    def _relieve(self, queue):
+        self._congested.discard(queue)
+        if not self._congested:
+            self._uncongested.set()
+
+    async def wait_uncongested(self):
+        """Waits until no queue with the BLOCK policy is full"""
+        while self._congested:
+            await self._uncongested.wait()
+
+    def get_executor(self, executor):
+        """Returns the managed executor for `'thread'` or `'process'`,
+        creating it if needed, other executors are returned as is
+        """
+        if not isinstance(executor, str):
+            return executor
+
+        value = self._executors.get(executor)
+        if value is None:
+            if executor == 'thread':
+                value = ThreadPoolExecutor(self.__thread_workers__)
+            elif executor == 'process':
+                value = ProcessPoolExecutor(self.__process_workers__)
+            else:
+                raise ValueError(f'Unknown executor {executor!r}')
+
+            self._executors[executor] = value
+
+        return value
+
+    def shutdown_executors(self, *, wait=False):
+        """Shuts the managed executors down, calls that haven't started
+        are cancelled
+        """
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+        self._executors.clear()
 
-    def register_listener(self, name, callback):
-        listeners = self._listeners.setdefault(name.lower(), [])
+    def register_listener(self, name, callback, *, concurrency=None,
+                          max_queued=undefined, overflow=None,
+                          ordered=False, key=event_key, executor=None):
+        """Registers a listener for an event
+
+        Arguments:
+            name str: The name of the event
+
+            callback Callable: The listener
+
+            concurrency Optional[int]: The maximum number of concurrent
+                invocations, None for no limit
+
+            max_queued Optional[int]: The maximum number of events
+                waiting for an invocation, defaults to
+                `__listener_max_queued__`
+
+            overflow Optional[QueueOverflow]: What happens to events once
+                the queue is full, defaults to `__overflow__`
+
+            ordered bool: Whether or not to run the listener on the
+                dispatcher's `pool`, events with the same key are
+                handled in order while different keys run concurrently
+
+            key Callable[..., Hashable]: Called with the event's arguments
+                to get the key of ordered listeners, see `event_key`
+
+            executor Optional[str|concurrent.futures.Executor]: Where
+                to run the listener, see `ExecutorListener`. It can be
+                combined with `concurrency` or `ordered`
+        """
+        if executor is not None:
+            callback = ExecutorListener(
+                callback, dispatcher=self, executor=executor)
+
+        if ordered:
+            if concurrency is not None:
+                raise ValueError(
+                    'ordered listeners can\'t have a concurrency')
+
+            callback = OrderedListener(callback, dispatcher=self, key=key)
+
+        elif concurrency is not None:
+            if max_queued is undefined:
+                max_queued = self.__listener_max_queued__
+
+            callback = LimitedListener(
+                callback, dispatcher=self, concurrency=concurrency,
+                max_queued=max_queued, overflow=overflow or self.__overflow__)
+
+        name = _lower(name)
+        listeners = self._listeners.setdefault(name, [])
         listeners.append(callback)
+        self._invalidate(name)
+
+        return callback
 
     def remove_listener(self, name, callback):
-        listeners = self._listeners.get(name.lower())
+        name = _lower(name)
+        listeners = self._listeners.get(name)
         if listeners is not None:
-            listeners.remove(callback)
+            for listener in listeners:
+                # Listeners can be wrapped more than once
+                wrapped = listener
+                while wrapped is not callback and wrapped is not None:
+                    wrapped = getattr(wrapped, 'callback', None)
+
+                if wrapped is not None:
+                    listeners.remove(listener)
+                    break
+            else:
+                raise ValueError(f'{callback!r} is not a listener for {name}')
+
+            if isinstance(listener, LimitedListener):
+                self._relieve(listener)
+
+            if not listeners:
+                del self._listeners[name]
+            self._invalidate(name)
 
     def register_waiter(self, *args, **kwargs):
+        kwargs.setdefault('max_queued', self.__waiter_max_queued__)
+        kwargs.setdefault('overflow', self.__overflow__)
         waiter = EventWaiter(*args, dispatcher=self, **kwargs)
-        waiters = self._waiters.setdefault(waiter.name, WeakSet())
+        waiters = self._waiters.setdefault(_lower(waiter.name), WeakSet())
         waiters.add(waiter)
+        self._invalidate(_lower(waiter.name))
         return waiter
 
     wait = register_waiter
 
     def remove_waiter(self, waiter):
-        waiters = self._waiters.get(waiter.name.lower())
+        name = _lower(waiter.name)
+        waiters = self._waiters.get(name)
         if waiters is not None:
             waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[name]
+            self._invalidate(name)
 
-    def run_callbacks(self, name, *args):
-        name = name.lower()
-        listeners = self._listeners.get(name)
-        waiters = self._waiters.get(name)
+    def _run(self, name, entry, args):
+        listeners, waiters, subscribers = entry
 
-        if listeners is not None:
-            for listener in listeners:
-                ensure_future(listener(*args))
+        for listener, is_coroutine in listeners:
+            if is_coroutine:
+                self.loop.create_task(listener(*args))
+            else:
+                result = listener(*args)
+                if result is not None:
+                    ensure_future(result)
 
         if waiters is not None:
             for waiter in waiters:
                 waiter._put(args)
 
-        for subscriber in self._subscribers:
+        for subscriber in subscribers:
             subscriber.run_callbacks(name, *args)
 
+    def run_callbacks(self, name, *args):
+        name = _lower(name)
+        entry = self._get_entry(name)
+        if entry is not None:
+            self._run(name, entry, args)
+
     def dispatch(self, name, *args):
+        name = _lower(name)
+        entry = self._get_entry(name)
+
         if self.__events__ is not None:
-            event = self.__events__.get(name.lower())
+            event = self.__events__.get(name)
             if event is not None:
-                args = (event(*args),)
+                event = event(*args)
+                if entry is not None:
+                    self._run(name, entry, (event,))
+                return
 
-        self.run_callbacks(name, *args)
+        if entry is not None:
+            self._run(name, entry, args)
 
     def subscribe(self, dispatcher):
         dispatcher._subscribers.append(self)
+        self._subscriptions.append(dispatcher)
+        dispatcher._invalidate()
 
     def unsubscribe(self, dispatcher):
         dispatcher._subscribers.remove(self)
-
-    def on(self, name=None):
+        self._subscriptions.remove(dispatcher)
+        dispatcher._invalidate()
+
+    def queue_stats(self):
+        """Collects the queued, dropped and running counts of limited
+        listeners and waiters and the counts of the pool's workers
+
+        Returns:
+            dict: The counts keyed by event name under `events`, the
+                workers' counts under `workers` and whether or not the
+                dispatcher is `congested`
+        """
+        events = {}
+
+        queues = [(name, listener) for name, listeners in
+                  self._listeners.items() for listener in listeners
+                  if isinstance(listener, LimitedListener)]
+        queues.extend((name, waiter) for name, waiters in
+                      self._waiters.items() for waiter in waiters)
+
+        for name, queue in queues:
+            stats = events.get(name)
+            if stats is None:
+                stats = events[name] = {'listeners': 0, 'waiters': 0,
+                                        'queued': 0, 'dropped': 0,
+                                        'running': 0}
+
+            if isinstance(queue, LimitedListener):
+                stats['listeners'] += 1
+                stats['running'] += queue.running
+            else:
+                stats['waiters'] += 1
+
+            stats['queued'] += queue._queued()
+            stats['dropped'] += queue.dropped
+
+        workers = self._pool.stats() if self._pool is not None else []
+
+        return {'congested': self.congested, 'events': events,
+                'workers': workers}
+
+    def on(self, name=None, **kwargs):
         def wrapped(func):
-            self.register_listener(name or func.__name__, func)
+            self.register_listener(name or func.__name__, func, **kwargs)
             return func
         return wrapped
 
     def once(self, name=None):
         def wrapped(func):
             nonlocal name
-            name = (name or func.__name__).lower()
+            name = _lower(name or func.__name__)
 
             @functools.wraps(func)
             def callback(*args):
-                ensure_future(func, *args)
                 self.remove_listener(name, callback)
+                return func(*args)
 
-            self.remove_listener(name, callback)
+            self.register_listener(name, callback)
 
             return func
         return wrapped
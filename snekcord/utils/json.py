@@ -1,6 +1,138 @@
 import json
 
-__all__ = ('JsonTemplate', 'JsonField', 'JsonArray', 'JsonObject')
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+__all__ = ('JsonCodec', 'OrjsonCodec', 'MsgspecCodec', 'UjsonCodec',
+           'JSON_CODECS', 'get_codec', 'set_default_codec', 'JsonTemplate',
+           'JsonField', 'JsonArray', 'JsonObject')
+
+_missing = object()
+
+
+class JsonCodec:
+    """Encodes and decodes JSON using the standard library
+
+    `loads` accepts `bytes`, `bytearray`, `memoryview` and `str`,
+    `dumps` always returns a `str` and `dumps_bytes` always returns
+    `bytes`, use the latter for anything that goes on the wire so that
+    codecs that encode to bytes don't round-trip through `str`
+    """
+    name = 'json'
+    available = True
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj, separators=(',', ':'))
+
+    def dumps_bytes(self, obj):
+        return self.dumps(obj).encode()
+
+
+class OrjsonCodec(JsonCodec):
+    name = 'orjson'
+    available = orjson is not None
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        return orjson.dumps(obj).decode()
+
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj)
+
+
+class MsgspecCodec(JsonCodec):
+    name = 'msgspec'
+    available = msgspec is not None
+
+    def loads(self, data):
+        return msgspec.json.decode(data)
+
+    def dumps(self, obj):
+        return msgspec.json.encode(obj).decode()
+
+    def dumps_bytes(self, obj):
+        return msgspec.json.encode(obj)
+
+
+class UjsonCodec(JsonCodec):
+    name = 'ujson'
+    available = ujson is not None
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return ujson.loads(data)
+
+    def dumps(self, obj):
+        return ujson.dumps(obj)
+
+
+# In order of preference
+JSON_CODECS = {
+    codec.name: codec for codec in (OrjsonCodec, MsgspecCodec, UjsonCodec,
+                                    JsonCodec)
+}
+
+_default_codec = None
+
+
+def get_codec(codec=None):
+    """Resolves a codec
+
+    Arguments:
+        codec Optional[JsonCodec|str]: A codec, the name of a codec or None
+            for the default codec (the fastest installed one unless
+            changed with `set_default_codec`)
+
+    Raises:
+        ValueError: Raised when the codec is unknown or not installed
+    """
+    global _default_codec
+
+    if codec is None:
+        if _default_codec is None:
+            for klass in JSON_CODECS.values():
+                if klass.available:
+                    _default_codec = klass()
+                    break
+        return _default_codec
+
+    if isinstance(codec, str):
+        klass = JSON_CODECS.get(codec)
+        if klass is None:
+            raise ValueError(f'Unknown json codec {codec!r}')
+        if not klass.available:
+            raise ValueError(f'json codec {codec!r} is not installed')
+        return klass()
+
+    return codec
+
+
+def set_default_codec(codec):
+    """Sets the codec used by `JsonObject.unmarshal`, `JsonTemplate.marshal`
+    and every `Manager` that wasn't given a codec
+    """
+    global _default_codec
+    _default_codec = get_codec(codec)
 
 
 class JsonTemplate:
@@ -11,14 +143,72 @@ class JsonTemplate:
         for template in __extends__:
             self.fields.update(template.fields)
 
+    def compile(self):
+        """Generates a specialized `update` function for the template,
+        the function is cached on the template so this only happens once
+
+        The generated function behaves exactly like the generic one but
+        looks up each key once, calls the fields' converters and defaults
+        directly unless a field overrides `unmarshal` or `default` and
+        doesn't raise exceptions for missing keys
+        """
+        update = self.__dict__.get('update')
+        if update is not None:
+            return update
+
+        namespace = {'_missing': _missing}
+        lines = ['def update(obj, data, *, set_defaults=False):']
+
+        for i, (name, field) in enumerate(self.fields.items()):
+            converter = f'_unmarshal_{i}'
+            namespace[converter] = field._unmarshal
+
+            unmarshal = type(field).unmarshal
+            if unmarshal is JsonField.unmarshal:
+                if field._unmarshal is None:
+                    value = 'value'
+                else:
+                    value = f'{converter}(value)'
+            elif unmarshal is JsonArray.unmarshal:
+                if field._unmarshal is None:
+                    value = 'list(value)'
+                else:
+                    value = f'[{converter}(item) for item in value]'
+            else:
+                namespace[f'_field_{i}'] = field
+                value = f'_field_{i}.unmarshal(value)'
+
+            if type(field).default is not JsonField.default:
+                namespace[f'_field_{i}'] = field
+                default = f'_field_{i}.default()'
+            elif callable(field._default):
+                default = f'_default_{i}()'
+            else:
+                default = f'_default_{i}'
+            namespace[f'_default_{i}'] = field._default
+
+            lines.extend((
+                f'    value = data.get({field.key!r}, _missing)',
+                '    if value is not _missing:',
+                '        try:',
+                f'            obj.{name} = {value}',
+                '        except Exception:',
+                '            if set_defaults:',
+                f'                obj.{name} = {default}',
+                '    elif set_defaults:',
+                f'        obj.{name} = {default}',
+            ))
+
+        if len(lines) == 1:
+            lines.append('    pass')
+
+        exec('\n'.join(lines), namespace)
+
+        self.update = namespace['update']
+        return self.update
+
     def update(self, obj, data, *, set_defaults=False):
-        for name, field in self.fields.items():
-            try:
-                value = field.unmarshal(data[field.key])
-                setattr(obj, name, value)
-            except Exception:
-                if set_defaults:
-                    setattr(obj, name, field.default())
+        return self.compile()(obj, data, set_defaults=set_defaults)
 
     def to_dict(self, obj):
         data = {}
@@ -42,7 +232,9 @@ class JsonTemplate:
         return data
 
     def marshal(self, obj, *args, **kwargs):
-        return json.dumps(self.to_dict(obj), *args, **kwargs)
+        if args or kwargs:
+            return json.dumps(self.to_dict(obj), *args, **kwargs)
+        return get_codec().dumps(self.to_dict(obj))
 
     def default_object(self, name='GenericObject'):
         return JsonObjectMeta(name, (JsonObject,), {},
@@ -120,6 +312,9 @@ class JsonObjectMeta(type):
         attrs['__slots__'] = slots
         attrs['__template__'] = template
 
+        if template is not None:
+            template.compile()
+
         return type.__new__(mcs, name, bases, attrs)
 
 
@@ -133,7 +328,7 @@ class JsonObject(metaclass=JsonObjectMeta):
             raise NotImplementedError
 
         if isinstance(data, (bytes, bytearray, memoryview, str)):
-            data = json.loads(data)
+            data = get_codec().loads(data)
 
         self = cls.__new__(cls)
         cls.__init__(self, *args, **kwargs)
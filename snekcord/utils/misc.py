@@ -1,10 +1,11 @@
+import asyncio
 import builtins
 
 from . import undefined
 
-__all__ = ('_validate_keys', 'alist', 'aset', 'aiter', 'anext', 'aenumerate',
-           'afilter', 'amap', 'azip', 'asum', 'asorted', 'amin', 'amax',
-           'aany', 'aall')
+__all__ = ('_validate_keys', '_paginate', 'alist', 'aset', 'aiter', 'anext',
+           'aenumerate', 'afilter', 'amap', 'azip', 'asum', 'asorted', 'amin',
+           'amax', 'aany', 'aall')
 
 
 def _validate_keys(name, source, required, keys):
@@ -17,6 +18,43 @@ def _validate_keys(name, source, required, keys):
             raise ValueError(f'{name} received an unexpected key {key!r}')
 
 
+async def _paginate(fetch, *, key, page_size, cursor=None, limit=None):
+    # fetch(cursor, size) should return a page that is sorted in the
+    # order that it's walked in, key(item) gets the cursor for the next
+    # page from the last item of the current one
+    if limit is not None and limit <= 0:
+        return
+
+    def request(cursor):
+        size = page_size if limit is None else min(page_size, limit - count)
+        return size, asyncio.ensure_future(fetch(cursor, size))
+
+    count = 0
+    size, future = request(cursor)
+
+    try:
+        while True:
+            page = await future
+            future = None
+
+            if limit is not None:
+                page = page[:limit - count]
+            count += len(page)
+
+            if page and len(page) >= size and (limit is None or count < limit):
+                # Request the next page while this one is being consumed
+                size, future = request(key(page[-1]))
+
+            for item in page:
+                yield item
+
+            if future is None:
+                return
+    finally:
+        if future is not None:
+            future.cancel()
+
+
 async def alist(obj):
     values = []
     async for value in obj:
@@ -4,27 +4,108 @@ __all__ = ('Notifier',)
 
 
 class Notifier:
-    def __init__(self, loop=None):
+    """Wakes objects up at fixed intervals
+
+    Every registered object lives in a hashed timing wheel, one timer
+    advances the wheel every `resolution` seconds while anything is
+    registered, so thousands of objects cost one timer instead of one
+    handle each
+
+    Attributes:
+        resolution float: The number of seconds between ticks
+
+        handles dict[Any, float]: The interval of every registered object
+    """
+    def __init__(self, loop=None, *, resolution=0.1, slots=1024):
         if loop is not None:
             self.loop = loop
         else:
             self.loop = asyncio.get_event_loop()
 
+        self.resolution = resolution
         self.handles = {}
         self.queue = asyncio.Queue()
 
-    def register(self, obj, interval=0):
-        self._put(obj, interval)
+        self.tick = 0
+        self.wheel = [{} for _ in range(slots)]
+
+        self._slots = {}
+        self._origin = None
+        self._timer = None
+
+    def register(self, obj, interval=0, delay=0):
+        """Wakes `obj` up after `delay` seconds and then every `interval`
+        seconds, an interval of 0 only wakes it up once
+        """
+        self.unregister(obj)
+        self.handles[obj] = interval
+
+        if delay <= 0:
+            self.queue.put_nowait(obj)
+
+            if not interval:
+                del self.handles[obj]
+                return
+
+            delay = interval
+
+        self._schedule(obj, delay)
 
     def unregister(self, obj):
-        handle = self.handles[obj]
-        handle.cancle()
-        return handle
-
-    def _put(self, obj, interval):
-        self.queue.put_nowait(obj)
-        self.handles[obj] = self.loop.call_later(
-            interval, self._put, obj, interval)
+        interval = self.handles.pop(obj, None)
+
+        slot = self._slots.pop(obj, None)
+        if slot is not None:
+            del self.wheel[slot][obj]
+
+        if not self.handles and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        return interval
+
+    def _schedule(self, obj, delay):
+        ticks = max(1, round(delay / self.resolution))
+        slot = (self.tick + ticks) % len(self.wheel)
+
+        # The number of times the slot comes around before it's due
+        self.wheel[slot][obj] = (ticks - 1) // len(self.wheel)
+        self._slots[obj] = slot
+
+        if self._timer is None:
+            self._origin = self.loop.time() - self.tick * self.resolution
+            self._call_next()
+
+    def _call_next(self):
+        when = self._origin + (self.tick + 1) * self.resolution
+        self._timer = self.loop.call_at(when, self._advance)
+
+    def _advance(self):
+        self.tick += 1
+
+        slot = self.tick % len(self.wheel)
+        bucket = self.wheel[slot]
+
+        for obj, rounds in tuple(bucket.items()):
+            if rounds > 0:
+                bucket[obj] = rounds - 1
+                continue
+
+            del bucket[obj]
+            del self._slots[obj]
+
+            self.queue.put_nowait(obj)
+
+            interval = self.handles.get(obj)
+            if interval:
+                self._schedule(obj, interval)
+            else:
+                self.handles.pop(obj, None)
+
+        if self.handles:
+            self._call_next()
+        else:
+            self._timer = None
 
     async def wait(self):
         return await self.queue.get()
@@ -32,6 +32,16 @@ class Snowflake(int):
 
     @classmethod
     def try_snowflake(cls, obj):
+        if obj.__class__ is cls:
+            return obj
+
+        # Keys are nearly always ids, they don't need the import
+        if isinstance(obj, (str, int)):
+            try:
+                return cls(obj)
+            except ValueError:
+                return obj
+
         from ..objects.baseobject import BaseObject
 
         if isinstance(obj, BaseObject):
@@ -1,5 +1,7 @@
 import asyncio
+import random
 import time
+from collections import deque
 
 from wsaio import WebSocketClient
 
@@ -12,7 +14,6 @@ class WebSocketWorker:
         self.loop = manager.loop
 
         self.timeout = timeout
-        self.timeout_handles = {}
 
         self.notifier = Notifier(loop=self.loop)
 
@@ -24,33 +25,60 @@ class WebSocketWorker:
                     ws.connect(*args, **kwargs), self.timeout)
                 await asyncio.wait_for(ws.ready.wait(), self.timeout)
             except asyncio.TimeoutError:
+                # Abandoned attempts mustn't keep heartbeating or
+                # reconnecting behind the next one
+                ws.close()
                 continue
+            except BaseException:
+                ws.close()
+                raise
             else:
                 break
         else:
             raise ConnectionError(
-                f'{cls.__name__} took too long to become '
+                f'{ws.__class__.__name__} took too long to become '
                 'ready after 5 attempts')
 
         return ws
 
     def ack(self, ws):
         ws.heartbeat_last_acked = time.perf_counter()
-        handle = self.timeout_handles.pop(ws, None)
-        if handle is not None:
-            handle.cancel()
+
+        if not ws.heartbeat_acked:
+            ws.heartbeat_acked = True
+            ws.latencies.append(
+                ws.heartbeat_last_acked - ws.heartbeat_last_sent)
+
+    def start_heartbeat(self, ws, interval):
+        ws.heartbeat_acked = True
+        # Discord wants the first heartbeat after interval * jitter so
+        # that shards started together don't heartbeat together
+        self.notifier.register(ws, interval, interval * random.random())
+
+    def stop_heartbeat(self, ws):
+        self.notifier.unregister(ws)
+
+    async def _heartbeat(self, ws):
+        try:
+            await ws.send_heartbeat()
+        except Exception:
+            ws.heartbeat_failed()
 
     async def work(self):
         while True:
             ws = await self.notifier.wait()
 
-            handle = self.timeout_handles.pop(ws, None)
-            if handle is not None:
-                handle.cancel()
+            if ws not in self.notifier.handles:
+                # Stopped while it was still queued
+                continue
+
+            if not ws.heartbeat_acked:
+                # Nothing came back since the last heartbeat, the
+                # connection is a zombie
+                self.stop_heartbeat(ws)
+                ws.heartbeat_failed()
             else:
-                self.timeout_handles[ws] = self.loop.call_later(
-                    self.timeout, lambda: None)
-                await ws.send_heartbeat()
+                self.loop.create_task(self._heartbeat(ws))
 
 
 WebSocketResponse = JsonTemplate(
@@ -62,6 +90,8 @@ WebSocketResponse = JsonTemplate(
 
 
 class BaseWebSocket(WebSocketClient):
+    __latency_history__ = 100
+
     def __init__(self, loop):
         super().__init__(loop=loop)
 
@@ -69,12 +99,29 @@ class BaseWebSocket(WebSocketClient):
 
         self.heartbeat_last_sent = float('inf')
         self.heartbeat_last_acked = float('inf')
+        self.heartbeat_acked = True
+
+        self.latencies = deque(maxlen=self.__latency_history__)
 
         self.ready = asyncio.Event()
 
     @property
     def latency(self):
-        return self.heartbeat_last_acked - self.heartbeat_last_sent
+        if not self.latencies:
+            return None
+        return self.latencies[-1]
+
+    @property
+    def average_latency(self):
+        if not self.latencies:
+            return None
+        return sum(self.latencies) / len(self.latencies)
 
     async def send_heartbeat(self):
         raise NotImplementedError
+
+    def heartbeat_failed(self):
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
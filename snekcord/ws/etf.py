@@ -0,0 +1,226 @@
+import struct
+
+__all__ = ('ETFDecodeError', 'ETFEncodeError', 'decode', 'encode')
+
+FORMAT_VERSION = 131
+
+NEW_FLOAT_EXT = 70
+SMALL_INTEGER_EXT = 97
+INTEGER_EXT = 98
+FLOAT_EXT = 99
+ATOM_EXT = 100
+SMALL_TUPLE_EXT = 104
+LARGE_TUPLE_EXT = 105
+NIL_EXT = 106
+STRING_EXT = 107
+LIST_EXT = 108
+BINARY_EXT = 109
+SMALL_BIG_EXT = 110
+LARGE_BIG_EXT = 111
+SMALL_ATOM_EXT = 115
+MAP_EXT = 116
+ATOM_UTF8_EXT = 118
+SMALL_ATOM_UTF8_EXT = 119
+
+ATOMS = {
+    'nil': None,
+    'true': True,
+    'false': False,
+}
+
+_u16 = struct.Struct('>H')
+_u32 = struct.Struct('>I')
+_i32 = struct.Struct('>i')
+_f64 = struct.Struct('>d')
+
+
+class ETFDecodeError(ValueError):
+    pass
+
+
+class ETFEncodeError(TypeError):
+    pass
+
+
+class _Decoder:
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def read(self, size):
+        start = self.offset
+        self.offset += size
+        if self.offset > len(self.data):
+            raise ETFDecodeError('Unexpected end of data')
+        return self.data[start:self.offset]
+
+    def read_u8(self):
+        offset = self.offset
+        self.offset += 1
+        try:
+            return self.data[offset]
+        except IndexError:
+            raise ETFDecodeError('Unexpected end of data') from None
+
+    def read_struct(self, st):
+        return st.unpack(self.read(st.size))[0]
+
+    def read_atom(self, size, encoding):
+        name = str(self.read(size), encoding)
+        return ATOMS.get(name, name)
+
+    def read_big(self, size):
+        sign = self.read_u8()
+        value = int.from_bytes(self.read(size), 'little')
+        if sign:
+            value = -value
+        # Discord only uses big integers for snowflakes which are
+        # strings in JSON payloads, keep the shapes identical
+        return str(value)
+
+    def read_list(self, length):
+        values = [self.read_term() for _ in range(length)]
+        tail = self.read_term()
+        if tail != []:
+            raise ETFDecodeError('Improper lists are not supported')
+        return values
+
+    def read_map(self, arity):
+        values = {}
+        for _ in range(arity):
+            key = self.read_term()
+            values[key] = self.read_term()
+        return values
+
+    def read_term(self):
+        tag = self.read_u8()
+
+        if tag == BINARY_EXT:
+            return str(self.read(self.read_struct(_u32)), 'utf-8')
+        elif tag == MAP_EXT:
+            return self.read_map(self.read_struct(_u32))
+        elif tag == SMALL_INTEGER_EXT:
+            return self.read_u8()
+        elif tag == SMALL_ATOM_UTF8_EXT:
+            return self.read_atom(self.read_u8(), 'utf-8')
+        elif tag == ATOM_EXT:
+            return self.read_atom(self.read_struct(_u16), 'latin-1')
+        elif tag == SMALL_BIG_EXT:
+            return self.read_big(self.read_u8())
+        elif tag == INTEGER_EXT:
+            return self.read_struct(_i32)
+        elif tag == LIST_EXT:
+            return self.read_list(self.read_struct(_u32))
+        elif tag == NIL_EXT:
+            return []
+        elif tag == STRING_EXT:
+            # A list of small integers, not an actual string
+            return list(self.read(self.read_struct(_u16)))
+        elif tag == NEW_FLOAT_EXT:
+            return self.read_struct(_f64)
+        elif tag == ATOM_UTF8_EXT:
+            return self.read_atom(self.read_struct(_u16), 'utf-8')
+        elif tag == SMALL_ATOM_EXT:
+            return self.read_atom(self.read_u8(), 'latin-1')
+        elif tag == SMALL_TUPLE_EXT:
+            return [self.read_term() for _ in range(self.read_u8())]
+        elif tag == LARGE_TUPLE_EXT:
+            return [self.read_term() for _ in range(self.read_struct(_u32))]
+        elif tag == LARGE_BIG_EXT:
+            return self.read_big(self.read_struct(_u32))
+        elif tag == FLOAT_EXT:
+            return float(str(self.read(31), 'latin-1').rstrip('\x00'))
+
+        raise ETFDecodeError(f'Unsupported tag {tag}')
+
+
+def decode(data):
+    """Decodes an Erlang External Term Format payload into the same
+    shapes that a JSON payload would decode into
+
+    Raises:
+        ETFDecodeError: Raised when the payload is malformed
+    """
+    decoder = _Decoder(data)
+
+    version = decoder.read_u8()
+    if version != FORMAT_VERSION:
+        raise ETFDecodeError(f'Unsupported format version {version}')
+
+    return decoder.read_term()
+
+
+def _encode_atom(name, buffer):
+    name = name.encode('utf-8')
+    buffer.append(SMALL_ATOM_UTF8_EXT)
+    buffer.append(len(name))
+    buffer += name
+
+
+def _encode_term(obj, buffer):
+    if obj is None:
+        _encode_atom('nil', buffer)
+    elif obj is True:
+        _encode_atom('true', buffer)
+    elif obj is False:
+        _encode_atom('false', buffer)
+    elif isinstance(obj, int):
+        if 0 <= obj <= 255:
+            buffer.append(SMALL_INTEGER_EXT)
+            buffer.append(obj)
+        elif -(1 << 31) <= obj < (1 << 31):
+            buffer.append(INTEGER_EXT)
+            buffer += _i32.pack(obj)
+        else:
+            digits = abs(obj).to_bytes((abs(obj).bit_length() + 7) // 8,
+                                       'little')
+            if len(digits) > 255:
+                buffer.append(LARGE_BIG_EXT)
+                buffer += _u32.pack(len(digits))
+            else:
+                buffer.append(SMALL_BIG_EXT)
+                buffer.append(len(digits))
+            buffer.append(obj < 0)
+            buffer += digits
+    elif isinstance(obj, float):
+        buffer.append(NEW_FLOAT_EXT)
+        buffer += _f64.pack(obj)
+    elif isinstance(obj, str):
+        data = obj.encode('utf-8')
+        buffer.append(BINARY_EXT)
+        buffer += _u32.pack(len(data))
+        buffer += data
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        buffer.append(BINARY_EXT)
+        buffer += _u32.pack(len(obj))
+        buffer += obj
+    elif isinstance(obj, dict):
+        buffer.append(MAP_EXT)
+        buffer += _u32.pack(len(obj))
+        for key, value in obj.items():
+            _encode_term(key, buffer)
+            _encode_term(value, buffer)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        if not obj:
+            buffer.append(NIL_EXT)
+        else:
+            buffer.append(LIST_EXT)
+            buffer += _u32.pack(len(obj))
+            for value in obj:
+                _encode_term(value, buffer)
+            buffer.append(NIL_EXT)
+    else:
+        raise ETFEncodeError(
+            f'Object of type {obj.__class__.__name__} is not ETF '
+            f'serializable')
+
+
+def encode(obj):
+    """Encodes an object into Erlang External Term Format
+
+    Raises:
+        ETFEncodeError: Raised when the object contains unsupported types
+    """
+    buffer = bytearray((FORMAT_VERSION,))
+    _encode_term(obj, buffer)
+    return bytes(buffer)
@@ -1,10 +1,13 @@
+import asyncio
 import enum
-import json
 import platform
+import random
 import time
+import zlib
 
-from wsaio import taskify
+from wsaio import WebSocketOpcode, taskify
 
+from . import etf
 from .basews import BaseWebSocket, WebSocketResponse
 from ..utils import Snowflake
 
@@ -41,12 +44,84 @@ class ShardCloseCode(enum.IntEnum):
     DISALLOWED_INTENTS = 4014
 
 
+class ShardIntent(enum.IntFlag):
+    GUILDS = 1 << 0
+    GUILD_MEMBERS = 1 << 1  # privileged
+    GUILD_BANS = 1 << 2
+    GUILD_EMOJIS = 1 << 3
+    GUILD_INTEGRATIONS = 1 << 4
+    GUILD_WEBHOOKS = 1 << 5
+    GUILD_INVITES = 1 << 6
+    GUILD_VOICE_STATES = 1 << 7
+    GUILD_PRESENCES = 1 << 8  # privileged
+    GUILD_MESSAGES = 1 << 9
+    GUILD_MESSAGE_REACTIONS = 1 << 10
+    GUILD_MESSAGE_TYPING = 1 << 11
+    DIRECT_MESSAGES = 1 << 12
+    DIRECT_MESSAGE_REACTIONS = 1 << 13
+    DIRECT_MESSAGE_TYPING = 1 << 14
+
+    @classmethod
+    def all(cls):
+        value = cls(0)
+        for member in cls:
+            value |= member
+        return value
+
+    @classmethod
+    def default(cls):
+        """Every intent that doesn't need to be enabled in the
+        developer portal"""
+        return cls.all() & ~(cls.GUILD_MEMBERS | cls.GUILD_PRESENCES)
+
+
+class ShardState(enum.Enum):
+    DISCONNECTED = enum.auto()
+    CONNECTING = enum.auto()
+    IDENTIFYING = enum.auto()
+    RESUMING = enum.auto()
+    CONNECTED = enum.auto()
+    RECONNECTING = enum.auto()
+    CLOSED = enum.auto()
+
+
+# Reconnecting after one of these would fail the same way
+FATAL_CLOSE_CODES = frozenset((
+    ShardCloseCode.AUTHENTICATION_FAILED,
+    ShardCloseCode.INVALID_SHARD,
+    ShardCloseCode.SHARDING_REQUIRED,
+    ShardCloseCode.INVALID_API_VERSION,
+    ShardCloseCode.INVALID_INTENTS,
+    ShardCloseCode.DISALLOWED_INTENTS,
+))
+
+# The session can't be resumed after one of these
+SESSION_CLOSE_CODES = frozenset((
+    ShardCloseCode.INVALID_SEQUENCE,
+    ShardCloseCode.SESSION_TIMED_OUT,
+))
+
+ZLIB_SUFFIX = b'\x00\x00\xff\xff'
+
+
 class Shard(BaseWebSocket):
-    def __init__(self, worker, shard_id=None, intents=None):
+    def __init__(self, worker, shard_id=None, intents=None, compress=False,
+                 encoding='json', shard_count=None, client=None):
         super().__init__(loop=worker.loop)
         self.worker = worker
+        self.client = client
         self.id = shard_id
-        self.intents = intents
+        self.count = shard_count
+        if intents is None:
+            intents = ShardIntent.default()
+
+        self.intents = ShardIntent(intents)
+        self.compress = compress
+
+        if encoding not in ('json', 'etf'):
+            raise ValueError(f'Unsupported encoding {encoding!r}')
+
+        self.encoding = encoding
 
         self.v = None
         self.user = None
@@ -59,6 +134,59 @@ class Shard(BaseWebSocket):
         self.sequence = -1
         self._chunk_nonce = -1
 
+        self.state = ShardState.DISCONNECTED
+        self.url = None
+        self.close_code = None
+        self._connect_args = ((), {})
+        self._reconnect_task = None
+
+        self.reconnect_base = 1
+        self.reconnect_cap = 60
+        self.reconnect_attempts = 0
+
+        self.identifies = 0
+        self.resumes = 0
+        self.reconnects = 0
+        self.zombies = 0
+
+        self.paused = False
+        self.pauses = 0
+
+        self._inflator = None
+        self._buffer = bytearray()
+
+        self.compressed_bytes = 0
+        self.decompressed_bytes = 0
+        self.inflate_time = 0
+
+    @property
+    def compression_ratio(self):
+        if not self.compressed_bytes:
+            return None
+        return self.decompressed_bytes / self.compressed_bytes
+
+    def to_dict(self):
+        # What listeners in process executors get instead of the shard
+        return {'id': self.id, 'count': self.count,
+                'session_id': self.session_id}
+
+    def stats(self):
+        return {
+            'compressed_bytes': self.compressed_bytes,
+            'decompressed_bytes': self.decompressed_bytes,
+            'compression_ratio': self.compression_ratio,
+            'inflate_time': self.inflate_time,
+            'state': self.state.name,
+            'identifies': self.identifies,
+            'resumes': self.resumes,
+            'reconnects': self.reconnects,
+            'zombies': self.zombies,
+            'paused': self.paused,
+            'pauses': self.pauses,
+            'latency': self.latency,
+            'average_latency': self.average_latency,
+        }
+
     def _remove_startup_guild(self, guild_id):
         try:
             self.startup_guilds.remove(guild_id)
@@ -69,12 +197,182 @@ class Shard(BaseWebSocket):
             if not self.startup_guilds:
                 self.worker.manager.dispatch('SHARD_READY', self)
 
+    async def connect(self, url, *args, **kwargs):
+        self.url = url
+        self._connect_args = (args, kwargs)
+        self.state = ShardState.CONNECTING
+        self.close_code = None
+
+        if self.compress:
+            # zlib-stream uses one context for the whole connection
+            self._inflator = zlib.decompressobj()
+            self._buffer.clear()
+
+        # wsaio only creates the handshake future once per client
+        self._handshake_complete = self.loop.create_future()
+
+        await super().connect(url, *args, **kwargs)
+
+    def get_session(self):
+        """Returns what a new shard needs to resume this shard's session
+        with `restore_session`
+        """
+        return {
+            'session_id': self.session_id,
+            'sequence': self.sequence,
+            'user_id': self.user.id if self.user is not None else None,
+            'guilds': list(self.available_guilds),
+        }
+
+    def restore_session(self, session):
+        self.session_id = session['session_id']
+        self.sequence = session['sequence']
+        self.available_guilds = set(session['guilds'])
+
+        if session['user_id'] is not None:
+            self._set_user(self.worker.manager.users.get(session['user_id']))
+
+    def _set_user(self, user):
+        # The client user stays cached for as long as a shard holds it
+        users = self.worker.manager.users
+        if user is not None:
+            users.acquire(user)
+        if self.user is not None:
+            users.release(self.user)
+        self.user = user
+
+    def invalidate_session(self):
+        self.session_id = None
+        self.sequence = -1
+
+    def get_reconnect_delay(self, previous):
+        if self.reconnect_attempts == 0:
+            # The first attempt is immediate, most disconnects are
+            # Discord asking for a reconnect
+            return 0
+        # The immediate first attempt leaves nothing to grow from
+        previous = max(previous, self.reconnect_base)
+        return min(self.reconnect_cap,
+                   random.uniform(self.reconnect_base, previous * 3))
+
+    async def reconnect(self, *, resume=True):
+        """Closes the connection and connects again, the session is
+        resumed if possible otherwise the shard identifies again
+        """
+        if not resume:
+            self.invalidate_session()
+
+        self.state = ShardState.RECONNECTING
+        self.worker.stop_heartbeat(self)
+
+        if self.protocol is not None:
+            # Closing with 1000 or 1001 would invalidate the session
+            try:
+                await self.send_close(ShardCloseCode.UNKNOWN_ERROR, b'')
+            except Exception:
+                pass
+            self.protocol.close()
+
+        args, kwargs = self._connect_args
+        delay = self.reconnect_base
+
+        while self.state is ShardState.RECONNECTING:
+            delay = self.get_reconnect_delay(delay)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            self.reconnect_attempts += 1
+            self.reconnects += 1
+
+            try:
+                await asyncio.wait_for(self.connect(self.url, *args, **kwargs),
+                                       self.worker.timeout)
+            except Exception:
+                # wsaio raises its own errors for failed handshakes
+                # alongside OSError and TimeoutError
+                self.state = ShardState.RECONNECTING
+
+    def heartbeat_failed(self):
+        if self.state is not ShardState.CLOSED:
+            self.zombies += 1
+            self._schedule_reconnect()
+
+    def _schedule_reconnect(self):
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = self.loop.create_task(self.reconnect())
+
+    def close(self):
+        """Closes the connection without reconnecting"""
+        self.state = ShardState.CLOSED
+        self.worker.stop_heartbeat(self)
+
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+
+        if self.protocol is not None:
+            self.protocol.close()
+
+    def ws_close_received(self, code, data):
+        self.close_code = code
+
+        if code in FATAL_CLOSE_CODES:
+            self.close()
+            self.worker.manager.dispatch('SHARD_CLOSE', self, code)
+            return
+
+        if code in SESSION_CLOSE_CODES:
+            self.invalidate_session()
+
+        self.worker.stop_heartbeat(self)
+        self._schedule_reconnect()
+
+    def connection_closing(self, exc):
+        if self.state not in (ShardState.RECONNECTING, ShardState.CLOSED):
+            self.worker.stop_heartbeat(self)
+            self._schedule_reconnect()
+
+    async def _apply_backpressure(self):
+        # Stops reading from the socket while a listener or waiter with
+        # the BLOCK policy is full, Discord buffers the events meanwhile.
+        # Pauses longer than the heartbeat interval make the connection
+        # look like a zombie and end in a resume
+        transport = self.protocol.transport
+        if self.paused or transport is None:
+            return
+
+        self.paused = True
+        self.pauses += 1
+        transport.pause_reading()
+
+        try:
+            await self.worker.manager.wait_uncongested()
+        finally:
+            self.paused = False
+            if not transport.is_closing():
+                transport.resume_reading()
+
+    def decode(self, data):
+        if self.encoding == 'etf':
+            return etf.decode(data)
+        return self.worker.manager.json.loads(data)
+
+    async def send_payload(self, payload):
+        if self.encoding == 'etf':
+            await self.send_bytes(etf.encode(payload),
+                                  opcode=WebSocketOpcode.BINARY)
+        else:
+            await self.send_bytes(
+                self.worker.manager.json.dumps_bytes(payload))
+
     async def identify(self):
+        self.state = ShardState.IDENTIFYING
+
         payload = {
             'op': ShardOpcode.IDENTIFY,
             'd': {
                 'token': self.worker.manager.token,
-                # 'intents': self.intents,
+                'intents': int(self.intents),
+                'shard': [self.id or 0, self.count or 1],
                 'properties': {
                     '$os': platform.system(),
                     '$browser': 'snekcord',
@@ -82,26 +380,41 @@ class Shard(BaseWebSocket):
                 }
             }
         }
-        await self.send_str(json.dumps(payload))
+
+        if self.client is None:
+            await self.send_payload(payload)
+        else:
+            await self.client.acquire_identify(self.id or 0)
+            try:
+                await self.send_payload(payload)
+            finally:
+                await self.client.release_identify(self.id or 0)
+
+        self.identifies += 1
 
     async def resume(self):
+        self.state = ShardState.RESUMING
+
         payload = {
             'op': ShardOpcode.RESUME,
             'd': {
-                'token': self.manager.token,
+                'token': self.worker.manager.token,
                 'session_id': self.session_id,
                 'seq': self.sequence
             }
         }
-        await self.send_str(json.dumps(payload))
+        await self.send_payload(payload)
+
+        self.resumes += 1
 
     async def send_heartbeat(self):
         payload = {
             'op': ShardOpcode.HEARTBEAT,
             'd': None
         }
-        await self.send_str(json.dumps(payload))
         self.heartbeat_last_sent = time.perf_counter()
+        self.heartbeat_acked = False
+        await self.send_payload(payload)
 
     async def request_guild_members(self, guild, presences=None, limit=None,
                                     users=None, query=None):
@@ -133,11 +446,31 @@ class Shard(BaseWebSocket):
 
         payload['nonce'] = str(self._chunk_nonce)
 
-        await self.send_str(json.dumps(payload))
+        await self.send_payload(payload)
+
+    def ws_binary_received(self, data):
+        if self._inflator is None:
+            return self.ws_text_received(data)
+
+        self._buffer.extend(data)
+
+        if self._buffer[-4:] != ZLIB_SUFFIX:
+            return None
+
+        start = time.perf_counter()
+        data = self._inflator.decompress(self._buffer)
+        self.inflate_time += time.perf_counter() - start
+
+        self.compressed_bytes += len(self._buffer)
+        self.decompressed_bytes += len(data)
+
+        self._buffer.clear()
+
+        return self.ws_text_received(data)
 
     @taskify
     async def ws_text_received(self, data):
-        response = WebSocketResponse.unmarshal(data)
+        response = WebSocketResponse.unmarshal(self.decode(data))
 
         try:
             opcode = ShardOpcode(response.opcode)
@@ -151,11 +484,14 @@ class Shard(BaseWebSocket):
         if opcode is ShardOpcode.DISPATCH:
             if response.name == 'READY':
                 self.v = response.data['v']
-                self.user = self.worker.manager.users.upsert(
-                    response.data['user'])
+                self._set_user(self.worker.manager.users.upsert(
+                    response.data['user']))
                 self.session_id = response.data['session_id']
                 self.info = response.data.get('shard')
 
+                self.state = ShardState.CONNECTED
+                self.reconnect_attempts = 0
+
                 for guild in response.data['guilds']:
                     guild_id = guild['id']
                     self.startup_guilds.add(guild_id)
@@ -163,12 +499,23 @@ class Shard(BaseWebSocket):
 
                 self.ready.set()
 
+            elif response.name == 'RESUMED':
+                self.state = ShardState.CONNECTED
+                self.reconnect_attempts = 0
+
+                # Shards that resume a restored session never see READY
+                self.ready.set()
+
+                self.worker.manager.dispatch(
+                    'SHARD_RESUME', self, response.data)
+
             elif response.name == 'GUILD_DELETE':
                 guild_id = response.data['id']
 
                 self._remove_startup_guild(guild_id)
 
-                if data['unavailable']:
+                # Guilds the client was removed from have no unavailable
+                if response.data.get('unavailable'):
                     try:
                         self.available_guilds.remove(guild_id)
                     except KeyError:
@@ -195,6 +542,9 @@ class Shard(BaseWebSocket):
             elif response.name == 'GUILD_CREATE':
                 guild_id = response.data['id']
 
+                if self.client is not None:
+                    self.client.planner.strip_guild(response.data)
+
                 self._remove_startup_guild(guild_id)
 
                 if guild_id in self.available_guilds:
@@ -212,24 +562,41 @@ class Shard(BaseWebSocket):
                         self.worker.manager.dispatch(
                             'GUILD_JOIN', self, response.data)
 
-            else:
+            elif (self.client is None
+                  or self.client.planner.wants(response.name)):
                 self.worker.manager.dispatch(
                     response.name, self, response.data)
 
+            if self.worker.manager.congested:
+                await self._apply_backpressure()
+
         elif opcode is ShardOpcode.HEARTBEAT:
             await self.send_heartbeat()
 
         elif opcode is ShardOpcode.RECONNECT:
-            return
+            self._schedule_reconnect()
 
         elif opcode is ShardOpcode.INVALID_SESSION:
-            return
+            if not response.data:
+                self.invalidate_session()
+
+            # Discord asks for a random 1-5 second wait before retrying
+            await asyncio.sleep(random.uniform(1, 5))
+
+            if self.session_id is not None:
+                await self.resume()
+            else:
+                await self.identify()
 
         elif opcode is ShardOpcode.HELLO:
             self.heartbeat_interval = (
                 response.data['heartbeat_interval'] / 1000)
-            self.worker.notifier.register(self, self.heartbeat_interval)
-            await self.identify()
+            self.worker.start_heartbeat(self, self.heartbeat_interval)
+
+            if self.session_id is not None:
+                await self.resume()
+            else:
+                await self.identify()
 
         elif opcode is ShardOpcode.HEARTBEAT_ACK:
             self.worker.ack(self)
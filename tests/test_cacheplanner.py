@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+
+from snekcord.clients.clusterclient import ClusterClient
+from snekcord.clients.websocketclient import WebSocketClient
+from snekcord.utils import EventDispatcher
+from snekcord.ws.shardws import ShardIntent
+
+MESSAGE = {'id': '10', 'channel_id': '1', 'content': 'content',
+           'author': {'id': '2', 'username': 'user'}}
+
+TYPING = {'channel_id': '1', 'user_id': '2', 'timestamp': 0}
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+@pytest.fixture(params=['websocket', 'cluster'])
+def client(request, loop):
+    if request.param == 'websocket':
+        return WebSocketClient('token', loop=loop, intents=ShardIntent.GUILDS)
+
+    return ClusterClient('token', loop=loop, intents=ShardIntent.GUILDS,
+                         worker_id=0, path='cluster.sock',
+                         forwarded=('guild_ban_add',))
+
+
+def dispatched(client, name, data):
+    events = []
+    manager = client.manager
+    dispatch = manager.dispatch
+
+    def record(event_name, *args):
+        events.append(event_name)
+        return dispatch(event_name, *args)
+
+    manager.dispatch = record
+    try:
+        shard = client._create_shard(client.sharder, shard_id=0,
+                                     shard_count=1)
+        frame = json.dumps({'op': 0, 's': 1, 't': name, 'd': data})
+        manager.loop.run_until_complete(shard.ws_text_received(frame))
+    finally:
+        del manager.dispatch
+
+    return events
+
+
+@pytest.mark.parametrize('name, data', [('MESSAGE_CREATE', MESSAGE),
+                                        ('TYPING_START', TYPING)])
+def test_excluded_events_are_dropped(client, name, data):
+    assert not client.planner.wants(name)
+    assert dispatched(client, name, data) == []
+
+
+def test_listeners_keep_events(client):
+    client.manager.on('typing_start')(lambda *args: None)
+
+    assert client.planner.wants('TYPING_START')
+    assert dispatched(client, 'TYPING_START', TYPING) == ['TYPING_START']
+
+
+def test_forwarded_events_are_kept(loop):
+    client = ClusterClient('token', loop=loop, intents=ShardIntent.GUILDS,
+                           worker_id=0, path='cluster.sock',
+                           forwarded=('guild_ban_add',))
+
+    assert client.planner.wants('GUILD_BAN_ADD')
+    assert not client.manager.has_listeners('message_create')
+
+    # Listeners for events from other workers don't count
+    client.cluster.on('message_create')(lambda *args: None)
+    assert not client.manager.has_listeners('message_create')
+
+
+def test_subscribers_only_receive_their_events(loop):
+    publisher = EventDispatcher(loop=loop)
+    subscriber = EventDispatcher(loop=loop)
+    subscriber.subscribe(publisher)
+
+    assert not publisher.has_listeners('event')
+
+    received = []
+
+    def listener(value):
+        received.append(value)
+
+    subscriber.register_listener('event', listener)
+    assert publisher.has_listeners('event')
+
+    publisher.dispatch('event', 1)
+    assert received == [1]
+
+    subscriber.remove_listener('event', listener)
+    assert not publisher.has_listeners('event')
+
+    subscriber.unsubscribe(publisher)
+    assert not publisher._subscribers
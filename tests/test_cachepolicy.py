@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from snekcord.manager import Manager
+from snekcord.states.basestate import CacheMapping, CachePolicy
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def manager():
+    loop = asyncio.new_event_loop()
+    yield Manager('token', loop=loop)
+    loop.close()
+
+
+def test_lru_evicts_least_recently_used():
+    evicted = []
+    mapping = CacheMapping(CachePolicy(max_size=3),
+                           lambda key, value: evicted.append(key))
+
+    for key in 'abc':
+        mapping[key] = key
+
+    mapping['a']
+    mapping['d'] = 'd'
+    assert evicted == ['b']
+    assert list(mapping) == ['c', 'a', 'd']
+
+    mapping['c'] = 'c'
+    mapping['e'] = 'e'
+    assert evicted == ['b', 'a']
+    assert list(mapping) == ['d', 'c', 'e']
+    assert mapping.evictions == 2
+
+
+def test_ttl_expires_in_insertion_order():
+    clock = Clock()
+    evicted = []
+    mapping = CacheMapping(CachePolicy(ttl=10),
+                           lambda key, value: evicted.append(key), clock)
+
+    mapping['a'] = 1
+    clock.now = 5
+    mapping['b'] = 2
+    clock.now = 9
+    mapping['a'] = 3
+
+    clock.now = 16
+    assert list(mapping) == ['a']
+    assert evicted == ['b']
+
+    clock.now = 19
+    assert 'a' not in mapping
+    assert mapping.get('a') is None
+    assert evicted == ['b', 'a']
+    assert not mapping.expiry
+
+
+def test_disabled_policy_evicts_immediately():
+    evicted = []
+    mapping = CacheMapping(CachePolicy.never(),
+                           lambda key, value: evicted.append(key))
+
+    mapping['a'] = 1
+    assert len(mapping) == 0
+    assert evicted == ['a']
+
+
+def test_eviction_recycles_and_releases_users(manager):
+    manager.set_cache_policy('MessageState', CachePolicy(max_size=2))
+    channel = manager.channels.upsert({'id': '1', 'type': 0})
+
+    messages = [channel.messages.upsert({
+        'id': str(message_id), 'channel_id': '1', 'content': 'content',
+        'author': {'id': str(message_id + 10), 'username': 'author'}})
+        for message_id in range(2, 5)]
+
+    first = messages[0]
+    assert not first.cached
+    assert list(channel.messages.keys()) == [3, 4]
+    assert channel.messages.get(2) is first
+    assert channel.messages.evictions == 1
+
+    assert first.author.id not in manager.users.references
+    assert not first.author.cached
+    assert all(manager.users.references[message.author.id] == 1
+               for message in messages[1:])
+
+
+def test_policies_apply_to_live_states(manager):
+    users = [manager.users.upsert({'id': str(user_id), 'username': 'u'})
+             for user_id in range(1, 5)]
+    for user in users:
+        user.cache()
+
+    manager.set_cache_policy('UserState', CachePolicy(max_size=2))
+
+    assert isinstance(manager.users.mapping, CacheMapping)
+    assert list(manager.users.keys()) == [3, 4]
+    assert not users[0].cached
+    assert manager.users.get(1) is users[0]
+
+    manager.set_cache_policy('UserState', CachePolicy())
+    assert not isinstance(manager.users.mapping, CacheMapping)
+    assert list(manager.users.keys()) == [3, 4]
+
+
+def test_policies_apply_to_substates(manager):
+    channel = manager.channels.upsert({'id': '1', 'type': 0})
+    for message_id in range(2, 6):
+        channel.messages.upsert({
+            'id': str(message_id), 'channel_id': '1', 'content': 'c',
+            'author': {'id': '10', 'username': 'author'}})
+
+    manager.set_cache_policy('MessageState', CachePolicy(max_size=1))
+
+    assert list(channel.messages.keys()) == [5]
+    assert manager.users.references == {10: 1}
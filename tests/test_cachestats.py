@@ -0,0 +1,120 @@
+import asyncio
+import gc
+
+import pytest
+
+from snekcord import manager as manager_module
+from snekcord.manager import Manager
+from snekcord.states.basestate import CachePolicy
+
+STAT_KEYS = {'instances', 'entries', 'recycled', 'recycle_hits',
+             'recycle_expired', 'hits', 'misses', 'evictions',
+             'bytes_per_object', 'estimated_bytes'}
+
+
+@pytest.fixture
+def manager():
+    loop = asyncio.new_event_loop()
+    yield Manager('token', loop=loop)
+    loop.close()
+
+
+def guild_payload(guild_id, members=3):
+    return {
+        'id': str(guild_id), 'name': 'guild',
+        'channels': [{'id': str(guild_id + 1), 'type': 0, 'name': 'c'}],
+        'roles': [{'id': str(guild_id), 'name': '@everyone'}],
+        'emojis': [],
+        'members': [{'user': {'id': str(guild_id * 100 + index),
+                              'username': 'user'},
+                     'roles': [], 'joined_at': None}
+                    for index in range(members)],
+    }
+
+
+def walked_entries(manager, name):
+    return sum(len(state) for state in manager.iter_states()
+               if state.__class__.__name__ == name)
+
+
+def test_structure(manager):
+    manager.guilds.upsert(guild_payload(1000))
+
+    stats = manager.cache_stats()
+
+    assert set(stats) == {'states', 'estimated_bytes'}
+    for name in ('GuildState', 'GuildMemberState', 'RoleState',
+                 'UserState', 'ChannelState'):
+        assert set(stats['states'][name]) == STAT_KEYS
+
+    assert stats['states']['GuildMemberState']['entries'] == 3
+    assert stats['states']['UserState']['entries'] == 3
+    assert stats['states']['GuildState']['instances'] == 1
+    assert stats['estimated_bytes'] == sum(
+        state['estimated_bytes'] for state in stats['states'].values())
+
+
+def test_counters_match_the_cache(manager):
+    manager.set_cache_policy('MessageState', CachePolicy(max_size=2))
+
+    for guild_id in range(1000, 6000, 1000):
+        manager.guilds.upsert(guild_payload(guild_id))
+
+    channel = manager.channels.get(1001)
+    for message_id in range(10, 15):
+        channel.messages.upsert({
+            'id': str(message_id), 'channel_id': '1001', 'content': 'c',
+            'author': {'id': '100000', 'username': 'author'}})
+
+    guild = manager.guilds.get(2000)
+    guild.members.get(200000).uncache()
+    manager.guilds.get(3000).members.clear()
+
+    stats = manager.cache_stats()['states']
+    for name in ('GuildState', 'GuildMemberState', 'RoleState',
+                 'UserState', 'ChannelState', 'MessageState',
+                 'GuildChannelState'):
+        assert stats[name]['entries'] == walked_entries(manager, name), name
+
+    assert stats['MessageState']['evictions'] == 3
+    assert stats['MessageState']['recycled'] == 3
+    assert stats['GuildMemberState']['recycled'] == 1
+
+
+def test_collected_states_are_discounted(manager):
+    channel = manager.channels.upsert({'id': '1', 'type': 0})
+    for message_id in range(10, 15):
+        channel.messages.upsert({
+            'id': str(message_id), 'channel_id': '1', 'content': 'c',
+            'author': {'id': '100', 'username': 'author'}})
+    channel.messages.get(10).uncache()
+
+    stats = manager.cache_stats()['states']['MessageState']
+    assert (stats['instances'], stats['entries'], stats['recycled']) == (
+        1, 4, 1)
+
+    del channel
+    manager.channels.pop(1)
+    gc.collect()
+
+    stats = manager.cache_stats()['states']['MessageState']
+    assert (stats['instances'], stats['entries'], stats['recycled']) == (
+        0, 0, 0)
+
+
+def test_only_samples_objects(manager, monkeypatch):
+    manager.guilds.upsert(guild_payload(1000, members=200))
+
+    calls = []
+
+    def sizeof(obj):
+        calls.append(obj)
+        return 100
+
+    monkeypatch.setattr(manager_module, '_sizeof', sizeof)
+    monkeypatch.setattr(manager, 'iter_states', None)
+
+    stats = manager.cache_stats(sample_size=4)['states']
+    assert stats['GuildMemberState']['entries'] == 200
+    assert stats['GuildMemberState']['estimated_bytes'] == 200 * 100
+    assert len(calls) <= 4 * len(stats)
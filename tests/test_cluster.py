@@ -0,0 +1,233 @@
+import asyncio
+import os
+
+import pytest
+
+from snekcord.clients.clusterclient import ClusterClient, ClusterSupervisor
+
+_sleep = asyncio.sleep
+
+
+class Shard:
+    def __init__(self, shard_id):
+        self.id = shard_id
+
+
+class Process:
+    def __init__(self):
+        self.alive = True
+        self.terminated = False
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.terminated = True
+        self.alive = False
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay, *args):
+        sleeps.append(delay)
+        await _sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', fake_sleep)
+    return sleeps
+
+
+@pytest.fixture
+def supervisor(loop, tmp_path):
+    supervisor = ClusterSupervisor('token', workers=2, shard_count=4,
+                                   path=str(tmp_path / 'cluster.sock'),
+                                   loop=loop)
+    supervisor.server = loop.run_until_complete(asyncio.start_unix_server(
+        supervisor._handle_connection, supervisor.path))
+    yield supervisor
+    supervisor.close()
+    loop.run_until_complete(settle())
+
+
+async def settle():
+    for _ in range(20):
+        await _sleep(0)
+
+
+def connect(loop, supervisor, worker_id, forwarded=('custom_event',)):
+    client = ClusterClient('token', loop=loop, worker_id=worker_id,
+                           path=supervisor.path, forwarded=forwarded)
+    loop.run_until_complete(client.cluster.connect())
+    loop.run_until_complete(settle())
+    return client.cluster
+
+
+def test_shard_ids():
+    supervisor = ClusterSupervisor('token', workers=3, shard_count=8,
+                                   loop=Clock())
+
+    assert [supervisor.get_shard_ids(worker_id) for worker_id in range(3)] \
+        == [[0, 1, 2], [3, 4, 5], [6, 7]]
+
+
+def test_forwarded_events(loop, supervisor):
+    first = connect(loop, supervisor, 0)
+    second = connect(loop, supervisor, 1)
+    received = []
+
+    second.on('custom_event')(lambda *args: received.append(args))
+    first.on('custom_event')(lambda *args: received.append(('self',) + args))
+
+    first.manager.dispatch('CUSTOM_EVENT', Shard(3), {'value': 1})
+    first.manager.dispatch('OTHER_EVENT', Shard(3), {'value': 2})
+    loop.run_until_complete(settle())
+
+    assert received == [(0, 3, {'value': 1})]
+
+
+def test_requests(loop, supervisor):
+    first = connect(loop, supervisor, 0)
+    second = connect(loop, supervisor, 1)
+
+    second.manager.guilds.upsert({'id': '5', 'name': 'guild'})
+
+    assert loop.run_until_complete(first.find_guild(5)) == 1
+    assert loop.run_until_complete(second.find_guild(5)) == 1
+    assert loop.run_until_complete(first.find_guild(6)) is None
+
+    second.register_handler('add', lambda a, b: a + b)
+    assert loop.run_until_complete(first.request('add', 1, 2)) == {1: 3}
+
+
+def test_requests_without_other_workers(loop, supervisor):
+    bus = connect(loop, supervisor, 0)
+
+    assert loop.run_until_complete(bus.request('find_guild', 1)) == {}
+
+
+def test_identify_grants(loop, supervisor, sleeps):
+    first = connect(loop, supervisor, 0)
+    second = connect(loop, supervisor, 1)
+
+    loop.run_until_complete(first.acquire_identify(0))
+
+    waiting = loop.create_task(second.acquire_identify(0))
+    other_bucket = loop.create_task(second.acquire_identify(1))
+    loop.run_until_complete(settle())
+    assert not waiting.done()
+    assert other_bucket.done()
+
+    loop.run_until_complete(first.release_identify(0))
+    loop.run_until_complete(asyncio.wait_for(waiting, 1))
+
+    # Identifies in the same bucket are spaced 5 seconds apart
+    assert len(sleeps) == 1 and 0 < sleeps[0] <= 5
+
+
+def test_disconnect_releases_identify(loop, supervisor, sleeps):
+    first = connect(loop, supervisor, 0)
+    second = connect(loop, supervisor, 1)
+
+    loop.run_until_complete(first.acquire_identify(0))
+    waiting = loop.create_task(second.acquire_identify(0))
+    loop.run_until_complete(settle())
+
+    first.writer.close()
+    loop.run_until_complete(asyncio.wait_for(waiting, 1))
+    assert 0 not in supervisor.writers
+
+
+def test_close(loop, supervisor):
+    bus = connect(loop, supervisor, 0)
+    connect(loop, supervisor, 1).register_handler(
+        'slow', lambda: asyncio.sleep(60))
+
+    supervisor.processes = {0: Process(), 1: Process()}
+    request = loop.create_task(bus.request('slow'))
+    loop.run_until_complete(settle())
+
+    supervisor.close()
+    assert not os.path.exists(supervisor.path)
+    assert all(process.terminated
+               for process in supervisor.processes.values())
+
+    with pytest.raises(ConnectionError):
+        loop.run_until_complete(asyncio.wait_for(request, 1))
+
+
+def test_respawn_backoff(monkeypatch):
+    clock = Clock()
+    supervisor = ClusterSupervisor('token', workers=1, shard_count=1,
+                                   loop=clock)
+    supervisor.shard_ids[0] = [0]
+
+    spawned = []
+
+    def spawn(worker_id):
+        spawned.append(clock.now)
+        supervisor.processes[worker_id] = Process()
+        supervisor._spawned_at[worker_id] = clock.now
+
+    monkeypatch.setattr(supervisor, 'spawn', spawn)
+    spawn(0)
+
+    delays = []
+    for _ in range(6):
+        supervisor.processes[0].alive = False
+        supervisor._check_workers()
+        respawn_at = supervisor._respawn_at[0]
+        delays.append(respawn_at - clock.now)
+
+        clock.now = respawn_at - 0.01
+        supervisor._check_workers()
+        assert spawned[-1] != clock.now
+
+        clock.now = respawn_at
+        supervisor._check_workers()
+        assert spawned[-1] == clock.now
+
+    assert delays[0] == supervisor.respawn_base
+    for previous, delay in zip(delays, delays[1:]):
+        assert supervisor.respawn_base <= delay <= min(
+            supervisor.respawn_cap, previous * 3) + 1e-9
+
+    # Workers that stayed up long enough start over
+    clock.now += supervisor.respawn_cap + 1
+    supervisor.processes[0].alive = False
+    supervisor._check_workers()
+    assert supervisor._respawn_at[0] - clock.now == pytest.approx(
+        supervisor.respawn_base)
+
+
+def test_no_respawn_while_closing():
+    supervisor = ClusterSupervisor('token', workers=1, shard_count=1,
+                                   loop=Clock())
+    supervisor.processes[0] = Process()
+    supervisor.close()
+
+    supervisor._check_workers()
+    assert supervisor._respawn_at == {}
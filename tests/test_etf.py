@@ -0,0 +1,133 @@
+import asyncio
+import json
+
+import pytest
+
+from snekcord.clients.websocketclient import WebSocketClient
+from snekcord.utils import marshal_event
+from snekcord.ws import etf
+from snekcord.ws.basews import WebSocketResponse
+
+# The reference encoder comes from the erlang_py package
+erlang = pytest.importorskip('erlang')
+erlang.set_undefined(b'nil')
+
+USER = {'id': '150325840957554688', 'username': 'snek',
+        'discriminator': '0001', 'avatar': None, 'bot': False,
+        'public_flags': 64}
+
+GUILD = {
+    'id': '822953326104739850', 'name': 'snekcord ☃', 'icon': None,
+    'owner_id': USER['id'], 'verification_level': 1, 'features': [],
+    'afk_timeout': 300, 'system_channel_id': '822953326104739853',
+    'channels': [
+        {'id': '822953326104739853', 'type': 0, 'name': 'general',
+         'position': 0, 'parent_id': '822953326104739851', 'nsfw': False,
+         'permission_overwrites': [], 'rate_limit_per_user': 0,
+         'topic': 'Talk \U0001f40d'},
+        {'id': '822953326104739851', 'type': 4, 'name': 'Text',
+         'position': 0, 'permission_overwrites': []},
+    ],
+    'roles': [
+        {'id': '822953326104739850', 'name': '@everyone', 'color': 0,
+         'permissions': '104324673', 'position': 0, 'hoist': False,
+         'managed': False, 'mentionable': False},
+        {'id': '822953326104739860', 'name': 'mod', 'color': 16711680,
+         'permissions': '8', 'position': 1, 'hoist': True,
+         'managed': False, 'mentionable': True},
+    ],
+    'emojis': [
+        {'id': '822953326104739870', 'name': 'snek', 'roles': [],
+         'require_colons': True, 'animated': False, 'available': True,
+         'user': USER},
+    ],
+    'members': [
+        {'user': USER, 'roles': ['822953326104739860'], 'nick': None,
+         'joined_at': '2021-03-20T00:00:00.000000+00:00', 'deaf': False,
+         'mute': False},
+    ],
+}
+
+MESSAGE = {
+    'id': '822953326104739900', 'channel_id': '822953326104739853',
+    'guild_id': GUILD['id'], 'author': USER, 'content': 'hello é',
+    'timestamp': '2021-03-20T00:00:01.000000+00:00',
+    'edited_timestamp': None,
+    'tts': False, 'mention_everyone': False, 'mentions': [USER],
+    'mention_roles': [], 'attachments': [], 'pinned': False, 'type': 0,
+    'embeds': [{'title': 'embed', 'color': 3447003,
+                'fields': [{'name': 'a', 'value': 'b', 'inline': True}]}],
+    'nonce': '822953326104739899',
+}
+
+EVENTS = [
+    ('GUILD_RECEIVE', GUILD),
+    ('GUILD_ROLE_UPDATE', dict(GUILD['roles'][1], guild_id=GUILD['id'],
+                               name='moderator')),
+    ('GUILD_MEMBER_UPDATE', {'guild_id': GUILD['id'], 'user': USER,
+                             'roles': [], 'nick': 'snake',
+                             'joined_at': GUILD['members'][0]['joined_at']}),
+    ('CHANNEL_UPDATE', dict(GUILD['channels'][0], guild_id=GUILD['id'],
+                            name='general-2')),
+    ('MESSAGE_CREATE', MESSAGE),
+    ('MESSAGE_UPDATE', dict(MESSAGE, content='edited',
+                            edited_timestamp=MESSAGE['timestamp'])),
+    ('MESSAGE_DELETE', {'id': MESSAGE['id'],
+                        'channel_id': MESSAGE['channel_id'],
+                        'guild_id': GUILD['id']}),
+]
+
+
+def _is_snowflake(value):
+    return value.isdigit() and len(value) >= 15
+
+
+def to_erlang(value):
+    # Discord sends map keys as atoms, strings as binaries and
+    # snowflakes as 64 bit integers
+    if isinstance(value, dict):
+        return {erlang.OtpErlangAtom(key.encode()): to_erlang(item)
+                for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_erlang(item) for item in value]
+    if isinstance(value, str):
+        if _is_snowflake(value):
+            return int(value)
+        return erlang.OtpErlangBinary(value.encode())
+    return value
+
+
+def frames(encoding):
+    for sequence, (name, data) in enumerate(EVENTS, 1):
+        frame = {'op': 0, 's': sequence, 't': name, 'd': data}
+        if encoding == 'json':
+            yield json.dumps(frame).encode()
+        else:
+            yield erlang.term_to_binary(to_erlang(frame))
+
+
+def run(encoding):
+    loop = asyncio.new_event_loop()
+    client = WebSocketClient('token', loop=loop, encoding=encoding)
+    decode = etf.decode if encoding == 'etf' else client.manager.json.loads
+
+    results = []
+    for data in frames(encoding):
+        response = WebSocketResponse.unmarshal(decode(data))
+        handler = client.manager.__events__[response.name.lower()]
+        event = handler(None, response.data)
+        results.append((response.name, response.data, marshal_event(event)))
+
+    loop.close()
+    return results
+
+
+def test_frames_decode_identically():
+    for json_frame, etf_frame in zip(frames('json'), frames('etf')):
+        assert etf.decode(etf_frame) == json.loads(json_frame)
+
+
+@pytest.mark.parametrize('index', range(len(EVENTS)),
+                         ids=[name for name, _ in EVENTS])
+def test_events_are_identical(index):
+    assert run('etf')[index] == run('json')[index]
@@ -0,0 +1,138 @@
+import asyncio
+
+import pytest
+
+from snekcord.utils import EventDispatcher, QueueOverflow
+
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.parametrize('overflow', list(QueueOverflow))
+@pytest.mark.parametrize('max_queued', [None, 2])
+def test_listener_overflow(overflow, max_queued):
+    async def main():
+        dispatcher = EventDispatcher()
+        gate = asyncio.Event()
+        seen = []
+
+        async def listener(value):
+            await gate.wait()
+            seen.append(value)
+
+        dispatcher.register_listener(
+            'event', listener, concurrency=1, max_queued=max_queued,
+            overflow=overflow)
+
+        for value in range(5):
+            dispatcher.dispatch('event', value)
+
+        stats = dispatcher.queue_stats()['events']['event']
+        assert stats['running'] == 1
+
+        if max_queued is None:
+            assert stats['queued'] == 4
+            assert stats['dropped'] == 0
+            assert not dispatcher.congested
+        elif overflow is QueueOverflow.BLOCK:
+            assert stats['queued'] == 4
+            assert dispatcher.congested
+        else:
+            assert stats['queued'] == 2
+            assert stats['dropped'] == 2
+
+        gate.set()
+        await settle()
+        await asyncio.wait_for(dispatcher.wait_uncongested(), 1)
+
+        if max_queued is None or overflow is QueueOverflow.BLOCK:
+            assert seen == [0, 1, 2, 3, 4]
+        elif overflow is QueueOverflow.DROP_OLDEST:
+            assert seen == [0, 3, 4]
+        else:
+            assert seen == [0, 1, 2]
+
+        assert not dispatcher.congested
+
+    run(main())
+
+
+@pytest.mark.parametrize('overflow', list(QueueOverflow))
+@pytest.mark.parametrize('max_queued', [None, 2])
+def test_waiter_overflow(overflow, max_queued):
+    async def main():
+        dispatcher = EventDispatcher()
+        waiter = dispatcher.wait('event', max_queued=max_queued,
+                                 overflow=overflow)
+
+        for value in range(4):
+            dispatcher.dispatch('event', value)
+
+        if max_queued is None:
+            expected = [0, 1, 2, 3]
+        elif overflow is QueueOverflow.BLOCK:
+            expected = [0, 1, 2, 3]
+            assert dispatcher.congested
+        elif overflow is QueueOverflow.DROP_OLDEST:
+            expected = [2, 3]
+            assert waiter.dropped == 2
+        else:
+            expected = [0, 1]
+            assert waiter.dropped == 2
+
+        assert [await waiter._get() for _ in expected] == expected
+        assert not dispatcher.congested
+
+        waiter.close()
+
+    run(main())
+
+
+@pytest.mark.parametrize('overflow', list(QueueOverflow))
+@pytest.mark.parametrize('max_queued', [None, 2])
+def test_ordered_overflow(overflow, max_queued):
+    class Dispatcher(EventDispatcher):
+        __workers__ = 1
+        __listener_max_queued__ = max_queued
+        __overflow__ = overflow
+
+    async def main():
+        dispatcher = Dispatcher()
+        gate = asyncio.Event()
+        seen = []
+
+        async def listener(value):
+            await gate.wait()
+            seen.append(value)
+
+        dispatcher.register_listener('event', listener, ordered=True,
+                                     key=lambda value: 0)
+
+        dispatcher.dispatch('event', 0)
+        await settle()
+
+        for value in range(1, 5):
+            dispatcher.dispatch('event', value)
+
+        gate.set()
+        await settle()
+
+        if max_queued is None or overflow is QueueOverflow.BLOCK:
+            assert seen == [0, 1, 2, 3, 4]
+        elif overflow is QueueOverflow.DROP_OLDEST:
+            assert seen == [0, 3, 4]
+        else:
+            assert seen == [0, 1, 2]
+
+        assert not dispatcher.congested
+        assert not dispatcher.pool.workers[0].task.done()
+
+        dispatcher.pool.close()
+
+    run(main())
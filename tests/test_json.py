@@ -0,0 +1,120 @@
+import itertools
+
+import pytest
+
+from snekcord.utils import JsonArray, JsonField, JsonObject, JsonTemplate
+
+_unset = object()
+
+
+def interpreted_update(template, obj, data, *, set_defaults=False):
+    # The generic update that JsonTemplate.compile specializes
+    for name, field in template.fields.items():
+        try:
+            value = field.unmarshal(data[field.key])
+            setattr(obj, name, value)
+        except Exception:
+            if set_defaults:
+                setattr(obj, name, field.default())
+
+
+class CountingField(JsonField):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counter = itertools.count()
+
+    def default(self):
+        return f'default {next(self.counter)}'
+
+
+class UpperField(JsonField):
+    def unmarshal(self, value):
+        return value.upper()
+
+
+PointTemplate = JsonTemplate(
+    x=JsonField('x', int),
+    y=JsonField('y', int, default=0),
+)
+
+
+class Point(JsonObject, template=PointTemplate):
+    pass
+
+
+Template = JsonTemplate(
+    plain=JsonField('plain'),
+    converted=JsonField('converted', int),
+    constant=JsonField('constant', int, default=5),
+    factory=JsonField('factory', default=dict),
+    array=JsonArray('array'),
+    converted_array=JsonArray('converted_array', int),
+    point=JsonField('point', object=Point),
+    points=JsonArray('points', object=Point),
+    counting=CountingField('counting', int),
+    upper=UpperField('upper', default='none'),
+)
+
+PAYLOADS = [
+    {},
+    {'plain': 'a', 'converted': '1', 'constant': '2', 'factory': {'a': 1},
+     'array': ('a', 'b'), 'converted_array': ['1', '2'],
+     'point': {'x': '1', 'y': '2'}, 'points': [{'x': '3'}],
+     'counting': '4', 'upper': 'abc'},
+    {'plain': None, 'converted': 'x', 'constant': None, 'factory': None,
+     'array': None, 'converted_array': ['x'], 'point': 'x',
+     'points': [None, 1], 'counting': 'x', 'upper': None},
+]
+
+
+def state(obj):
+    values = {}
+    for name in Template.fields:
+        value = getattr(obj, name, _unset)
+        if isinstance(value, Point):
+            value = ('point', value.to_dict())
+        elif isinstance(value, list):
+            value = [('point', item.to_dict()) if isinstance(item, Point)
+                     else item for item in value]
+        values[name] = value
+    return values
+
+
+class Object:
+    pass
+
+
+@pytest.mark.parametrize('data', PAYLOADS)
+@pytest.mark.parametrize('set_defaults', [False, True])
+def test_compiled_matches_interpreted(data, set_defaults):
+    Template.fields['counting'].counter = itertools.count()
+
+    compiled = Object()
+    Template.update(compiled, data, set_defaults=set_defaults)
+
+    Template.fields['counting'].counter = itertools.count()
+
+    interpreted = Object()
+    interpreted_update(Template, interpreted, data,
+                       set_defaults=set_defaults)
+
+    assert state(compiled) == state(interpreted)
+
+
+def test_overridden_default_is_called():
+    obj = Object()
+    Template.update(obj, {}, set_defaults=True)
+    Template.update(obj, {'converted': '1'}, set_defaults=True)
+
+    assert obj.counting.startswith('default ')
+    assert obj.upper == 'none'
+
+
+def test_updates_keep_unrelated_fields():
+    obj = Object()
+    Template.update(obj, PAYLOADS[1], set_defaults=True)
+    Template.update(obj, {'plain': 'b'})
+
+    assert obj.plain == 'b'
+    assert obj.converted == 1
+    assert obj.upper == 'ABC'
@@ -0,0 +1,71 @@
+import asyncio
+import pickle
+from datetime import datetime
+
+import pytest
+
+from snekcord.clients import websocketclient
+from snekcord.manager import Manager
+from snekcord.utils import marshal_event
+from snekcord.ws.shardws import Shard
+
+EVENTS = [value for value in vars(websocketclient).values()
+          if isinstance(value, type) and issubclass(value, tuple)
+          and value.__name__.endswith('Event')]
+
+
+@pytest.fixture(scope='module')
+def fields():
+    loop = asyncio.new_event_loop()
+    manager = Manager('token', loop=loop)
+
+    guild = manager.guilds.upsert({
+        'id': '1', 'name': 'guild',
+        'channels': [{'id': '2', 'type': 0, 'name': 'channel'}],
+        'roles': [{'id': '3', 'name': 'role'}],
+        'emojis': [{'id': '4', 'name': 'emoji'}],
+        'members': [{'user': {'id': '5', 'username': 'user'},
+                     'roles': ['3'], 'joined_at': None}],
+    })
+
+    channel = manager.channels.get('2')
+    user = manager.users.get('5')
+    messages = [channel.messages.upsert({
+        'id': str(message_id), 'channel_id': '2', 'content': 'content',
+        'author': {'id': '5', 'username': 'user'}})
+        for message_id in (6, 7)]
+
+    bans = manager.get_class('GuildBanState')(manager=manager, guild=guild)
+
+    worker = type('Worker', (), {'loop': loop, 'manager': manager})()
+
+    yield {
+        'shard': Shard(worker, shard_id=0, shard_count=1),
+        'payload': {'id': '1'},
+        'channel': channel,
+        'guild': guild,
+        'ban': bans.upsert({'user': {'id': '5', 'username': 'user'}}),
+        'member': guild.members.get('5'),
+        'user': user,
+        'role': guild.roles.get('3'),
+        'invite': manager.invites.upsert({'code': 'code'}),
+        'message': messages[0],
+        'messages': messages,
+        'reactions': None,
+        'timestamp': datetime.now(),
+        'stage': manager.stages.upsert({'id': '8', 'guild_id': '1',
+                                        'channel_id': '2', 'topic': 'topic'}),
+    }
+
+    loop.close()
+
+
+@pytest.mark.parametrize('event', EVENTS, ids=lambda event: event.__name__)
+def test_marshalled_events_pickle(event, fields):
+    value = event(*(fields[name] for name in event._fields))
+
+    marshalled = marshal_event(value)
+    unpickled = pickle.loads(pickle.dumps(marshalled))
+
+    assert type(unpickled) is event
+    assert unpickled == marshalled
@@ -0,0 +1,220 @@
+import asyncio
+import gc
+import random
+
+import pytest
+
+from snekcord.manager import Manager
+from snekcord.states.memberstate import (CompactGuildMemberState,
+                                         GuildMemberState)
+
+ROLE_IDS = [500, 501, 502]
+
+
+def create_guild(member_state):
+    loop = asyncio.new_event_loop()
+    manager = Manager('token', loop=loop)
+    manager.set_class('GuildMemberState', member_state)
+    guild = manager.guilds.upsert({
+        'id': '1', 'name': 'guild',
+        'roles': [{'id': str(role_id), 'name': 'role'}
+                  for role_id in ROLE_IDS]})
+    return loop, guild
+
+
+@pytest.fixture(params=[GuildMemberState, CompactGuildMemberState])
+def guild(request):
+    loop, guild = create_guild(request.param)
+    yield guild
+    loop.close()
+
+
+@pytest.fixture
+def compact():
+    loop, guild = create_guild(CompactGuildMemberState)
+    yield guild
+    loop.close()
+
+
+def member_payload(user_id, roles=(), **fields):
+    return {'user': {'id': str(user_id), 'username': 'user'},
+            'roles': [str(role_id) for role_id in roles],
+            'joined_at': '2021-01-01T00:00:00+00:00', **fields}
+
+
+def role_members(guild, role_id):
+    return sorted(guild.members.find('role', role_id), key=lambda m: m.id)
+
+
+def expected(assigned, role_id):
+    return sorted(key for key, roles in assigned.items() if role_id in roles)
+
+
+def test_role_index(guild):
+    assigned = {}
+    for index in range(40):
+        user_id = 100 + index
+        assigned[user_id] = ROLE_IDS[:index % 4]
+
+    guild.members.extend([member_payload(key, roles)
+                          for key, roles in assigned.items()])
+
+    random.seed(0)
+    for key in random.sample(sorted(assigned), 10):
+        assigned[key] = random.sample(ROLE_IDS, random.randint(0, 3))
+        guild.members.upsert(member_payload(key, assigned[key]))
+
+    for key in random.sample(sorted(assigned), 15):
+        del assigned[key]
+        guild.members.pop(key)
+
+    for role_id in ROLE_IDS:
+        members = role_members(guild, role_id)
+        assert [member.id for member in members] == expected(
+            assigned, role_id)
+        assert all(role_id in member.roles.keys() for member in members)
+
+    guild.members.clear()
+    for role_id in ROLE_IDS:
+        assert role_members(guild, role_id) == []
+
+
+def test_role_index_doesnt_scan(guild):
+    if not isinstance(guild.members, CompactGuildMemberState):
+        pytest.skip('regular states use StateIndex')
+
+    guild.members.extend([member_payload(100 + index, [500] if index else [])
+                          for index in range(100)])
+    guild.members.upsert(member_payload(100, [501]))
+
+    mapping = guild.members.mapping
+    mapping.roles = None
+    mapping.role_sets = None
+
+    assert sorted(mapping.iter_role_keys(501)) == [100]
+    assert len(list(mapping.iter_role_keys(500))) == 99
+    assert list(mapping.iter_role_keys(502)) == []
+
+
+def colliding_keys(mapping, count):
+    keys = []
+    key = 1000
+    while len(keys) < count:
+        key += 1
+        if mapping._slot(key) == mapping._slot(1000):
+            keys.append(key)
+    return keys
+
+
+def test_compact_insert_update_delete(compact):
+    members = compact.members
+    mapping = members.mapping
+
+    members.extend([member_payload(100, [500], nick='first'),
+                    member_payload(101)])
+    # Payloads are packed without building members
+    assert len(mapping) == 2
+    assert len(mapping.proxies) == 0
+    assert 100 in mapping and 102 not in mapping
+    assert mapping[100].nick == 'first'
+    assert mapping[101].nick is None
+
+    # Payloads only go straight into rows nothing references
+    gc.collect()
+    assert not mapping.insert(100, member_payload(100, [501], nick='second'))
+    assert mapping[100].nick == 'second'
+    assert mapping[100].roles.keys() == {501}
+
+    del mapping[100]
+    assert list(mapping.keys()) == [101]
+    assert mapping.get(100) is None
+    with pytest.raises(KeyError):
+        del mapping[100]
+
+
+def test_compact_probe_after_delete(compact):
+    mapping = compact.members.mapping
+    first, second, third = colliding_keys(mapping, 3)
+
+    compact.members.extend([member_payload(key)
+                            for key in (first, second, third)])
+
+    # The deleted slot keeps the probe going to the keys after it
+    del mapping[second]
+    assert mapping._table.count(-2) == 1
+    assert second not in mapping
+    assert mapping[third].id == third
+
+    # The last row is moved into the hole and its slot follows it
+    del mapping[first]
+    assert list(mapping.keys()) == [third]
+    assert mapping[third].id == third
+
+    assert mapping.insert(second, member_payload(second))
+    assert mapping[second].id == second
+
+    keys = [200 + index for index in range(100)]
+    compact.members.extend([member_payload(key) for key in keys])
+    assert len(mapping._table) > 8
+    assert mapping._table.count(-2) == 0
+    for key in keys[::2]:
+        del mapping[key]
+    assert all(key in mapping for key in keys[1::2])
+    assert not any(key in mapping for key in keys[::2])
+    assert [mapping[key].id for key in (second, third)] == [second, third]
+
+
+def test_compact_role_packing(compact):
+    mapping = compact.members.mapping
+
+    compact.members.extend([member_payload(100, [502, 500]),
+                            member_payload(101, [500, 502]),
+                            member_payload(102, [501]),
+                            member_payload(103)])
+
+    assert mapping.roles[0] == mapping.roles[1]
+    assert mapping.roles[3] == 0
+    assert len(mapping.role_sets) == 3
+    assert sorted(mapping._unpack_roles(mapping.roles[0])) == [500, 502]
+    assert mapping._unpack_roles(mapping.roles[2]) == [501]
+    assert mapping._unpack_roles(0) == []
+    assert mapping[101].roles.keys() == {500, 502}
+
+
+def test_compact_proxies(compact):
+    members = compact.members
+    mapping = members.mapping
+    members.extend([member_payload(100, nick='first')])
+
+    member = mapping[100]
+    assert mapping[100] is member
+    assert 100 in mapping.proxies
+
+    members.upsert(member_payload(100, [500], nick='second'))
+    assert member.nick == 'second'
+    assert mapping.nicks[0] == 'second'
+
+    del member
+    gc.collect()
+    assert 100 not in mapping.proxies
+
+    member = mapping[100]
+    assert member.nick == 'second'
+    assert member.roles.keys() == {500}
+
+
+def test_compact_releases_users(compact):
+    members = compact.members
+    users = compact.state.manager.users
+    members.extend([member_payload(100), member_payload(101)])
+
+    user = members.mapping.users[0]
+    assert users.references[user.id] == 1
+    assert user.cached
+
+    del members.mapping[100]
+    assert user.id not in users.references
+    assert not user.cached
+
+    members.mapping.clear()
+    assert users.references == {}
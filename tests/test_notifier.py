@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from snekcord.utils import Notifier
+
+
+class Timer:
+    def __init__(self, when):
+        self.when = when
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Loop:
+    """Records the wheel's timer instead of scheduling it"""
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+
+    def time(self):
+        return self.now
+
+    def call_at(self, when, callback):
+        timer = Timer(when)
+        self.timers.append(timer)
+        return timer
+
+
+@pytest.fixture
+def loop():
+    return Loop()
+
+
+@pytest.fixture
+def notifier(loop):
+    return Notifier(loop, resolution=0.1, slots=8)
+
+
+def drain(notifier):
+    objs = []
+    while not notifier.queue.empty():
+        objs.append(notifier.queue.get_nowait())
+    return objs
+
+
+def run(notifier, ticks):
+    fired = {}
+    for _ in range(ticks):
+        notifier._advance()
+        for obj in drain(notifier):
+            fired.setdefault(obj, []).append(notifier.tick)
+    return fired
+
+
+def test_delay(notifier):
+    notifier.register('a', 0, 0.3)
+
+    assert run(notifier, 10) == {'a': [3]}
+    assert 'a' not in notifier.handles
+
+
+def test_interval(notifier):
+    notifier.register('a', 0.2, 0.5)
+
+    assert run(notifier, 12) == {'a': [5, 7, 9, 11]}
+    assert notifier.handles == {'a': 0.2}
+
+
+def test_immediate(notifier, loop):
+    notifier.register('a')
+    assert drain(notifier) == ['a']
+    assert notifier.handles == {}
+    assert loop.timers == []
+
+    notifier.register('b', 0.3)
+    assert drain(notifier) == ['b']
+    assert run(notifier, 7) == {'b': [3, 6]}
+
+
+def test_delays_longer_than_the_wheel(notifier):
+    # 20 ticks on an 8 slot wheel pass slot 4 twice before it's due
+    notifier.register('a', 0, 2.0)
+    notifier.register('b', 0, 0.4)
+
+    assert run(notifier, 24) == {'a': [20], 'b': [4]}
+
+
+def test_unregister(notifier, loop):
+    notifier.register('a', 0.1, 0.1)
+    notifier.register('b', 0.1, 0.1)
+
+    assert notifier.unregister('a') == 0.1
+    assert run(notifier, 2) == {'b': [1, 2]}
+
+    timer = notifier._timer
+    notifier.unregister('b')
+    assert timer.cancelled
+    assert notifier._timer is None
+    assert all(not slot for slot in notifier.wheel)
+
+
+def test_register_replaces(notifier):
+    notifier.register('a', 0, 0.5)
+    notifier.register('a', 0, 0.2)
+
+    assert run(notifier, 8) == {'a': [2]}
+
+
+def test_timer_follows_the_origin(notifier, loop):
+    loop.now = 100.0
+    notifier.register('a', 0.1, 0.1)
+    assert loop.timers[-1].when == pytest.approx(100.1)
+
+    # A late tick doesn't push the following ones back
+    loop.now = 100.15
+    notifier._advance()
+    assert loop.timers[-1].when == pytest.approx(100.2)
+
+
+def test_wait():
+    async def main():
+        notifier = Notifier(resolution=0.01)
+        notifier.register('a', 0, 0.02)
+        return await asyncio.wait_for(notifier.wait(), 1)
+
+    assert asyncio.run(main()) == 'a'
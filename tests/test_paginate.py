@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from snekcord.utils import _paginate, alist
+
+
+class Pages:
+    """Serves `items` a page at a time, pages start after the cursor"""
+    def __init__(self, items, *, block_after=None):
+        self.items = items
+        self.block_after = block_after
+        self.calls = []
+        self.cancelled = []
+
+    def __call__(self, cursor, size):
+        self.calls.append((cursor, size))
+        return self.fetch(cursor, size)
+
+    async def fetch(self, cursor, size):
+        if self.block_after is not None and len(self.calls) > self.block_after:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled.append(cursor)
+                raise
+
+        start = 0 if cursor is None else self.items.index(cursor) + 1
+        return self.items[start:start + size]
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def paginate(pages, **kwargs):
+    return _paginate(pages, key=lambda item: item, page_size=3, **kwargs)
+
+
+def test_zero_limit_doesnt_fetch(loop):
+    pages = Pages(list(range(10)))
+
+    assert loop.run_until_complete(alist(paginate(pages, limit=0))) == []
+    assert pages.calls == []
+
+
+def test_limit_and_cursor(loop):
+    pages = Pages(list(range(20)))
+
+    items = loop.run_until_complete(alist(paginate(pages, cursor=4,
+                                                   limit=7)))
+    assert items == [5, 6, 7, 8, 9, 10, 11]
+    assert pages.calls == [(4, 3), (7, 3), (10, 1)]
+
+
+def test_short_page_ends(loop):
+    pages = Pages(list(range(5)))
+
+    assert loop.run_until_complete(alist(paginate(pages))) == [0, 1, 2, 3, 4]
+    assert pages.calls == [(None, 3), (2, 3)]
+
+
+def test_long_page_is_trimmed(loop):
+    async def fetch(cursor, size):
+        return list(range(10))
+
+    items = loop.run_until_complete(alist(_paginate(
+        fetch, key=lambda item: item, page_size=5, limit=2)))
+    assert items == [0, 1]
+
+
+def test_next_page_is_prefetched(loop):
+    pages = Pages(list(range(10)))
+
+    async def consume():
+        iterator = paginate(pages)
+        assert await iterator.__anext__() == 0
+        # The second page was requested before the first was consumed
+        assert pages.calls == [(None, 3), (2, 3)]
+        await iterator.aclose()
+
+    loop.run_until_complete(consume())
+
+
+def test_early_exit_cancels_prefetch(loop):
+    pages = Pages(list(range(10)), block_after=1)
+
+    async def consume():
+        iterator = paginate(pages)
+        async for item in iterator:
+            if item == 1:
+                break
+        await asyncio.sleep(0)
+        await iterator.aclose()
+        await asyncio.sleep(0)
+
+    loop.run_until_complete(consume())
+    assert pages.calls == [(None, 3), (2, 3)]
+    assert pages.cancelled == [2]
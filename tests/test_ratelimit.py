@@ -0,0 +1,186 @@
+import asyncio
+
+import pytest
+
+from snekcord.ratelimit import (FileRateLimitStore, MemoryRateLimitStore,
+                                RateLimiter, fcntl)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class Response:
+    def __init__(self, status_code=200, **headers):
+        self.status_code = status_code
+        self.headers = {key.replace('_', '-'): str(value)
+                        for key, value in headers.items()}
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def limiter(loop):
+    return RateLimiter(loop=loop, store=MemoryRateLimitStore(),
+                       max_buckets=8)
+
+
+async def request(limiter, route, response):
+    bucket = limiter.get_bucket(route)
+    async with bucket:
+        limiter.update(route, bucket, response)
+    return bucket
+
+
+def test_learned_hash_replaces_route_bucket(loop, limiter):
+    first = ('GET', 'channels/%(channel_id)s', ('1',))
+    second = ('PATCH', 'channels/%(channel_id)s', ('1',))
+    response = Response(X_RateLimit_Bucket='abc', X_RateLimit_Limit=5,
+                        X_RateLimit_Remaining=4,
+                        X_RateLimit_Reset_After=10)
+
+    bucket = loop.run_until_complete(request(limiter, first, response))
+    assert list(limiter.buckets) == [('abc', ('1',))]
+
+    shared = loop.run_until_complete(request(limiter, second, response))
+    assert list(limiter.buckets) == [('abc', ('1',))]
+    assert limiter.buckets[('abc', ('1',))] is bucket
+    assert limiter.get_bucket(second) is bucket
+    assert shared is not bucket
+
+
+def test_idle_buckets_and_hashes_are_evicted(loop, limiter):
+    for index in range(64):
+        route = ('GET', f'channels/{index}', ())
+        response = Response(X_RateLimit_Bucket=f'hash-{index}',
+                            X_RateLimit_Limit=5, X_RateLimit_Remaining=4,
+                            X_RateLimit_Reset_After=0)
+        loop.run_until_complete(request(limiter, route, response))
+
+        assert len(limiter.buckets) <= limiter.max_buckets
+        assert len(limiter.hashes) <= limiter.max_buckets
+
+
+def test_busy_buckets_are_kept(loop, limiter):
+    response = Response(X_RateLimit_Bucket='abc', X_RateLimit_Limit=5,
+                        X_RateLimit_Remaining=4, X_RateLimit_Reset_After=60)
+
+    for index in range(64):
+        route = ('GET', f'channels/{index}', ())
+        loop.run_until_complete(request(limiter, route, response))
+
+    assert list(limiter.buckets) == [('abc', ())]
+    assert len(limiter.hashes) <= limiter.max_buckets
+    assert limiter.hashes[('GET', 'channels/63')] == 'abc'
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def file_stores(tmp_path, clock):
+    if fcntl is None:
+        pytest.skip('FileRateLimitStore needs fcntl')
+
+    path = str(tmp_path / 'ratelimit')
+    stores = [FileRateLimitStore(path, limit=2, period=1, clock=clock)
+              for _ in range(2)]
+    yield stores
+    for store in stores:
+        store.close()
+
+
+def test_memory_store_window(clock):
+    store = MemoryRateLimitStore(limit=2, period=1, clock=clock)
+
+    assert store.reserve() == 0
+    clock.now += 0.25
+    assert store.reserve() == 0
+    assert store.reserve() == pytest.approx(0.75)
+
+    clock.now += 0.75
+    assert store.reserve() == 0
+    assert store.reserve() == 0
+    assert store.reserve() == pytest.approx(1)
+
+
+def test_memory_store_lock(clock):
+    store = MemoryRateLimitStore(limit=2, period=1, clock=clock)
+
+    store.lock(5)
+    store.lock(1)
+    assert store.reserve() == pytest.approx(5)
+
+    clock.now += 4
+    assert store.reserve() == pytest.approx(1)
+
+    clock.now += 1
+    assert store.reserve() == 0
+
+
+def test_memory_store_shared_per_token():
+    store = MemoryRateLimitStore.for_token('a')
+
+    assert MemoryRateLimitStore.for_token('a') is store
+    assert MemoryRateLimitStore.for_token('b') is not store
+
+
+def test_memory_store_acquire_waits(loop, clock, monkeypatch):
+    store = MemoryRateLimitStore(limit=1, period=1, clock=clock)
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr(asyncio, 'sleep', sleep)
+
+    loop.run_until_complete(store.acquire())
+    loop.run_until_complete(store.acquire())
+    assert delays == [pytest.approx(1)]
+
+
+def test_file_store_window(file_stores, clock):
+    first, second = file_stores
+
+    assert first.reserve() == 0
+    assert second.reserve() == 0
+    assert first.reserve() == pytest.approx(1)
+    assert second.reserve() == pytest.approx(1)
+
+    clock.now += 1
+    assert second.reserve() == 0
+
+
+def test_file_store_lock(file_stores, clock):
+    first, second = file_stores
+
+    first.lock(3)
+    assert second.reserve() == pytest.approx(3)
+
+    clock.now += 3
+    assert second.reserve() == 0
+
+
+def test_file_store_keeps_state(tmp_path, file_stores, clock):
+    first, _ = file_stores
+    first.reserve()
+    first.reserve()
+
+    store = FileRateLimitStore(str(tmp_path / 'ratelimit'), limit=2,
+                               period=1, clock=clock)
+    try:
+        assert store.reserve() == pytest.approx(1)
+    finally:
+        store.close()
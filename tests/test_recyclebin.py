@@ -0,0 +1,99 @@
+import pytest
+
+from snekcord.states.basestate import CacheCounters, RecycleBin
+
+
+@pytest.fixture
+def counters():
+    return CacheCounters()
+
+
+@pytest.fixture
+def recycle_bin(counters):
+    return RecycleBin(generation_size=2, generations=2, counters=counters)
+
+
+def fill(recycle_bin, *keys):
+    for key in keys:
+        recycle_bin[key] = key.upper()
+
+
+def test_generations_expire(recycle_bin, counters):
+    fill(recycle_bin, 'a', 'b', 'c', 'd')
+    assert [sorted(generation) for generation in recycle_bin.generations] == [
+        ['a', 'b'], ['c', 'd']]
+    assert len(recycle_bin) == 4
+    assert recycle_bin.expired == 0
+
+    # Starting a third generation drops the first
+    fill(recycle_bin, 'e')
+    assert [sorted(generation) for generation in recycle_bin.generations] == [
+        ['c', 'd'], ['e']]
+    assert list(recycle_bin) == ['c', 'd', 'e']
+    assert (recycle_bin.recycled, recycle_bin.expired) == (5, 2)
+    assert (counters.recycled, counters.recycle_expired) == (3, 2)
+
+
+def test_objects_survive_a_generation(recycle_bin):
+    fill(recycle_bin, 'a')
+    for key in 'bcd':
+        fill(recycle_bin, key)
+        assert 'a' in recycle_bin
+
+    fill(recycle_bin, 'e')
+    assert 'a' not in recycle_bin
+
+
+def test_hits_are_promoted(recycle_bin, counters):
+    fill(recycle_bin, 'a', 'b', 'c')
+
+    assert recycle_bin.get('a') == 'A'
+    assert recycle_bin.get('x') is None
+    assert (recycle_bin.hits, recycle_bin.misses) == (1, 1)
+    assert counters.recycle_hits == 1
+    assert 'a' in recycle_bin.generations[-1]
+
+    # The stale entry in the old generation doesn't expire it
+    fill(recycle_bin, 'd', 'e')
+    assert 'a' in recycle_bin and 'b' not in recycle_bin
+    assert recycle_bin.expired == 1
+    assert counters.recycled == 4
+
+
+def test_young_hits_stay_put(recycle_bin):
+    fill(recycle_bin, 'a')
+    assert recycle_bin['a'] == 'A'
+    assert list(recycle_bin.generations) == [{'a'}]
+
+    with pytest.raises(KeyError):
+        recycle_bin['b']
+
+
+def test_recycling_again_replaces(recycle_bin, counters):
+    fill(recycle_bin, 'a', 'b')
+    recycle_bin['a'] = 'new'
+    fill(recycle_bin, 'c', 'd')
+
+    assert recycle_bin.get('a') == 'new'
+    assert 'b' not in recycle_bin
+    assert counters.recycled == 3
+
+
+def test_removal(recycle_bin, counters):
+    fill(recycle_bin, 'a', 'b', 'c')
+
+    assert recycle_bin.pop('a') == 'A'
+    assert recycle_bin.pop('a', None) is None
+    with pytest.raises(KeyError):
+        recycle_bin.pop('a')
+
+    del recycle_bin['b']
+    assert counters.recycled == 1
+
+    # Removed keys don't count as expired once their generation ages out
+    fill(recycle_bin, 'd', 'e')
+    assert recycle_bin.expired == 0
+
+    recycle_bin.clear()
+    assert len(recycle_bin) == 0 and counters.recycled == 0
+    assert len(recycle_bin.generations) == 1
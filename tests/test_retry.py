@@ -0,0 +1,209 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from snekcord.manager import Manager
+from snekcord.rest import HTTPError, RetryPolicy
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+class FakeSession:
+    """Replaces `RestSession._request` with scripted responses, every
+    attempt takes `elapsed` seconds of the fake clock
+    """
+    def __init__(self, session, clock, responses, elapsed=0.1):
+        self.clock = clock
+        self.responses = list(responses)
+        self.elapsed = elapsed
+        self.attempts = []
+
+        session.loop = clock
+        session._request = self._request
+
+    async def _request(self, route, method, url, *args, **kwargs):
+        self.attempts.append(self.clock.now)
+        self.clock.now += self.elapsed
+
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def response(status_code, **headers):
+    return httpx.Response(status_code, json={'status': status_code},
+                          headers={key.replace('_', '-'): str(value)
+                                   for key, value in headers.items()})
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def sleeps(clock, monkeypatch):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr(asyncio, 'sleep', sleep)
+    return sleeps
+
+
+@pytest.fixture
+def session(loop):
+    session = Manager('token', loop=loop).rest
+    session.retry_policy = RetryPolicy(max_retries=3, base=0.5, cap=4)
+    return session
+
+
+def request(loop, session, method='GET', **kwargs):
+    return loop.run_until_complete(
+        session.request(method, 'https://discord.com/api/v9/test', **kwargs))
+
+
+@pytest.mark.parametrize('status_code', [500, 502, 503, 504])
+def test_server_errors_are_retried(loop, session, clock, sleeps,
+                                   status_code):
+    fake = FakeSession(session, clock, [response(status_code),
+                                        response(200)])
+
+    assert request(loop, session) == {'status': 200}
+    assert len(fake.attempts) == 2
+    assert len(sleeps) == 1
+
+
+@pytest.mark.parametrize('status_code', [400, 401, 403, 404, 501])
+def test_client_errors_are_not_retried(loop, session, clock, sleeps,
+                                       status_code):
+    fake = FakeSession(session, clock, [response(status_code)])
+
+    with pytest.raises(HTTPError):
+        request(loop, session)
+    assert len(fake.attempts) == 1
+
+
+@pytest.mark.parametrize('method', ['POST', 'PATCH'])
+def test_unsafe_methods_are_not_retried(loop, session, clock, sleeps,
+                                        method):
+    fake = FakeSession(session, clock, [response(503)])
+
+    with pytest.raises(HTTPError):
+        request(loop, session, method)
+    assert len(fake.attempts) == 1
+
+    fake = FakeSession(session, clock, [httpx.ConnectError('down')])
+    with pytest.raises(httpx.ConnectError):
+        request(loop, session, method)
+    assert len(fake.attempts) == 1
+
+
+def test_transport_errors_are_retried(loop, session, clock, sleeps):
+    fake = FakeSession(session, clock, [httpx.ConnectError('down'),
+                                        httpx.ReadTimeout('slow'),
+                                        response(200)])
+
+    assert request(loop, session, 'DELETE') == {'status': 200}
+    assert len(fake.attempts) == 3
+
+
+def test_max_retries(loop, session, clock, sleeps):
+    fake = FakeSession(session, clock, [response(503)] * 10)
+
+    with pytest.raises(HTTPError):
+        request(loop, session)
+    assert len(fake.attempts) == session.retry_policy.max_retries + 1
+
+
+def test_429_is_retried_for_every_method(loop, session, clock, sleeps):
+    fake = FakeSession(session, clock, [response(429, Retry_After=1),
+                                        response(200)])
+
+    assert request(loop, session, 'POST') == {'status': 200}
+    assert len(fake.attempts) == 2
+    # The rate limiter waits for Retry-After, no backoff on top of it
+    assert sleeps == []
+
+
+def test_retry_after_is_checked_against_the_deadline(loop, session, clock,
+                                                     sleeps):
+    fake = FakeSession(session, clock, [response(429, Retry_After=5),
+                                        response(200)])
+
+    with pytest.raises(HTTPError):
+        request(loop, session, deadline=2)
+    assert len(fake.attempts) == 1
+
+    fake = FakeSession(session, clock, [response(429, Retry_After=1),
+                                        response(200)])
+    assert request(loop, session, deadline=2) == {'status': 200}
+
+
+def test_deadline_stops_backoff(loop, session, clock, sleeps):
+    session.retry_policy = RetryPolicy(max_retries=10, base=1, cap=1)
+    fake = FakeSession(session, clock, [response(503)] * 10, elapsed=0)
+
+    with pytest.raises(HTTPError):
+        request(loop, session, deadline=3.5)
+
+    # Attempts at 0, 1, 2 and 3, the next would start after the deadline
+    assert fake.attempts == [0, 1, 2, 3]
+
+    fake = FakeSession(session, clock, [httpx.ConnectError('down')] * 10,
+                       elapsed=0)
+    with pytest.raises(httpx.ConnectError):
+        request(loop, session, deadline=1.5)
+    assert len(fake.attempts) == 2
+
+
+def test_policy_deadline_is_the_default(loop, session, clock, sleeps):
+    session.retry_policy = RetryPolicy(base=1, cap=1, deadline=1.5)
+    fake = FakeSession(session, clock, [response(503)] * 10, elapsed=0)
+
+    with pytest.raises(HTTPError):
+        request(loop, session)
+    assert len(fake.attempts) == 2
+
+    fake = FakeSession(session, clock, [response(503)] * 3 + [response(200)],
+                       elapsed=0)
+    assert request(loop, session, deadline=None) == {'status': 200}
+
+
+def test_backoff_jitter_bounds():
+    policy = RetryPolicy(base=0.5, cap=10)
+    random.seed(0)
+
+    delay = policy.base
+    for _ in range(1000):
+        previous = delay
+        delay = policy.backoff(delay)
+        assert policy.base <= delay <= min(policy.cap, previous * 3)
+
+
+def test_should_retry():
+    policy = RetryPolicy()
+
+    assert policy.should_retry('get')
+    assert policy.should_retry('PUT', 502)
+    assert policy.should_retry('POST', 429)
+    assert not policy.should_retry('POST')
+    assert not policy.should_retry('GET', 404)
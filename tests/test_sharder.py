@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import pytest
+
+from snekcord.clients.websocketclient import WebSocketClient
+from snekcord.ws.shardws import ShardOpcode, ShardState
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+@pytest.fixture
+def client(loop):
+    return WebSocketClient('token', loop=loop)
+
+
+@pytest.fixture
+def sharder(client):
+    return client.sharder
+
+
+def create_shard(client, worker):
+    return client._create_shard(worker, shard_id=0, shard_count=1)
+
+
+def heartbeats(shard):
+    return [payload for payload in shard.sent
+            if not isinstance(payload, tuple)
+            and json.loads(payload)['op'] == ShardOpcode.HEARTBEAT]
+
+
+async def wake(sharder, shard):
+    # What the timing wheel does once the shard's heartbeat is due
+    sharder.notifier.queue.put_nowait(shard)
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def run_worker(loop, sharder, func):
+    async def main():
+        worker = loop.create_task(sharder.work())
+        try:
+            await func()
+        finally:
+            worker.cancel()
+
+    loop.run_until_complete(main())
+
+
+def test_acked_heartbeats(loop, client, sharder):
+    shard = create_shard(client, sharder)
+
+    async def func():
+        await shard.connect('wss://gateway')
+        sharder.start_heartbeat(shard, 100)
+
+        for _ in range(3):
+            await wake(sharder, shard)
+            assert not shard.heartbeat_acked
+            sharder.ack(shard)
+
+        assert len(heartbeats(shard)) == 3
+        assert len(shard.latencies) == 3
+        assert shard.zombies == 0
+        assert shard in sharder.notifier.handles
+
+    run_worker(loop, sharder, func)
+
+
+def test_zombie_reconnects(loop, client, sharder):
+    shard = create_shard(client, sharder)
+
+    async def func():
+        await shard.connect('wss://gateway')
+        protocol = shard.protocol
+        sharder.start_heartbeat(shard, 100)
+
+        await wake(sharder, shard)
+        await wake(sharder, shard)
+
+        assert len(heartbeats(shard)) == 1
+        assert shard.zombies == 1
+        assert shard not in sharder.notifier.handles
+        assert protocol.closed
+
+        await shard._reconnect_task
+        assert shard.reconnects == 1
+        assert shard.connects == 2
+
+    run_worker(loop, sharder, func)
+
+
+def test_stopped_while_queued(loop, client, sharder):
+    shard = create_shard(client, sharder)
+
+    async def func():
+        await shard.connect('wss://gateway')
+        sharder.start_heartbeat(shard, 100)
+        sharder.notifier.queue.put_nowait(shard)
+        sharder.stop_heartbeat(shard)
+        await wake(sharder, object())
+
+        assert heartbeats(shard) == []
+
+    run_worker(loop, sharder, func)
+
+
+def test_closed_shards_arent_zombies(loop, client, sharder):
+    shard = create_shard(client, sharder)
+    shard.close()
+    shard.heartbeat_failed()
+
+    assert shard.zombies == 0
+    assert shard._reconnect_task is None
+
+
+def test_timed_out_shards_are_closed(loop, client, sharder):
+    sharder.timeout = 0.01
+    shards = []
+
+    def factory(worker):
+        shard = create_shard(client, worker)
+        shards.append(shard)
+        return shard
+
+    with pytest.raises(ConnectionError):
+        loop.run_until_complete(
+            sharder.create_connection(factory, 'wss://gateway'))
+
+    assert len(shards) == 5
+    for shard in shards:
+        assert shard.state is ShardState.CLOSED
+        assert shard.protocol.closed
+        assert shard not in sharder.notifier.handles
+
+
+def test_retry_after_timeout(loop, client, sharder):
+    sharder.timeout = 0.01
+    shards = []
+
+    def factory(worker):
+        shard = create_shard(client, worker)
+        shards.append(shard)
+        if len(shards) == 2:
+            shard.ready.set()
+        return shard
+
+    shard = loop.run_until_complete(
+        sharder.create_connection(factory, 'wss://gateway'))
+
+    assert shard is shards[1]
+    assert shards[0].state is ShardState.CLOSED
+    assert shard.state is not ShardState.CLOSED
+    assert not shard.protocol.closed
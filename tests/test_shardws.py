@@ -0,0 +1,323 @@
+import asyncio
+import json
+import zlib
+
+import pytest
+
+from snekcord.clients.websocketclient import WebSocketClient
+from snekcord.ws.shardws import (ShardCloseCode, ShardOpcode, ShardState,
+                                 ZLIB_SUFFIX)
+
+USER = {'id': '1', 'username': 'user'}
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    asyncio.set_event_loop(None)
+    loop.close()
+
+
+class Harness:
+    def __init__(self, loop, **kwargs):
+        self.loop = loop
+        self.client = WebSocketClient('token', loop=loop, **kwargs)
+        self.shard = self.client._create_shard(
+            self.client.sharder, shard_id=0, shard_count=1)
+        self.events = []
+
+        manager = self.client.manager
+        dispatch = manager.dispatch
+
+        def record(name, *args):
+            self.events.append((name, args[1:]))
+            return dispatch(name, *args)
+
+        manager.dispatch = record
+
+        self.run(self.shard.connect('wss://gateway'))
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def receive(self, opcode, data=None, name=None, sequence=None):
+        frame = json.dumps({'op': opcode, 'd': data, 't': name,
+                            's': sequence})
+        return self.run(self.shard.ws_text_received(frame))
+
+    def sent(self):
+        payloads = [json.loads(payload) for payload in self.shard.sent
+                    if not isinstance(payload, tuple)]
+        self.shard.sent.clear()
+        return payloads
+
+    def names(self):
+        return [name for name, _ in self.events]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args):
+        sleeps.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', fake_sleep)
+    return sleeps
+
+
+@pytest.fixture
+def harness(loop, sleeps):
+    return Harness(loop)
+
+
+@pytest.fixture
+def compressed(loop, sleeps):
+    return Harness(loop, compress=True)
+
+
+def hello(harness):
+    harness.receive(ShardOpcode.HELLO, {'heartbeat_interval': 41250})
+
+
+def ready(harness, guilds=()):
+    harness.receive(ShardOpcode.DISPATCH, {
+        'v': 9, 'user': USER, 'session_id': 'session', 'shard': [0, 1],
+        'guilds': [{'id': guild_id, 'unavailable': True}
+                   for guild_id in guilds]}, 'READY', 1)
+
+
+def connected(harness, guilds=()):
+    hello(harness)
+    ready(harness, guilds)
+    harness.sent()
+
+
+def reconnected(harness):
+    harness.run(harness.shard._reconnect_task)
+    hello(harness)
+    return harness.sent()
+
+
+def frames(*payloads):
+    compressor = zlib.compressobj()
+    for payload in payloads:
+        yield (compressor.compress(json.dumps(payload).encode())
+               + compressor.flush(zlib.Z_SYNC_FLUSH))
+
+
+def feed(harness, data, chunk_size):
+    for start in range(0, len(data), chunk_size):
+        result = harness.shard.ws_binary_received(
+            data[start:start + chunk_size])
+        if result is not None:
+            harness.run(result)
+
+
+def dispatch(name, data, sequence):
+    return {'op': 0, 't': name, 'd': data, 's': sequence}
+
+
+def test_inflator_keeps_context(compressed):
+    payloads = [dispatch('TYPING_START', {'channel_id': '1', 'user_id': '2',
+                                          'index': index}, index + 1)
+                for index in range(5)]
+    compressed.client.manager.on('typing_start')(lambda *args: None)
+
+    data = list(frames(*payloads))
+    for frame in data:
+        assert frame.endswith(ZLIB_SUFFIX)
+        compressed.shard.ws_binary_received(frame)
+        compressed.run(asyncio.sleep(0))
+
+    assert [args[0]['index'] for _, args in compressed.events] == [
+        0, 1, 2, 3, 4]
+    assert compressed.shard.sequence == 5
+    assert compressed.shard.compressed_bytes == sum(map(len, data))
+    assert compressed.shard.decompressed_bytes == sum(
+        len(json.dumps(payload)) for payload in payloads)
+    # Later frames reuse the window of earlier ones
+    assert len(data[-1]) < len(data[0])
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64])
+def test_inflator_buffers_partial_frames(compressed, chunk_size):
+    compressed.client.manager.on('typing_start')(lambda *args: None)
+
+    # Messages can be split into several frames but never share one
+    for data in frames(*(dispatch('TYPING_START', {'index': index},
+                                  index + 1) for index in range(3))):
+        feed(compressed, data, chunk_size)
+
+    assert [args[0]['index'] for _, args in compressed.events] == [0, 1, 2]
+    assert not compressed.shard._buffer
+
+
+def test_inflator_resets_on_connect(compressed):
+    compressed.client.manager.on('typing_start')(lambda *args: None)
+
+    first = next(frames(dispatch('TYPING_START', {'index': 0}, 1)))
+    compressed.shard.ws_binary_received(first[:5])
+
+    # A new connection starts a new zlib stream
+    compressed.run(compressed.shard.connect('wss://gateway'))
+    second = next(frames(dispatch('TYPING_START', {'index': 1}, 2)))
+    feed(compressed, second, 64)
+
+    assert [args[0]['index'] for _, args in compressed.events] == [1]
+
+
+def test_uncompressed_binary_frames(harness):
+    harness.client.manager.on('typing_start')(lambda *args: None)
+
+    harness.run(harness.shard.ws_binary_received(
+        json.dumps(dispatch('TYPING_START', {'index': 0}, 1)).encode()))
+
+    assert harness.names() == ['TYPING_START']
+
+
+def test_identify(harness):
+    hello(harness)
+
+    [payload] = harness.sent()
+    assert payload['op'] == ShardOpcode.IDENTIFY
+    assert payload['d']['shard'] == [0, 1]
+    assert harness.shard.state is ShardState.IDENTIFYING
+    assert harness.shard in harness.client.sharder.notifier.handles
+
+    ready(harness, ['10'])
+    assert harness.shard.state is ShardState.CONNECTED
+    assert harness.shard.session_id == 'session'
+    assert harness.shard.user.id == 1
+    assert harness.shard.ready.is_set()
+    assert harness.shard.identifies == 1
+
+
+def test_reconnect_resumes(harness):
+    connected(harness)
+    harness.receive(ShardOpcode.DISPATCH, {'channel_id': '1'},
+                    'TYPING_START', 5)
+
+    protocol = harness.shard.protocol
+    harness.receive(ShardOpcode.RECONNECT)
+    assert harness.shard.state is ShardState.RECONNECTING
+
+    [payload] = reconnected(harness)
+    assert protocol.closed
+    assert payload['op'] == ShardOpcode.RESUME
+    assert payload['d']['session_id'] == 'session'
+    assert payload['d']['seq'] == 5
+    assert harness.shard.state is ShardState.RESUMING
+
+    harness.receive(ShardOpcode.DISPATCH, None, 'RESUMED', 6)
+    assert harness.shard.state is ShardState.CONNECTED
+    assert harness.shard.reconnect_attempts == 0
+    assert harness.shard.resumes == 1
+    assert 'SHARD_RESUME' in harness.names()
+
+
+def test_reconnect_backoff(harness, sleeps):
+    connected(harness)
+    sleeps.clear()
+
+    connect = harness.shard.connect
+    failures = [OSError('refused'), asyncio.TimeoutError()]
+
+    async def flaky_connect(*args, **kwargs):
+        if failures:
+            raise failures.pop(0)
+        await connect(*args, **kwargs)
+
+    harness.shard.connect = flaky_connect
+    harness.shard.connection_closing(None)
+    harness.run(harness.shard._reconnect_task)
+
+    # The first attempt is immediate, the rest back off with jitter
+    assert len(sleeps) == 2
+    assert all(1 <= delay <= 60 for delay in sleeps)
+    assert harness.shard.reconnects == 3
+    assert harness.shard.state is ShardState.CONNECTING
+
+
+@pytest.mark.parametrize('code', [ShardCloseCode.INVALID_SEQUENCE,
+                                  ShardCloseCode.SESSION_TIMED_OUT])
+def test_session_close_codes_identify(harness, code):
+    connected(harness)
+    harness.shard.ws_close_received(code, b'')
+
+    [payload] = reconnected(harness)
+    assert payload['op'] == ShardOpcode.IDENTIFY
+    assert harness.shard.session_id is None
+
+
+def test_other_close_codes_resume(harness):
+    connected(harness)
+    harness.shard.ws_close_received(ShardCloseCode.UNKNOWN_ERROR, b'')
+
+    [payload] = reconnected(harness)
+    assert payload['op'] == ShardOpcode.RESUME
+
+
+def test_fatal_close_codes(harness):
+    connected(harness)
+    harness.shard.ws_close_received(ShardCloseCode.AUTHENTICATION_FAILED,
+                                    b'')
+
+    assert harness.shard.state is ShardState.CLOSED
+    assert harness.shard._reconnect_task is None
+    assert harness.names() == ['SHARD_CLOSE']
+    assert harness.shard not in harness.client.sharder.notifier.handles
+
+    # Closing the socket afterwards doesn't reconnect either
+    harness.shard.connection_closing(None)
+    assert harness.shard._reconnect_task is None
+
+
+def test_invalid_session(harness, sleeps):
+    connected(harness)
+    sleeps.clear()
+
+    harness.receive(ShardOpcode.INVALID_SESSION, True)
+    [payload] = harness.sent()
+    assert payload['op'] == ShardOpcode.RESUME
+
+    harness.receive(ShardOpcode.INVALID_SESSION, False)
+    [payload] = harness.sent()
+    assert payload['op'] == ShardOpcode.IDENTIFY
+    assert harness.shard.session_id is None
+    assert harness.shard.sequence == -1
+
+    # Discord's 1-5 seconds before each attempt, then the 5 seconds
+    # between identifies
+    assert len(sleeps) == 3
+    assert all(1 <= delay <= 5 for delay in sleeps[:2])
+    assert 0 < sleeps[2] <= 5
+
+
+def test_guild_availability(harness):
+    connected(harness, ['10'])
+    guild = {'id': '10', 'name': 'guild'}
+
+    harness.receive(ShardOpcode.DISPATCH, guild, 'GUILD_CREATE', 2)
+    harness.receive(ShardOpcode.DISPATCH, {'id': '10', 'unavailable': True},
+                    'GUILD_DELETE', 3)
+    assert harness.shard.unavailable_guilds == {'10'}
+    assert harness.shard.available_guilds == set()
+
+    harness.receive(ShardOpcode.DISPATCH, guild, 'GUILD_CREATE', 4)
+    assert harness.shard.unavailable_guilds == set()
+
+    harness.receive(ShardOpcode.DISPATCH, {'id': '10'}, 'GUILD_DELETE', 5)
+    assert harness.shard.available_guilds == set()
+
+    harness.receive(ShardOpcode.DISPATCH, {'id': '11', 'name': 'new'},
+                    'GUILD_CREATE', 6)
+    assert harness.shard.available_guilds == {'11'}
+
+    assert [name for name in harness.names() if name.startswith('GUILD')] == [
+        'GUILD_RECEIVE', 'GUILD_UNAVAILABLE', 'GUILD_AVAILABLE',
+        'GUILD_DELETE', 'GUILD_JOIN']
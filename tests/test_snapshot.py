@@ -0,0 +1,122 @@
+import asyncio
+import json
+import zlib
+
+import pytest
+
+from snekcord.manager import SNAPSHOT_MAGIC, SNAPSHOT_VERSION, Manager
+
+USER = {'id': '1', 'username': 'user', 'discriminator': '0001'}
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def manager(loop):
+    manager = Manager('token', loop=loop)
+    manager.guilds.upsert({
+        'id': '1000', 'name': 'guild',
+        'roles': [{'id': '1000', 'name': '@everyone'},
+                  {'id': '1001', 'name': 'role'}],
+        'emojis': [{'id': '1002', 'name': 'emoji', 'user': USER}],
+        'channels': [{'id': '1003', 'type': 0, 'name': 'channel',
+                      'guild_id': '1000'}],
+        'members': [{'user': {'id': str(100 + index), 'username': 'member'},
+                     'roles': ['1001'] if index % 2 else [],
+                     'joined_at': '2021-01-01T00:00:00+00:00'}
+                    for index in range(4)]})
+    manager.channels.upsert({'id': '2000', 'type': 1, 'recipients': [USER]})
+
+    channel = manager.channels.get(1003)
+    for index in range(3):
+        channel.messages.upsert({'id': str(3000 + index),
+                                 'channel_id': '1003', 'content': 'message',
+                                 'author': USER})
+    return manager
+
+
+def write(path, document, *, version=SNAPSHOT_VERSION):
+    data = zlib.compress(json.dumps(document).encode())
+    path.write_bytes(SNAPSHOT_MAGIC + bytes((version,)) + data)
+
+
+def test_round_trip(loop, manager, tmp_path):
+    path = tmp_path / 'snapshot'
+    manager.snapshot(str(path), extra={'sessions': {'0': 'abc'}})
+
+    restored = Manager('token', loop=loop)
+    assert restored.restore(str(path)) == {'sessions': {'0': 'abc'}}
+
+    assert restored.to_snapshot() == manager.to_snapshot()
+
+    guild = restored.guilds.get(1000)
+    member = guild.members.get(101)
+    assert member.user.name == 'member'
+    assert list(member.roles.keys()) == [1001]
+    assert [message.content for message in
+            restored.channels.get(1003).messages] == ['message'] * 3
+
+
+def test_truncated(loop, manager, tmp_path):
+    path = tmp_path / 'snapshot'
+    manager.snapshot(str(path))
+
+    data = path.read_bytes()
+    for size in (0, len(SNAPSHOT_MAGIC), len(SNAPSHOT_MAGIC) + 1,
+                 len(data) // 2):
+        path.write_bytes(data[:size])
+        with pytest.raises(ValueError):
+            Manager('token', loop=loop).restore(str(path))
+
+
+def test_corrupt(loop, tmp_path):
+    path = tmp_path / 'snapshot'
+
+    path.write_bytes(b'NOTASNAP' + bytes((SNAPSHOT_VERSION,)) + b'data')
+    with pytest.raises(ValueError, match='is not a snapshot'):
+        Manager('token', loop=loop).restore(str(path))
+
+    path.write_bytes(SNAPSHOT_MAGIC + bytes((SNAPSHOT_VERSION,)) + b'data')
+    with pytest.raises(ValueError, match='corrupt'):
+        Manager('token', loop=loop).restore(str(path))
+
+    write(path, {}, version=SNAPSHOT_VERSION + 1)
+    with pytest.raises(ValueError, match='version'):
+        Manager('token', loop=loop).restore(str(path))
+
+    path.write_bytes(SNAPSHOT_MAGIC + bytes((SNAPSHOT_VERSION,))
+                     + zlib.compress(b'[]'))
+    with pytest.raises(ValueError, match='not an object'):
+        Manager('token', loop=loop).restore(str(path))
+
+
+@pytest.mark.parametrize('missing', ['users', 'channels', 'guilds',
+                                     'messages', 'invites'])
+def test_missing_key(loop, manager, tmp_path, missing):
+    document = manager.to_snapshot()
+    del document[missing]
+
+    path = tmp_path / 'snapshot'
+    write(path, document)
+    with pytest.raises(ValueError, match=repr(missing)):
+        Manager('token', loop=loop).restore(str(path))
+
+    with pytest.raises(ValueError):
+        Manager('token', loop=loop).load_snapshot(document)
+
+
+def test_malformed_payloads(loop, manager):
+    document = manager.to_snapshot()
+    del document['messages'][0]['channel_id']
+    with pytest.raises(ValueError, match="'messages'"):
+        Manager('token', loop=loop).load_snapshot(document)
+
+    document = manager.to_snapshot()
+    document['guilds'][0]['members'] = [{'roles': []}]
+    with pytest.raises(ValueError, match='malformed'):
+        Manager('token', loop=loop).load_snapshot(document)
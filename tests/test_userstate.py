@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from snekcord.manager import Manager
+from snekcord.ws.shardws import Shard
+
+USER = {'id': '150325840957554688', 'username': 'snek',
+        'discriminator': '0001', 'avatar': None, 'public_flags': 64}
+
+
+@pytest.fixture
+def manager():
+    loop = asyncio.new_event_loop()
+    yield Manager('token', loop=loop)
+    loop.close()
+
+
+def churn(manager, count=512):
+    for user_id in range(1, count + 1):
+        manager.users.upsert({'id': str(user_id), 'username': 'churn'})
+
+
+def test_unchanged_upsert_skips_update(manager, monkeypatch):
+    user = manager.users.upsert(USER)
+
+    def update(self, data, *args, **kwargs):
+        raise AssertionError('updated an unchanged user')
+
+    monkeypatch.setattr(type(user), 'update', update)
+    assert manager.users.upsert(dict(USER)) is user
+
+
+@pytest.mark.parametrize('changes', [
+    {'username': 'snake'}, {'avatar': 'abc'}, {'public_flags': 0},
+    {'email': 'snek@example.com'},
+])
+def test_changed_upsert_updates(manager, changes):
+    user = manager.users.upsert(USER)
+    manager.users.upsert(dict(USER, **changes))
+
+    for key, value in changes.items():
+        name = 'name' if key == 'username' else key
+        assert getattr(user, name) == value
+
+
+def test_unreferenced_users_age_out(manager):
+    user = manager.users.upsert(USER)
+    assert not user.cached
+
+    churn(manager)
+    assert manager.users.get(USER['id']) is None
+
+
+def test_released_users_are_evicted(manager):
+    user = manager.users.upsert(USER)
+
+    manager.users.acquire(user)
+    manager.users.acquire(user)
+    churn(manager)
+    assert manager.users.get(USER['id']) is user
+
+    manager.users.release(user)
+    assert user.cached
+
+    manager.users.release(user)
+    assert not user.cached
+    assert user.id not in manager.users.references
+
+
+def test_template_holds_its_creator(manager):
+    template = manager.guilds.__guild_template_class__.unmarshal(
+        {'code': 'code', 'creator_id': USER['id'], 'creator': USER},
+        state=manager.guilds)
+
+    churn(manager)
+    assert template.creator is not None
+    assert template.creator.id == int(USER['id'])
+
+
+def test_shard_references_the_client_user(manager):
+    worker = type('Worker', (), {'loop': manager.loop,
+                                 'manager': manager})()
+    shard = Shard(worker, shard_id=0, shard_count=1)
+
+    shard._set_user(manager.users.upsert(USER))
+    churn(manager)
+
+    restored = Shard(worker, shard_id=0, shard_count=1)
+    restored.restore_session(shard.get_session())
+    assert restored.user is shard.user
+    assert manager.users.references[shard.user.id] == 2
+
+    shard._set_user(None)
+    restored._set_user(None)
+    assert not manager.users.references
@@ -1,25 +1,44 @@
 import asyncio
 from types import FrameType
-from typing import ClassVar, Dict, List, Optional, Type
+from typing import Any, ClassVar, Dict, Iterator, List, Mapping, Optional, Type
 
-from .states.basestate import BaseState
-from .utils import EventDispatcher
+from .states.basestate import BaseState, BaseSubState, CacheCounters
+from .utils import EventDispatcher, JsonCodec
 
 StateClasses = Dict[str, Type[BaseState]]
 
+SNAPSHOT_MAGIC: bytes
+SNAPSHOT_VERSION: int
+
 class Manager(EventDispatcher):
     DEFAULT_CLASSES: ClassVar[StateClasses]
     __classes__: ClassVar[StateClasses]
     __handled_signals__: List[int]
 
+    ratelimit_store: Optional[Any]
+    json: JsonCodec
+    cache_policies: Dict[str, Any]
+    cache_counters: Dict[str, CacheCounters]
+
     def __init__(
-        self, token: str, *, loop: Optional[asyncio.AbstractEventLoop] = ..., api_version: str = ...
+        self, token: str, *, loop: Optional[asyncio.AbstractEventLoop] = ..., api_version: str = ...,
+        ratelimit_store: Optional[Any] = ..., json_codec: Optional[JsonCodec | str] = ...,
+        cache_policies: Optional[Mapping[str, Any]] = ...
     ) -> None: ...
 
     @classmethod
     def set_class(cls, name: str, klass: type) -> None: ...
     @classmethod
     def get_class(cls, name: str) -> Type[BaseState]: ...
+    def get_cache_counters(self, state: BaseState | BaseSubState) -> CacheCounters: ...
+    def get_cache_policy(self, state: BaseState) -> Any: ...
+    def set_cache_policy(self, name: str, policy: Any) -> None: ...
+    def iter_states(self) -> Iterator[BaseState]: ...
+    def cache_stats(self, *, sample_size: int = ...) -> Dict[str, Any]: ...
+    def to_snapshot(self) -> Dict[str, List[Dict[str, Any]]]: ...
+    def load_snapshot(self, snapshot: Mapping[str, List[Dict[str, Any]]]) -> None: ...
+    def snapshot(self, path: str, *, extra: Optional[Dict[str, Any]] = ...) -> None: ...
+    def restore(self, path: str) -> Optional[Dict[str, Any]]: ...
     @classmethod
     def add_handled_signal(cls, int) -> None: ...
     def _repropagate(self) -> None: ...
@@ -9,11 +9,11 @@ _GT = TypeVar('_GT', bound='GuildTemplate')
 GuildTemplateTemplate: JsonTemplate
 
 class GuildTemplate(BaseObject[str]):
+    creator: Optional[User]
+
     @property
     def code(self) -> str: ...
     @property
-    def creator(self) -> Optional[User]: ...
-    @property
     def source_guild(self) -> Optional[Guild]: ...
     async def fetch(self: _GT) -> _GT: ...
     async def create_guild(self) -> Guild: ...
@@ -1,6 +1,7 @@
-from weakref import WeakValueDictionary
+from weakref import WeakSet, WeakValueDictionary
+from collections import OrderedDict
 from collections.abc import MutableMapping
-from typing import (Any, Callable, ClassVar, Generic, Iterator,
+from typing import (Any, Callable, ClassVar, Generic, Hashable, Iterator,
                     Iterable, Optional, overload, TypeVar)
 
 from ..manager import BaseManager
@@ -55,11 +56,87 @@ class WeakValueSnowflakeMapping(BaseSnowflakeMapping[VT],
     ...
 
 
+class CachePolicy:
+    max_size: Optional[int]
+    ttl: Optional[float]
+    enabled: bool
+
+    def __init__(self, *, max_size: Optional[int] = ...,
+                 ttl: Optional[float] = ..., enabled: bool = ...) -> None: ...
+
+    def __repr__(self) -> str: ...
+
+    @classmethod
+    def never(cls) -> CachePolicy: ...
+
+    @property
+    def bounded(self) -> bool: ...
+
+
+class CacheMapping(OrderedDict[KT, VT]):
+    policy: CachePolicy
+    on_evict: Optional[Callable[[KT, VT], Any]]
+    clock: Callable[[], float]
+    expiry: OrderedDict[KT, float]
+    evictions: int
+
+    def __init__(self, policy: CachePolicy,
+                 on_evict: Optional[Callable[[KT, VT], Any]] = ...,
+                 clock: Callable[[], float] = ...) -> None: ...
+
+    def evict(self, key: KT) -> None: ...
+
+    def purge(self) -> None: ...
+
+
+class CacheCounters:
+    states: WeakSet[BaseState[Any] | BaseSubState[Any]]
+    entries: int
+    recycled: int
+    recycle_hits: int
+    recycle_expired: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self) -> None: ...
+
+    def to_dict(self) -> dict[str, int]: ...
+
+
+class StateIndex(Generic[KT]):
+    attr: str | Callable[[BaseObject[KT]], Any]
+    multi: bool
+    transform: Optional[Callable[[Any], Hashable]]
+    buckets: dict[Hashable, set[KT]]
+    indexed: dict[KT, frozenset[Hashable]]
+    value_sets: dict[frozenset[Hashable], frozenset[Hashable]]
+
+    def __init__(self, attr: str | Callable[[BaseObject[KT]], Any], *,
+                 multi: bool = ...,
+                 transform: Optional[Callable[[Any], Hashable]] = ...
+                 ) -> None: ...
+
+    def copy(self) -> StateIndex[KT]: ...
+
+    def get_values(self, obj: BaseObject[KT]) -> frozenset[Hashable]: ...
+
+    def make_values(self, value: Any) -> frozenset[Hashable]: ...
+
+    def add(self, key: KT, values: frozenset[Hashable]) -> None: ...
+
+    def discard(self, key: KT) -> None: ...
+
+    def clear(self) -> None: ...
+
+    def get(self, value: Any) -> Iterable[KT]: ...
+
+
 class _StateCommon(Generic[KT]):
     def __contains__(self, key: BaseObject[KT]) -> bool: ...
 
-    def find(self, func: Callable[[BaseObject[KT]], bool]
-             ) -> Optional[BaseObject[KT]]: ...
+    def first(self, func: Optional[Callable[[BaseObject[KT]], bool]] = ...
+              ) -> Optional[BaseObject[KT]]: ...
 
 
 class BaseState(_StateCommon[KT]):
@@ -67,12 +144,22 @@ class BaseState(_StateCommon[KT]):
     __recycled_container__: ClassVar[type[Mapping[KT, BaseObject[KT]]]]
     __maxsize__: ClassVar[int]
     __replace__: ClassVar[bool]
+    __cache_policy__: ClassVar[Optional[CachePolicy]]
+    __indexes__: ClassVar[dict[str, StateIndex[Any]]]
     _items: Mapping[KT, BaseObject[KT]]
     _recycle_bin: Mapping[KT, BaseObject[KT]]
     manager: BaseManager
+    counters: CacheCounters
+    cache_policy: Optional[CachePolicy]
+    indexes: dict[str, StateIndex[KT]]
 
     def __init__(self, *, manager: BaseManager) -> None: ...
 
+    def set_cache_policy(self, policy: Optional[CachePolicy]) -> None: ...
+
+    @property
+    def evictions(self) -> int: ...
+
     @classmethod
     def set_maxsize(cls, maxsize: int) -> None: ...
 
@@ -122,12 +209,20 @@ class BaseState(_StateCommon[KT]):
 
     def extend(self, data: Iterable[dict[str, Any]]) -> list[BaseObject[KT]]: ...
 
+    def reindex(self, value: BaseObject[KT]) -> None: ...
+
+    def find(self, index: str, value: Any) -> list[BaseObject[KT]]: ...
+
+    def find_first(self, index: str,
+                   value: Any) -> Optional[BaseObject[KT]]: ...
+
 
 BaseSnowflakeState = BaseState[Snowflake]
 
 
 class BaseSubState(Generic[KT]):
     superstate: BaseState[KT]
+    counters: CacheCounters
     _keys: set[KT]
 
     def add_key(self, key: KT) -> None: ...
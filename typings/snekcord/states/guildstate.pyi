@@ -1,8 +1,8 @@
-from typing import Any, Dict, Type
+from typing import Any, AsyncIterator, Dict, Optional, Type
 
 from .basestate import BaseState
 from ..objects.guildobject import Guild
-from ..utils import JsonTemplate, Snowflake
+from ..utils import JsonTemplate, Snowflake, SnowflakeConvertable
 
 class GuildState(BaseState[Snowflake]):
     __key_transformer__ = Snowflake.try_snowflake
@@ -10,4 +10,8 @@ class GuildState(BaseState[Snowflake]):
     __guild_template_class__: JsonTemplate
 
     def upsert(self, data: Dict[str, Any]) -> Guild: ...
-    def new_template(self, data: Dict[str, Any]) -> None: ...
\ No newline at end of file
+    def new_template(self, data: Dict[str, Any]) -> None: ...
+    def paginate(
+        self, *, before: Optional[SnowflakeConvertable] = ..., after: Optional[SnowflakeConvertable] = ...,
+        limit: Optional[int] = ..., cache: bool = ...
+    ) -> AsyncIterator[Guild]: ...
@@ -1,13 +1,39 @@
 from __future__ import annotations
 
 import asyncio
+import enum
+from collections import deque
+from concurrent.futures import Executor
 from numbers import Number
 from typing import (Any, Awaitable, Callable, ClassVar, Final,
-                    Generator, Optional, TypeVar)
+                    Generator, Hashable, Optional, TypeVar)
+
+from .undefined import _Undefined
 
 T = TypeVar('T')
 
 
+class QueueOverflow(enum.Enum):
+    DROP_OLDEST = enum.auto()
+    DROP_NEWEST = enum.auto()
+    BLOCK = enum.auto()
+
+
+class _BoundedQueue:
+    dispatcher: EventDispatcher
+    max_queued: Optional[int]
+    overflow: QueueOverflow
+    dropped: int
+
+    def _offer(self, queue: Callable[[], Any], value: Any) -> bool: ...
+
+    def _drained(self) -> None: ...
+
+    def _queued(self) -> int: ...
+
+    def stats(self) -> dict[str, int]: ...
+
+
 class EventDefinition:
     pass
 
@@ -16,16 +42,17 @@ class EventNamespace:
     __events__: Final[ClassVar[dict[str, EventDefinition]]]
 
 
-class EventWaiter:
+class EventWaiter(_BoundedQueue):
     name: str
-    dispatcher: EventDispatcher
     timeout: Optional[Number]
     filterer: Optional[Callable[..., bool]]
     _queue: asyncio.Queue[tuple[Any, ...]]
 
-    def __init__(self, name: str, dispatcher: EventDispatcher,
+    def __init__(self, name: str, *, dispatcher: EventDispatcher,
                  timeout: Optional[Number] = ...,
-                 filterer: Optional[Callable[..., bool]] = ...) -> None: ...
+                 filterer: Optional[Callable[..., bool]] = ...,
+                 max_queued: Optional[int] = ...,
+                 overflow: QueueOverflow = ...) -> None: ...
 
     def _put(self, value: Any) -> None: ...
 
@@ -45,6 +72,69 @@ class EventWaiter:
     __del__ = close
 
 
+class LimitedListener(_BoundedQueue):
+    callback: Callable[..., Any]
+    concurrency: int
+    running: int
+    queue: deque[tuple[Any, ...]]
+
+    def __init__(self, callback: Callable[..., Any], *,
+                 dispatcher: EventDispatcher, concurrency: int = ...,
+                 max_queued: Optional[int] = ...,
+                 overflow: QueueOverflow = ...) -> None: ...
+
+    def __call__(self, *args: Any) -> None: ...
+
+
+def event_key(*args: Any) -> Hashable: ...
+
+
+class WorkerPool:
+    dispatcher: EventDispatcher
+    size: int
+    max_queued: Optional[int]
+    overflow: QueueOverflow
+
+    def __init__(self, *, dispatcher: EventDispatcher, size: int = ...,
+                 max_queued: Optional[int] = ...,
+                 overflow: QueueOverflow = ...) -> None: ...
+
+    def submit(self, key: Hashable, callback: Callable[..., Any],
+               *args: Any) -> None: ...
+
+    def close(self) -> None: ...
+
+    def stats(self) -> list[dict[str, int]]: ...
+
+
+class OrderedListener:
+    callback: Callable[..., Any]
+    dispatcher: EventDispatcher
+    key: Callable[..., Hashable]
+
+    def __init__(self, callback: Callable[..., Any], *,
+                 dispatcher: EventDispatcher,
+                 key: Callable[..., Hashable] = ...) -> None: ...
+
+    def __call__(self, *args: Any) -> None: ...
+
+
+def marshal_event(value: Any) -> Any: ...
+
+
+class ExecutorListener:
+    callback: Callable[..., Any]
+    dispatcher: EventDispatcher
+    executor: str | Executor
+    marshal: bool
+
+    def __init__(self, callback: Callable[..., Any], *,
+                 dispatcher: EventDispatcher, executor: str | Executor,
+                 marshal: Optional[bool] = ...) -> None: ...
+
+    def __call__(self, *args: Any) -> asyncio.Task[Any]: ...
+
+
 def ensure_future(coro: Awaitable[Any] | Any) -> Optional[asyncio.Future]: ...
 
 
@@ -55,11 +145,38 @@ class EventDispatcher:
     _subscribers: list[EventDispatcher]
     events: ClassVar[EventNamespace]
 
+    __listener_max_queued__: ClassVar[Optional[int]]
+    __waiter_max_queued__: ClassVar[Optional[int]]
+    __overflow__: ClassVar[QueueOverflow]
+    __workers__: ClassVar[int]
+    __thread_workers__: ClassVar[Optional[int]]
+    __process_workers__: ClassVar[Optional[int]]
+
     def __init__(self, *,
                  loop: Optional[asyncio.AbstractEventLoop] = ...) -> None: ...
 
-    def register_listener(self, name: str,
-                          callback: Callable[..., Any]) -> None: ...
+    @property
+    def pool(self) -> WorkerPool: ...
+
+    def has_listeners(self, name: str) -> bool: ...
+
+    @property
+    def congested(self) -> bool: ...
+
+    async def wait_uncongested(self) -> None: ...
+
+    def get_executor(self, executor: str | Executor) -> Executor: ...
+
+    def shutdown_executors(self, *, wait: bool = ...) -> None: ...
+
+    def register_listener(self, name: str, callback: Callable[..., Any], *,
+                          concurrency: Optional[int] = ...,
+                          max_queued: Optional[int] | _Undefined = ...,
+                          overflow: Optional[QueueOverflow] = ...,
+                          ordered: bool = ...,
+                          key: Callable[..., Hashable] = ...,
+                          executor: Optional[str | Executor] = ...
+                          ) -> None: ...
 
     def remove_listener(self, name: str,
                         callback: Callable[..., Any]) -> None: ...
@@ -79,7 +196,9 @@ class EventDispatcher:
 
     def unsubscribe(self, dispatcher: EventDispatcher) -> None: ...
 
-    def on(self, name: Optional[str] = ...
+    def queue_stats(self) -> dict[str, Any]: ...
+
+    def on(self, name: Optional[str] = ..., **kwargs: Any
            ) -> Callable[[Callable[..., T]], Callable[..., T]]: ...
 
     def once(self, name: Optional[str] = ...
@@ -1,6 +1,35 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Final, Optional
+from typing import Any, Callable, ClassVar, Final, Optional, Type
+
+
+class JsonCodec:
+    name: ClassVar[str]
+    available: ClassVar[bool]
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any: ...
+
+    def dumps(self, obj: Any) -> str: ...
+
+    def dumps_bytes(self, obj: Any) -> bytes: ...
+
+
+class OrjsonCodec(JsonCodec): ...
+
+
+class MsgspecCodec(JsonCodec): ...
+
+
+class UjsonCodec(JsonCodec): ...
+
+
+JSON_CODECS: Final[dict[str, Type[JsonCodec]]]
+
+
+def get_codec(codec: Optional[JsonCodec | str] = ...) -> JsonCodec: ...
+
+
+def set_default_codec(codec: Optional[JsonCodec | str]) -> None: ...
 
 
 class JsonTemplate:
@@ -9,6 +38,8 @@ class JsonTemplate:
     def __init__(self, *, __extends__: tuple[JsonField, ...] = ...,
                  **fields: JsonField) -> None: ...
 
+    def compile(self) -> Callable[..., None]: ...
+
     def update(self, obj: Any, data: dict[str, Any],
                set_default: bool = ...) -> None: ...
 